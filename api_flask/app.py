@@ -1,43 +1,60 @@
 import sys
 import os
 from pathlib import Path
-import json
-import numpy as np
 
 # Ajouter le répertoire courant au path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from flask import Flask
+from core.json_provider import NumpyJSONProvider
+from core.http_compression import gzip_response
 from routes.predict import predict_bp
 from routes.explain import explain_bp
 from routes.health import health_bp
 from routes.drift import drift_bp
+from routes.cost import cost_bp
+from routes.metrics import metrics_bp
+from routes.admin import admin_bp
+from core.profiling import install_signal_handler
+from services.startup import startup
 
-# JSON Encoder personnalisé pour gérer les types numpy
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.floating)):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, np.bool_):
-            return bool(obj)
-        return super().default(obj)
+# background : chargement + préchauffage dans un thread, /health/ready à 503 d'ici là
+# sync       : tout avant de servir
+# preload    : chargement seul (serveur pre-fork : préchauffage dans chaque worker)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
 
 def create_app():
     app = Flask(__name__)
     
-    # Utiliser le encoder personnalisé
-    app.json_encoder = NumpyEncoder
+    # Sérialisation JSON : types numpy natifs, orjson si disponible
+    app.json = NumpyJSONProvider(app)
+    # Enregistré avant les blueprints : s'exécute après leurs hooks after_request
+    app.after_request(gzip_response)
 
     app.register_blueprint(predict_bp, url_prefix="/predict")
     app.register_blueprint(explain_bp, url_prefix="/explain")
     app.register_blueprint(health_bp, url_prefix="/health")
     app.register_blueprint(drift_bp, url_prefix="/drift")
+    app.register_blueprint(cost_bp, url_prefix="/cost")
+    app.register_blueprint(metrics_bp, url_prefix="/metrics")
+    app.register_blueprint(admin_bp, url_prefix="/admin")
+
+    # Échantillonnage déclenché par /admin/profile dans les autres workers
+    install_signal_handler()
+
+    if STARTUP_MODE == "sync":
+        startup.run(app)
+    elif STARTUP_MODE == "preload":
+        startup.run(app, warm=False)
+    else:
+        startup.start_background(app)
 
     return app
 
-app = create_app()
+# Processus du pool des jobs d'explication (spawn) : ce module y est réimporté
+# sous le nom __mp_main__ quand l'API est lancée par `python app.py`
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
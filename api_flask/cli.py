@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Outils en ligne de commande hors serveur HTTP.
+
+Usage:
+    python api_flask/cli.py sweep scored.csv --accept 0.05:0.5:0.01 --reject 0.5:1:0.01
+    python api_flask/cli.py backtest paysim.csv --workers 16 --output report.json
+    python api_flask/cli.py export model_artifact
+    python api_flask/cli.py check-explainer --rows 2000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pandas as pd
+
+from core.business_config import BusinessConfig, BUSINESS_PATH
+from core.pipeline_utils import MODEL_PATH
+from core.shap_loader import filename as SHAP_PATH
+
+
+def cmd_sweep(args):
+    from services.cost_sweep import sweep_thresholds, best_thresholds, parse_grid
+
+    config = BusinessConfig.from_file(args.config)
+    df = pd.read_csv(args.csv)
+    if args.proba_column not in df.columns:
+        sys.exit(f"❌ Colonne {args.proba_column!r} absente de {args.csv}")
+    has_labels = args.label_column in df.columns
+
+    start = time.perf_counter()
+    result = sweep_thresholds(
+        df[args.proba_column].to_numpy(dtype=float),
+        config.costs,
+        amounts=df["amount"].to_numpy(dtype=float) if "amount" in df.columns else None,
+        labels=df[args.label_column].to_numpy(dtype=float) if has_labels else None,
+        accept_grid=parse_grid(args.accept),
+        reject_grid=parse_grid(args.reject),
+    )
+    elapsed = time.perf_counter() - start
+
+    grid = result["expected_cost"].shape
+    print(f"✅ {len(df)} lignes, grille {grid[0]}×{grid[1]} en {elapsed:.2f}s")
+    print(f"   Seuils actuels : {config.thresholds} (version {config.version})")
+    print(f"   Coût attendu minimal : {best_thresholds(result, 'expected_cost')}")
+    if has_labels:
+        print(f"   Coût réalisé minimal : {best_thresholds(result, 'realized_cost')}")
+
+
+def cmd_backtest(args):
+    from services.backtest import run_backtest
+
+    def progress(rows, elapsed):
+        print(f"\r⏳ {rows:,} lignes — {rows / elapsed:,.0f} lignes/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = run_backtest(
+            args.csv,
+            model_path=args.model,
+            config_path=args.config,
+            label_column=args.label_column,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            progress=progress,
+        )
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    print(file=sys.stderr)
+
+    print(f"✅ {report['rows']:,} lignes en {report['seconds']}s "
+          f"({report['rows_per_second']:,} lignes/s, {report['workers']} processus)")
+    if report["skipped"]:
+        print(f"   {report['skipped']:,} lignes sans label ignorées")
+    print(f"   Modèle version {report['model_version']}, configuration métier version {report['config_version']}")
+    print(f"\n{'':>8} | {'ACCEPT':>10} | {'REVIEW':>10} | {'REJECT':>10}")
+    for label, counts in report["confusion"].items():
+        print(f"{label:>8} | " + " | ".join(f"{n:>10,}" for n in counts.values()))
+    print(f"\n   Fraudes rejetées      : {report['fraud_rejected_rate']}")
+    print(f"   Fraudes signalées     : {report['fraud_flagged_rate']} (REVIEW + REJECT)")
+    print(f"   Légitimes rejetées    : {report['legit_rejected_rate']}")
+    print(f"   Précision des rejets  : {report['reject_precision']}")
+    print(f"   Coût attendu          : {report['expected_cost']:,.2f}")
+    print(f"   Coût réalisé          : {report['realized_cost']:,.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Rapport écrit dans {args.output}")
+
+
+def cmd_export(args):
+    from core.model_registry import ModelRegistry
+    from core.model_artifact import export_artifact, load_artifact
+
+    bundle = ModelRegistry(model_path=args.model, shap_path=args.shap, poll_interval=0).load()
+    try:
+        manifest_path = export_artifact(bundle, args.output)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    # Relecture immédiate : la sonde de parité est rejouée sur l'artefact écrit
+    _, _, explainer, manifest = load_artifact(args.output)
+    print(f"✅ Artefact version {manifest['version']} écrit dans {args.output} ({manifest_path})")
+    if explainer is None:
+        print("   Explainer non reconstructible depuis le Booster : shap.joblib restera chargé")
+
+
+def cmd_check_explainer(args):
+    import numpy as np
+
+    from core.model_registry import ModelRegistry
+    from core.shap_loader import shap_loader
+
+    bundle = ModelRegistry(model_path=args.model, shap_path=args.shap, poll_interval=0, explainer="native").load()
+    if bundle.engine.booster is None:
+        sys.exit("❌ Modèle sans Booster XGBoost natif : contributions natives indisponibles")
+    reference = shap_loader(args.shap)
+    if reference is None:
+        sys.exit(f"❌ Explainer de référence illisible : {args.shap}")
+
+    X_trans = bundle.engine.transform(bundle.schema.sample(args.rows))
+    start = time.perf_counter()
+    expected = np.asarray(reference.shap_values(X_trans))
+    shap_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    native = bundle.explainer.shap_values(X_trans)
+    native_seconds = time.perf_counter() - start
+
+    diff = np.abs(native - expected.reshape(native.shape))
+    print(f"✅ {len(X_trans)} lignes × {native.shape[1]} features comparées")
+    print(f"   Écart absolu max : {diff.max():.3g}, moyen : {diff.mean():.3g} (tolérance {args.tolerance:g})")
+    print(f"   shap.joblib : {shap_seconds * 1000:.1f} ms, natif : {native_seconds * 1000:.1f} ms")
+    if diff.max() > args.tolerance:
+        sys.exit("❌ Contributions natives différentes de shap.joblib : utiliser EXPLAINER=shap")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outils hors ligne de l'API fraude")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sweep = subparsers.add_parser("sweep", help="Coût sur une grille de seuils (accept, reject)")
+    sweep.add_argument("csv", help="CSV scoré (probabilité, amount, label optionnel)")
+    sweep.add_argument("--proba-column", default="probability")
+    sweep.add_argument("--label-column", default="isFraud")
+    sweep.add_argument("--accept", help="Grille accept : 'début:fin:pas' ou 'v1,v2'")
+    sweep.add_argument("--reject", help="Grille reject : 'début:fin:pas' ou 'v1,v2'")
+    sweep.add_argument("--config", default=BUSINESS_PATH)
+    sweep.set_defaults(func=cmd_sweep)
+
+    backtest = subparsers.add_parser("backtest", help="Rejoue le modèle et les seuils sur un CSV labellisé")
+    backtest.add_argument("csv", help="CSV avec les colonnes du modèle et le label")
+    backtest.add_argument("--label-column", default="isFraud")
+    backtest.add_argument("--chunk-size", type=int, default=100_000, help="Lignes par morceau")
+    backtest.add_argument("--workers", type=int, help="Processus de scoring (défaut : nombre de cœurs)")
+    backtest.add_argument("--model", default=MODEL_PATH)
+    backtest.add_argument("--config", default=BUSINESS_PATH)
+    backtest.add_argument("--output", help="Écrit le rapport JSON dans ce fichier")
+    backtest.set_defaults(func=cmd_backtest)
+
+    export = subparsers.add_parser("export", help="Exporte le modèle au format artefact compact")
+    export.add_argument("output", help="Répertoire de l'artefact (MODEL_ARTIFACT_PATH)")
+    export.add_argument("--model", default=MODEL_PATH)
+    export.add_argument("--shap", default=SHAP_PATH)
+    export.set_defaults(func=cmd_export)
+
+    check = subparsers.add_parser("check-explainer", help="Parité des contributions natives XGBoost avec shap.joblib")
+    check.add_argument("--rows", type=int, default=1000, help="Lignes synthétiques comparées")
+    check.add_argument("--tolerance", type=float, default=1e-4, help="Écart absolu maximal toléré")
+    check.add_argument("--model", default=MODEL_PATH)
+    check.add_argument("--shap", default=SHAP_PATH)
+    check.set_defaults(func=cmd_check_explainer)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
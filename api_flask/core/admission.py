@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import copy_current_request_context, jsonify
+
+from core.metrics import Histogram, current_profile, current_route, set_profile, set_route
+
+
+class AdmissionController:
+    """
+    Exécuteur borné pour une classe de routes (predict, explain, drift).
+
+    Le travail CPU des vues est déporté sur un pool de `max_workers` threads
+    et au plus `max_queue` requêtes peuvent attendre derrière. Au-delà, la
+    requête est refusée immédiatement (503 + Retry-After) au lieu de laisser
+    la latence croître sans limite.
+
+    Avec inline=True (worker gunicorn synchrone : un thread par processus),
+    la vue s'exécute dans le thread de la requête, sans pool ni Future. Un
+    processus ne traitant qu'une requête à la fois, la borne
+    max_workers + max_queue s'applique alors à l'ensemble des workers
+    (HostSlots) : une classe lente ne peut pas occuper tous les workers
+    et laisser /predict attendre dans la file du socket.
+    """
+
+    def __init__(self, name, max_workers, max_queue, retry_after=1, inline=False):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.inline = inline
+        self._slots = (HostSlots if inline else threading.BoundedSemaphore)(max_workers + max_queue)
+        self._executor = None if inline else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"admission-{name}"
+        )
+        self._lock = threading.Lock()
+        self.in_system = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time = Histogram()
+
+    def try_acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.admitted += 1
+            self.in_system += 1
+        return True
+
+    def start(self):
+        """Marque une requête admise comme en cours d'exécution."""
+        with self._lock:
+            self.running += 1
+
+    def finish(self):
+        """Termine une requête démarrée par start() et libère sa place."""
+        with self._lock:
+            self.running -= 1
+            self.in_system -= 1
+        self._slots.release()
+
+    def run(self, fn):
+        """Exécute fn() dans le pool ; l'appelant doit avoir obtenu une place."""
+        if self.inline:
+            return self._run_inline(fn)
+        submitted_at = time.perf_counter()
+        route, profile = current_route(), current_profile()
+
+        def task():
+            self.queue_time.observe(time.perf_counter() - submitted_at)
+            set_route(route)
+            set_profile(profile)
+            self.start()
+            try:
+                return fn() if profile is None else profile.run(fn)
+            finally:
+                set_profile(None)
+                self.finish()
+
+        return self._executor.submit(task).result()
+
+    def _run_inline(self, fn):
+        # Route et profil sont déjà ceux du thread courant
+        profile = current_profile()
+        self.start()
+        try:
+            return fn() if profile is None else profile.run(fn)
+        finally:
+            self.finish()
+
+    def stats(self):
+        with self._lock:
+            in_system, running = self.in_system, self.running
+        stats = {
+            "mode": "inline" if self.inline else "pool",
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": in_system - running,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_time_seconds": self.queue_time.snapshot(),
+        }
+        if self.inline:
+            # Requêtes en cours sur tous les workers (les autres compteurs sont ceux du worker)
+            stats["host_in_system"] = self._slots.in_use()
+        return stats
+
+
+class HostSlots:
+    """
+    Places d'admission partagées par les workers forkés d'un même maître.
+
+    Le tableau est créé à l'import, donc dans le maître avant le fork
+    (preload de serve.py). Chaque place occupée porte le pid de son
+    détenteur : le maître libère celles d'un worker mort en cours de
+    requête (timeout, crash) au lieu de les perdre définitivement.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._owners = multiprocessing.Array("i", capacity)
+
+    def acquire(self, blocking=False):
+        """Prend une place si possible, sans jamais attendre."""
+        pid = os.getpid()
+        with self._owners.get_lock():
+            owners = self._owners.get_obj()
+            for i in range(self.capacity):
+                if not owners[i]:
+                    owners[i] = pid
+                    return True
+        return False
+
+    def release(self):
+        pid = os.getpid()
+        with self._owners.get_lock():
+            owners = self._owners.get_obj()
+            for i in range(self.capacity):
+                if owners[i] == pid:
+                    owners[i] = 0
+                    return
+
+    def reclaim(self, pid):
+        """Libère les places d'un processus terminé ; retourne leur nombre."""
+        released = 0
+        with self._owners.get_lock():
+            owners = self._owners.get_obj()
+            for i in range(self.capacity):
+                if owners[i] == pid:
+                    owners[i] = 0
+                    released += 1
+        return released
+
+    def in_use(self):
+        with self._owners.get_lock():
+            return sum(1 for owner in self._owners.get_obj() if owner)
+
+
+# pool : vues exécutées dans un pool borné par classe (serveur multi-thread),
+# bornes par processus ; inline : dans le thread de la requête, bornes
+# communes à tous les workers (serve.py le choisit pour les workers
+# synchrones, où le pool n'ajouterait qu'un changement de thread)
+ADMISSION_MODE = os.getenv("ADMISSION_MODE", "pool")
+if ADMISSION_MODE not in ("pool", "inline"):
+    raise ValueError(f"ADMISSION_MODE inconnu : {ADMISSION_MODE} (pool ou inline)")
+
+
+def _controller(name, workers, queue):
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionController(
+        name,
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", workers)),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", queue)),
+        retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", 1)),
+        inline=ADMISSION_MODE == "inline",
+    )
+
+
+# Une classe par famille de routes : un /explain lent ou un upload de
+# baseline ne peut pas consommer la capacité réservée à /predict
+controllers = {
+    "predict": _controller("predict", workers=8, queue=64),
+    "explain": _controller("explain", workers=2, queue=8),
+    "drift": _controller("drift", workers=1, queue=2),
+    "cost": _controller("cost", workers=1, queue=2),
+}
+
+
+def admission(route_class):
+    """Décorateur de vue : admission bornée + exécution dans le pool de la classe (ou sur place)."""
+    controller = controllers[route_class]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not controller.try_acquire():
+                response = jsonify({
+                    "error": f"Serveur saturé ({route_class}), réessayez plus tard"
+                })
+                response.status_code = 503
+                response.headers["Retry-After"] = str(controller.retry_after)
+                return response
+            fn = lambda: view(*args, **kwargs)
+            return controller.run(fn if controller.inline else copy_current_request_context(fn))
+        return wrapper
+
+    return decorator
+
+
+def admission_stats():
+    return {name: controller.stats() for name, controller in controllers.items()}
+
+
+def reclaim(pid):
+    """Rend les places d'admission d'un worker terminé (appelé par le maître)."""
+    released = sum(controller._slots.reclaim(pid) for controller in controllers.values() if controller.inline)
+    if released:
+        print(f"⚠️ {released} place(s) d'admission libérée(s) après la fin du worker {pid}")
+    return released
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class AttributionMapper:
+    """
+    Regroupe les contributions des colonnes transformées par feature source.
+
+    Un one-hot produit une colonne par catégorie : leurs valeurs SHAP sont
+    additionnées dans la feature d'origine (additivité SHAP), de sorte que
+    l'explication reste alignée sur les clés de la transaction. Construit
+    une seule fois par modèle ; le regroupement d'un lot est un produit
+    matriciel.
+    """
+
+    def __init__(self, names, sources):
+        self.names = list(names)
+        self.sources = np.asarray(sources, dtype=np.intp)
+        # Matrice (colonnes transformées × features sources) de 0/1
+        self.matrix = np.zeros((len(self.sources), len(self.names)))
+        self.matrix[np.arange(len(self.sources)), self.sources] = 1.0
+
+    @classmethod
+    def from_schema(cls, schema):
+        """Mapper d'un schéma (None si les colonnes transformées sont inconnues)."""
+        if schema is None:
+            return None
+        if not schema.has_preprocessing:
+            return cls(schema.names, range(len(schema.names)))
+        sources = _sources_from_names(schema.preprocessor, schema.names)
+        if sources is not None and schema.compiled is not None and len(sources) != schema.compiled.n_outputs:
+            sources = None
+        if sources is None and schema.compiled is not None:
+            sources = _sources_from_compiled(schema.compiled)
+        if sources is None:
+            print("⚠️ Colonnes transformées non rattachables aux features, explications non regroupées")
+            return None
+        return cls(schema.names, sources)
+
+    @property
+    def n_outputs(self):
+        return len(self.sources)
+
+    def group(self, values):
+        """Matrice (lignes × colonnes transformées) → (lignes × features sources)."""
+        return np.asarray(values, dtype=float).reshape(-1, self.n_outputs) @ self.matrix
+
+    def to_dict(self, row, top_k=None):
+        """
+        Explication {feature: valeur} d'une ligne groupée. Avec top_k, seules
+        les k features de plus forte contribution absolue sont gardées, dans
+        l'ordre décroissant.
+        """
+        if top_k is None:
+            return {name: float(value) for name, value in zip(self.names, row)}
+        order = np.argsort(-np.abs(row), kind="stable")[:top_k]
+        return {self.names[j]: float(row[j]) for j in order}
+
+
+def _sources_from_names(preprocessor, names):
+    """
+    Feature source de chaque colonne de sortie, d'après get_feature_names_out.
+
+    Gère le préfixe "<transformateur>__" des ColumnTransformer et le suffixe
+    "_<catégorie>" des OneHotEncoder ; None si une colonne n'est pas rattachée.
+    """
+    if preprocessor is None or not hasattr(preprocessor, "get_feature_names_out"):
+        return None
+    try:
+        outputs = [str(name) for name in preprocessor.get_feature_names_out()]
+    except Exception:
+        return None
+
+    # Les noms les plus longs d'abord : "amount_usd" passe avant "amount"
+    by_length = sorted(range(len(names)), key=lambda j: -len(names[j]))
+    index = {name: j for j, name in enumerate(names)}
+    sources = []
+    for output in outputs:
+        candidates = [output]
+        if "__" in output:
+            candidates.append(output.split("__", 1)[1])
+        source = next((index[c] for c in candidates if c in index), None)
+        if source is None:
+            source = next(
+                (j for c in candidates for j in by_length if c.startswith(names[j] + "_")),
+                None,
+            )
+        if source is None:
+            return None
+        sources.append(source)
+    return sources
+
+
+def _sources_from_compiled(compiled):
+    """Feature source de chaque colonne de sortie d'un préprocesseur compilé (artefact)."""
+    sources = np.full(compiled.n_outputs, -1, dtype=np.intp)
+    sources[compiled.num_out] = compiled.num_in
+    for j, positions in zip(compiled.cat_in, compiled.cat_out):
+        sources[positions] = j
+    return None if (sources < 0).any() else sources
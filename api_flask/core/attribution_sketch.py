@@ -0,0 +1,116 @@
+import numpy as np
+
+# Tranches logarithmiques de rapport GAMMA : un quantile est restitué à
+# ±(GAMMA - 1) / (GAMMA + 1) ≈ 4,8 % près, quelle que soit son échelle
+GAMMA = 1.1
+# En deçà, une contribution compte comme nulle ; au-delà, elle est plafonnée
+MIN_MAGNITUDE = 1e-4
+MAX_MAGNITUDE = 1e4
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+_LOG_GAMMA = np.log(GAMMA)
+_OFFSET = int(np.floor(np.log(MIN_MAGNITUDE) / _LOG_GAMMA))
+# Tranches par signe ; la tranche centrale (indice _SIDE) reçoit les valeurs nulles
+_SIDE = int(np.ceil(np.log(MAX_MAGNITUDE) / _LOG_GAMMA)) - _OFFSET
+N_BINS = 2 * _SIDE + 1
+
+# Valeur restituée pour chaque tranche (milieu relatif de ]γ^(e-1), γ^e])
+_MAGNITUDES = 2 * GAMMA ** (np.arange(1, _SIDE + 1) + _OFFSET) / (GAMMA + 1)
+CENTERS = np.concatenate([-_MAGNITUDES[::-1], [0.0], _MAGNITUDES])
+
+
+class AttributionSketch:
+    """
+    Agrégats en mémoire constante des valeurs SHAP d'un flux, par feature.
+
+    Nombre de lignes, somme des |SHAP|, somme signée et histogramme à
+    tranches logarithmiques fixes (N_BINS par feature) dont on tire des
+    quantiles approchés. update() est vectorisé sur un lot ; deux sketches
+    se fusionnent par addition (processus, tranches de temps).
+    """
+
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.count = 0
+        self.sum = np.zeros(n_features)
+        self.abs_sum = np.zeros(n_features)
+        self.hist = np.zeros((n_features, N_BINS), dtype=np.int64)
+
+    def update(self, values):
+        """Ajoute un lot (lignes × features) ; les lignes non finies sont ignorées."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.n_features)
+        finite = np.isfinite(values).all(axis=1)
+        if not finite.all():
+            values = values[finite]
+        if not len(values):
+            return
+        magnitude = np.abs(values)
+        with np.errstate(divide="ignore"):
+            exponent = np.ceil(np.log(magnitude) / _LOG_GAMMA) - _OFFSET
+        side = np.clip(exponent, 1, _SIDE) * np.sign(values)
+        bins = np.where(magnitude < MIN_MAGNITUDE, 0, side).astype(np.intp) + _SIDE
+        # Un seul bincount pour toutes les features : décalage de N_BINS par colonne
+        bins += np.arange(self.n_features) * N_BINS
+        self.hist += np.bincount(bins.ravel(), minlength=self.hist.size).reshape(self.hist.shape)
+        self.count += len(values)
+        self.sum += values.sum(axis=0)
+        self.abs_sum += magnitude.sum(axis=0)
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.abs_sum += other.abs_sum
+        self.hist += other.hist
+        return self
+
+    def quantiles(self, quantiles=QUANTILES, absolute=False):
+        """Quantiles approchés (features × quantiles) des valeurs signées ou absolues."""
+        hist, centers = self.hist, CENTERS
+        if absolute:
+            # Repli des tranches négatives sur leurs symétriques positives
+            hist = hist[:, _SIDE:].copy()
+            hist[:, 1:] += self.hist[:, _SIDE - 1::-1]
+            centers = CENTERS[_SIDE:]
+        if not self.count:
+            return np.full((self.n_features, len(quantiles)), np.nan)
+        cumulative = hist.cumsum(axis=1)
+        ranks = np.asarray(quantiles) * (self.count - 1)
+        return centers[(cumulative[:, :, None] > ranks).argmax(axis=1)]
+
+    def summary(self, names, quantiles=QUANTILES):
+        """{feature: {count, mean_abs, mean, quantiles, abs_quantiles}}"""
+        count = max(self.count, 1)
+        signed = self.quantiles(quantiles)
+        absolute = self.quantiles(quantiles, absolute=True)
+        labels = [f"p{round(q * 100):02d}" for q in quantiles]
+        return {
+            name: {
+                "count": self.count,
+                "mean_abs": float(self.abs_sum[j] / count),
+                "mean": float(self.sum[j] / count),
+                "quantiles": dict(zip(labels, signed[j].tolist())),
+                "abs_quantiles": dict(zip(labels, absolute[j].tolist())),
+            }
+            for j, name in enumerate(names)
+        }
+
+    def to_arrays(self, prefix):
+        return {
+            f"{prefix}count": np.array(self.count),
+            f"{prefix}sum": self.sum,
+            f"{prefix}abs_sum": self.abs_sum,
+            f"{prefix}hist": self.hist,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        hist = arrays[f"{prefix}hist"]
+        if hist.shape[1] != N_BINS:
+            raise ValueError(f"Sketch à {hist.shape[1]} tranches, {N_BINS} attendues")
+        sketch = cls(hist.shape[0])
+        sketch.count = int(arrays[f"{prefix}count"])
+        sketch.sum = arrays[f"{prefix}sum"].astype(np.float64)
+        sketch.abs_sum = arrays[f"{prefix}abs_sum"].astype(np.float64)
+        sketch.hist = hist.astype(np.int64)
+        return sketch
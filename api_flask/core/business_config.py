@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import yaml
+
+from core.decision_table import DecisionTable
+
+BUSINESS_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "business.yaml")
+
+
+class BusinessConfigError(ValueError):
+    """Configuration métier invalide (le fichier actif reste en place)."""
+
+
+class BusinessConfig:
+    """
+    Version chargée de business.yaml, validée et figée.
+
+    Les seuils et coûts sont extraits une fois en attributs float : le
+    chemin chaud lit config.accept / config.reject sans parcourir le YAML.
+    La section optionnelle `segments` est compilée en table de décision
+    (seuils et coûts par type et tranche de montant).
+    """
+
+    def __init__(self, raw, signature=None):
+        self.raw = raw
+        self.signature = signature
+        thresholds = _section(raw, "thresholds")
+        costs = _section(raw, "costs")
+
+        self.accept = _number(thresholds, "accept", "thresholds")
+        self.reject = _number(thresholds, "reject", "thresholds")
+        if not 0.0 <= self.accept <= self.reject <= 1.0:
+            raise BusinessConfigError(
+                f"Seuils incohérents : 0 <= accept ({self.accept}) <= reject ({self.reject}) <= 1 attendu"
+            )
+        self.thresholds = {"accept": self.accept, "reject": self.reject}
+
+        self.costs = {key: _number(costs, key, "costs") for key in costs}
+        for key in ("fp", "fn"):
+            if key not in self.costs:
+                raise BusinessConfigError(f"Coût manquant : costs.{key}")
+        if any(value < 0 for value in self.costs.values()):
+            raise BusinessConfigError("Les coûts doivent être positifs ou nuls")
+
+        self.decision_table = DecisionTable.from_config(raw.get("segments"), self.accept, self.reject, self.costs)
+
+        self.version = hashlib.sha256(json.dumps(raw, sort_keys=True).encode()).hexdigest()[:12]
+        self.loaded_at = datetime.now().isoformat()
+
+    @classmethod
+    def from_file(cls, path=BUSINESS_PATH, signature=None):
+        try:
+            with open(path) as f:
+                raw = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise BusinessConfigError(f"YAML invalide : {e}") from e
+        if not isinstance(raw, dict):
+            raise BusinessConfigError("Le fichier doit contenir un dictionnaire YAML")
+        return cls(raw, signature=signature)
+
+
+class BusinessConfigProvider:
+    """
+    Point d'accès unique à la configuration métier (seuils, coûts).
+
+    Même principe que le registre de modèles : un thread compare taille et
+    mtime du fichier, valide la nouvelle version à côté de l'active et
+    l'échange d'un seul coup. Un fichier invalide est ignoré (la version
+    active reste servie) ; une requête garde la version qu'elle a lue.
+    """
+
+    def __init__(self, path=BUSINESS_PATH, poll_interval=5.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._config = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self._rejected_signature = None
+        self.last_error = None
+
+    def current(self):
+        """Configuration active (chargée à la première demande si nécessaire)."""
+        config = self._config
+        if config is None:
+            config = self.load()
+        return config
+
+    def load(self, force=False):
+        """Relit le fichier si besoin et retourne la configuration active."""
+        with self._load_lock:
+            signature = self._signature()
+            if self._config is not None and not force and signature == self._config.signature:
+                return self._config
+
+            try:
+                config = BusinessConfig.from_file(self.path, signature=signature)
+            except (OSError, ValueError) as e:
+                if self._config is None:
+                    raise
+                self.last_error = str(e)
+                # Ne pas retenter à chaque passage tant que le fichier ne change pas
+                self._rejected_signature = signature
+                print(f"⚠️ Configuration métier rejetée, conservation de la version {self._config.version} : {e}")
+                return self._config
+
+            previous, self._config = self._config, config
+            self.last_error = None
+            if previous is not None and previous.version == config.version:
+                return config
+            print(f"✅ Configuration métier version {config.version} active "
+                  f"(accept={config.accept}, reject={config.reject})")
+
+        if previous is not None:
+            for listener in self._listeners:
+                listener(config)
+        return config
+
+    def add_listener(self, callback):
+        """Enregistre callback(config), appelé après chaque changement de version."""
+        self._listeners.append(callback)
+
+    def start_watcher(self):
+        """Démarre la surveillance du fichier (sans effet si poll_interval <= 0)."""
+        if self.poll_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch, name="business-config-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                signature = self._signature()
+                if self._config is not None and signature not in (self._config.signature, self._rejected_signature):
+                    print("🔄 Changement de business.yaml détecté, rechargement")
+                    self.load()
+            except Exception as e:
+                print(f"❌ Erreur lors du rechargement de la configuration métier : {e}")
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def describe(self):
+        config = self._config
+        if config is None:
+            return {"config_loaded": False}
+        return {
+            "config_loaded": True,
+            "config_version": config.version,
+            "config_loaded_at": config.loaded_at,
+            "config_last_error": self.last_error,
+        }
+
+
+def _section(raw, name):
+    section = raw.get(name)
+    if not isinstance(section, dict):
+        raise BusinessConfigError(f"Section manquante ou invalide : {name}")
+    return section
+
+
+def _number(section, key, name):
+    value = section.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BusinessConfigError(f"Valeur numérique attendue pour {name}.{key} (reçu {value!r})")
+    return float(value)
+
+
+business_config = BusinessConfigProvider(
+    poll_interval=float(os.getenv("BUSINESS_RELOAD_INTERVAL", 5))
+)
+
+
+def _restart_watcher_after_fork():
+    # Même contrainte que le registre de modèles : relancer le thread dans l'enfant
+    if business_config._config is not None:
+        business_config.start_watcher()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_watcher_after_fork)
@@ -0,0 +1,162 @@
+import numpy as np
+
+# Transformateurs sklearn que l'on sait réexprimer en opérations numpy pures.
+# Tout autre transformateur désactive la compilation (repli sur sklearn).
+_SUPPORTED_SCALERS = ("StandardScaler", "MinMaxScaler", "RobustScaler")
+
+
+class CompiledPreprocessor:
+    """
+    Réimplémentation numpy d'un préprocesseur sklearn ajusté.
+
+    Les colonnes numériques sont ramenées à une transformation affine
+    (x * mult + add) et les colonnes catégorielles à un one-hot par
+    recherche dichotomique dans les catégories triées. Aucune construction
+    de DataFrame ni validation sklearn n'a lieu à l'appel.
+    """
+
+    def __init__(self, n_outputs, num_in, num_out, mult, add, cat_in, cat_sorted, cat_out):
+        self.n_outputs = n_outputs
+        self.num_in = np.asarray(num_in, dtype=np.intp)
+        self.num_out = np.asarray(num_out, dtype=np.intp)
+        self.mult = np.asarray(mult, dtype=float)
+        self.add = np.asarray(add, dtype=float)
+        # Pour chaque colonne catégorielle : catégories triées et position
+        # de sortie correspondante
+        self.cat_in = list(cat_in)
+        self.cat_sorted = list(cat_sorted)
+        self.cat_out = [np.asarray(o, dtype=np.intp) for o in cat_out]
+
+    def transform(self, X):
+        """Transforme une matrice brute (objet, ordre du schéma) en matrice float."""
+        n = X.shape[0]
+        out = np.zeros((n, self.n_outputs))
+        if self.num_in.size:
+            out[:, self.num_out] = X[:, self.num_in].astype(float) * self.mult + self.add
+        for j, cats, positions in zip(self.cat_in, self.cat_sorted, self.cat_out):
+            column = X[:, j]
+            pos = np.minimum(np.searchsorted(cats, column), len(cats) - 1)
+            rows = np.nonzero(cats[pos] == column)[0]
+            # Catégorie inconnue (handle_unknown="ignore") : ligne laissée à zéro
+            out[rows, positions[pos[rows]]] = 1.0
+        return out
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor, feature_names):
+        """
+        Compile un préprocesseur ajusté, ou retourne None s'il contient un
+        transformateur non supporté.
+        """
+        blocks = _resolve_blocks(preprocessor, list(feature_names))
+        if blocks is None:
+            return None
+
+        num_in, num_out, mult, add = [], [], [], []
+        cat_in, cat_sorted, cat_out = [], [], []
+        n_outputs = 0
+
+        for transformer, cols, out_start in blocks:
+            name = type(transformer).__name__ if not isinstance(transformer, str) else transformer
+
+            if name == "passthrough":
+                coefs = (np.ones(len(cols)), np.zeros(len(cols)))
+            elif name in _SUPPORTED_SCALERS:
+                coefs = _affine_coefficients(transformer, len(cols))
+                if coefs is None:
+                    return None
+            elif name == "OneHotEncoder":
+                if not _is_plain_one_hot(transformer):
+                    return None
+                offset = out_start
+                for j, categories in zip(cols, transformer.categories_):
+                    categories = np.asarray(categories, dtype=object)
+                    order = np.argsort(categories)
+                    cat_in.append(j)
+                    cat_sorted.append(categories[order])
+                    cat_out.append(offset + order)
+                    offset += len(categories)
+                n_outputs = max(n_outputs, offset)
+                continue
+            else:
+                return None
+
+            num_in.extend(cols)
+            num_out.extend(range(out_start, out_start + len(cols)))
+            mult.extend(coefs[0])
+            add.extend(coefs[1])
+            n_outputs = max(n_outputs, out_start + len(cols))
+
+        return cls(n_outputs, num_in, num_out, mult, add, cat_in, cat_sorted, cat_out)
+
+
+def _resolve_blocks(preprocessor, feature_names):
+    """
+    Liste (transformateur, indices d'entrée, début de sortie) dans l'ordre
+    des colonnes de sortie, ou None si la structure n'est pas supportée.
+    """
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        # Transformateur unique appliqué à toutes les colonnes
+        return [(preprocessor, list(range(len(feature_names))), 0)]
+
+    if getattr(preprocessor, "sparse_output_", False):
+        return None
+
+    blocks = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+        cols = column_indices(columns, feature_names)
+        if cols is None:
+            return None
+        if not cols:
+            continue
+        output_slice = preprocessor.output_indices_.get(name)
+        if output_slice is None:
+            return None
+        blocks.append((transformer, cols, output_slice.start))
+    return blocks
+
+
+def column_indices(columns, feature_names):
+    """Convertit une sélection de colonnes ColumnTransformer en indices entiers."""
+    if isinstance(columns, (str, int, np.integer)):
+        columns = [columns]
+    if isinstance(columns, slice):
+        return list(range(len(feature_names)))[columns]
+    columns = list(columns)
+    if columns and all(isinstance(c, (bool, np.bool_)) for c in columns):
+        return [i for i, keep in enumerate(columns) if keep]
+    indices = []
+    for c in columns:
+        if isinstance(c, str):
+            if c not in feature_names:
+                return None
+            indices.append(feature_names.index(c))
+        elif isinstance(c, (int, np.integer)):
+            indices.append(int(c))
+        else:
+            return None
+    return indices
+
+
+def _affine_coefficients(scaler, n_columns):
+    """Coefficients (mult, add) tels que transform(x) = x * mult + add."""
+    name = type(scaler).__name__
+    if name == "MinMaxScaler":
+        if getattr(scaler, "clip", False):
+            return None
+        return np.asarray(scaler.scale_, dtype=float), np.asarray(scaler.min_, dtype=float)
+
+    center = scaler.mean_ if name == "StandardScaler" else scaler.center_
+    scale = scaler.scale_
+    center = np.zeros(n_columns) if center is None else np.asarray(center, dtype=float)
+    scale = np.ones(n_columns) if scale is None else np.asarray(scale, dtype=float)
+    return 1.0 / scale, -center / scale
+
+
+def _is_plain_one_hot(encoder):
+    """OneHotEncoder sans drop ni regroupement des catégories rares."""
+    return (
+        getattr(encoder, "drop_idx_", None) is None
+        and not getattr(encoder, "_infrequent_enabled", False)
+    )
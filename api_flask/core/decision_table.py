@@ -0,0 +1,166 @@
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+DECISIONS = np.array(["ACCEPT", "REVIEW", "REJECT"])
+
+
+class DecisionTableError(ValueError):
+    """Règle de segment invalide dans business.yaml."""
+
+
+class DecisionTable:
+    """
+    Seuils et coûts par segment (type de transaction × tranche de montant),
+    compilés en tableaux de correspondance.
+
+    Les bornes de toutes les règles forment une grille de tranches commune ;
+    table[type, tranche] donne l'indice du segment applicable (0 = politique
+    globale). Une décision se résout donc par une recherche dichotomique sur
+    les bornes et deux indexations, pour une ligne comme pour un lot, sans
+    parcourir les règles.
+    """
+
+    def __init__(self, names, edges, types, table, accept, reject, costs):
+        self.names = names
+        self.edges = edges
+        self.types = types
+        self.table = table
+        self.accept = accept
+        self.reject = reject
+        self.costs = costs
+        self.segment_costs = [{key: float(values[i]) for key, values in costs.items()} for i in range(len(names))]
+        # Copies en listes Python pour le chemin d'une seule ligne
+        self._edges = edges.tolist()
+        self._rows = {t: table[i].tolist() for i, t in enumerate(types)}
+        self._default_row = table[-1].tolist()
+        self._accept = accept.tolist()
+        self._reject = reject.tolist()
+        self._type_index = pd.Index(types)
+        self._uniform = len(names) == 1
+
+    @classmethod
+    def from_config(cls, rules, accept, reject, costs):
+        """
+        Compile la section `segments` de business.yaml.
+
+        Args:
+            rules: Liste de règles {type, min_amount, max_amount, accept,
+                reject, costs}, toutes optionnelles ; la première règle
+                correspondant à une transaction s'applique
+            accept, reject, costs: Politique globale (segment 0 et valeurs
+                par défaut des règles)
+        """
+        rules = rules or []
+        if not isinstance(rules, list):
+            raise DecisionTableError("segments doit être une liste de règles")
+
+        names, seg_accept, seg_reject, seg_costs = ["default"], [accept], [reject], [costs]
+        bounds = []
+        for i, rule in enumerate(rules):
+            if not isinstance(rule, dict):
+                raise DecisionTableError(f"segments[{i}] doit être un dictionnaire")
+            low = _number(rule, "min_amount", i, -np.inf)
+            high = _number(rule, "max_amount", i, np.inf)
+            if not low < high:
+                raise DecisionTableError(f"segments[{i}] : min_amount doit être inférieur à max_amount")
+            rule_accept = _number(rule, "accept", i, accept)
+            rule_reject = _number(rule, "reject", i, reject)
+            if not 0.0 <= rule_accept <= rule_reject <= 1.0:
+                raise DecisionTableError(f"segments[{i}] : 0 <= accept <= reject <= 1 attendu")
+            overrides = rule.get("costs") or {}
+            if not isinstance(overrides, dict):
+                raise DecisionTableError(f"segments[{i}].costs doit être un dictionnaire")
+            rule_costs = {**costs, **{key: _number(overrides, key, i) for key in overrides}}
+            if any(value < 0 for value in rule_costs.values()):
+                raise DecisionTableError(f"segments[{i}] : les coûts doivent être positifs ou nuls")
+
+            tx_type = rule.get("type")
+            names.append(rule.get("name") or f"{tx_type or '*'}[{_fmt(low)}, {_fmt(high)})")
+            seg_accept.append(rule_accept)
+            seg_reject.append(rule_reject)
+            seg_costs.append(rule_costs)
+            bounds.append((tx_type, low, high))
+
+        edges = np.unique([b for _, low, high in bounds for b in (low, high) if np.isfinite(b)]).astype(float)
+        types = sorted({tx_type for tx_type, _, _ in bounds if tx_type is not None})
+        lower = np.concatenate(([-np.inf], edges))
+        upper = np.concatenate((edges, [np.inf]))
+
+        # Une ligne par type nommé, la dernière pour les autres types
+        table = np.zeros((len(types) + 1, len(edges) + 1), dtype=np.intp)
+        for row, t in enumerate(types + [None]):
+            for band in range(len(edges) + 1):
+                for seg, (tx_type, low, high) in enumerate(bounds, start=1):
+                    if tx_type in (None, t) and low <= lower[band] and upper[band] <= high:
+                        table[row, band] = seg
+                        break
+
+        cost_keys = costs.keys()
+        return cls(
+            names,
+            edges,
+            types,
+            table,
+            np.array(seg_accept, dtype=float),
+            np.array(seg_reject, dtype=float),
+            {key: np.array([c[key] for c in seg_costs], dtype=float) for key in cost_keys},
+        )
+
+    def segment(self, tx_type, amount):
+        """Indice du segment d'une transaction."""
+        row = self._rows.get(tx_type, self._default_row)
+        return row[bisect_right(self._edges, amount or 0.0)]
+
+    def decide(self, p, tx_type=None, amount=None):
+        """Décision et coûts du segment pour une transaction : (decision, costs)."""
+        if self._uniform:
+            seg = 0
+        else:
+            seg = self._rows.get(tx_type, self._default_row)[bisect_right(self._edges, amount or 0.0)]
+        if p < self._accept[seg]:
+            decision = "ACCEPT"
+        elif p < self._reject[seg]:
+            decision = "REVIEW"
+        else:
+            decision = "REJECT"
+        return decision, self.segment_costs[seg]
+
+    def segments_batch(self, types, amounts):
+        """Indices de segment d'un lot (types inconnus ou manquants : ligne par défaut)."""
+        rows = self._type_index.get_indexer(pd.Index(types, dtype=object))
+        rows[rows < 0] = len(self.types)
+        amounts = np.nan_to_num(np.asarray(amounts, dtype=float), nan=0.0)
+        return self.table[rows, np.searchsorted(self.edges, amounts, side="right")]
+
+    def decide_batch(self, probabilities, types, amounts):
+        """
+        Décisions et coûts par ligne pour un lot.
+
+        Returns:
+            (decisions, costs) : tableau de décisions et dictionnaire de
+            tableaux de coûts (fp, fn, ...) utilisable par compute_cost_batch
+        """
+        seg = self.segments_batch(types, amounts)
+        p = np.asarray(probabilities, dtype=float)
+        # Mêmes comparaisons que decide() (une probabilité NaN donne REJECT)
+        decisions = DECISIONS[(~(p < self.accept[seg])).astype(np.intp) + ~(p < self.reject[seg])]
+        return decisions, {key: values[seg] for key, values in self.costs.items()}
+
+    def describe(self):
+        return [
+            {"name": name, "accept": float(self.accept[i]), "reject": float(self.reject[i]), "costs": self.segment_costs[i]}
+            for i, name in enumerate(self.names)
+        ]
+
+
+def _number(section, key, index, default=None):
+    value = section.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise DecisionTableError(f"segments[{index}].{key} : valeur numérique attendue (reçu {value!r})")
+    return float(value)
+
+
+def _fmt(bound):
+    return "" if not np.isfinite(bound) else f"{bound:g}"
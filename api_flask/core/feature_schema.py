@@ -0,0 +1,231 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.compiled_preprocessor import CompiledPreprocessor, column_indices
+from core.metrics import stage
+
+NUMERIC = "numeric"
+CATEGORICAL = "categorical"
+
+
+class SchemaValidationError(ValueError):
+    """Transaction rejetée par le schéma (clé inconnue, manquante ou mauvais type)."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Transaction invalide : " + "; ".join(self.errors))
+
+
+class FeatureSchema:
+    """
+    Schéma des features attendues par le modèle, construit une seule fois
+    au chargement du pipeline.
+
+    Valide un dictionnaire de transaction et l'encode directement dans une
+    ligne numpy dans l'ordre fixe des colonnes d'entraînement. Lorsque le
+    préprocesseur est compilable, la transformation se fait aussi en numpy
+    pur, sans DataFrame.
+    """
+
+    def __init__(self, names, kinds, categories=None, preprocessor=None):
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        # Catégories autorisées pour les encodeurs qui refusent l'inconnu
+        self.categories = categories or {}
+        self.preprocessor = preprocessor
+        self.compiled = None
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Construit le schéma d'un pipeline ajusté (None si non exploitable)."""
+        if pipeline is None or not hasattr(pipeline, "feature_names_in_"):
+            return None
+
+        names = [str(name) for name in pipeline.feature_names_in_]
+        preprocessor = None
+        if hasattr(pipeline, "steps") and len(pipeline.steps) > 1:
+            preprocessor = pipeline[:-1]
+            if len(preprocessor.steps) == 1:
+                preprocessor = preprocessor.steps[0][1]
+
+        kinds = [NUMERIC] * len(names)
+        categories = {}
+        for encoder, cols in _encoders(preprocessor, names):
+            strict = getattr(encoder, "handle_unknown", "error") == "error"
+            for j, cats in zip(cols, encoder.categories_):
+                cats = list(cats)
+                if all(isinstance(c, str) for c in cats):
+                    kinds[j] = CATEGORICAL
+                if strict:
+                    categories[names[j]] = set(cats)
+
+        schema = cls(names, kinds, categories, preprocessor)
+        if preprocessor is not None:
+            schema.compiled = _compile_and_check(schema, preprocessor)
+        return schema
+
+    @property
+    def has_preprocessing(self):
+        """Préprocessing séparable du modèle (sklearn ou compilé)."""
+        return self.preprocessor is not None or self.compiled is not None
+
+    # ─── Validation & encodage ─────────────────────────────────────────
+
+    def validate(self, data):
+        """Retourne la liste des erreurs de validation (vide si valide)."""
+        if not isinstance(data, dict):
+            return ["un objet JSON est attendu"]
+
+        errors = []
+        unknown = [key for key in data if key not in self.index]
+        if unknown:
+            errors.append(f"clés inconnues : {', '.join(sorted(map(str, unknown)))}")
+        missing = [name for name in self.names if name not in data]
+        if missing:
+            errors.append(f"clés manquantes : {', '.join(missing)}")
+
+        for name, kind in zip(self.names, self.kinds):
+            if name not in data:
+                continue
+            value = data[name]
+            if kind == NUMERIC:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    errors.append(f"'{name}' doit être numérique (reçu {type(value).__name__})")
+                    continue
+            elif not isinstance(value, str):
+                errors.append(f"'{name}' doit être une chaîne (reçu {type(value).__name__})")
+                continue
+            allowed = self.categories.get(name)
+            if allowed is not None and value not in allowed:
+                errors.append(f"'{name}' : valeur inconnue '{value}' (attendu : {', '.join(sorted(map(str, allowed)))})")
+        return errors
+
+    def encode(self, data):
+        """
+        Valide et encode une transaction dans une ligne (1, n_features).
+
+        La ligne est préallouée par thread et réutilisée au prochain appel
+        du même thread : l'appelant doit la consommer (ou la copier) avant.
+        """
+        with stage("encoding"):
+            errors = self.validate(data)
+            if errors:
+                raise SchemaValidationError(errors)
+
+            row = getattr(self._local, "row", None)
+            if row is None:
+                row = self._local.row = np.empty((1, len(self.names)), dtype=object)
+            for j, name in enumerate(self.names):
+                row[0, j] = data[name]
+            return row
+
+    def encode_batch(self, data_list):
+        """
+        Encode un lot de transactions.
+
+        Returns:
+            (X, valid_idx, errors) : matrice des lignes valides, leur index
+            dans data_list et dictionnaire {index: message d'erreur}
+        """
+        with stage("encoding"):
+            errors = {}
+            valid_idx = []
+            for i, data in enumerate(data_list):
+                row_errors = self.validate(data)
+                if row_errors:
+                    errors[i] = str(SchemaValidationError(row_errors))
+                else:
+                    valid_idx.append(i)
+
+            X = np.empty((len(valid_idx), len(self.names)), dtype=object)
+            for r, i in enumerate(valid_idx):
+                data = data_list[i]
+                for j, name in enumerate(self.names):
+                    X[r, j] = data[name]
+            return X, valid_idx, errors
+
+    # ─── Préprocessing ────────────────────────────────────────────────
+
+    def to_frame(self, X):
+        """DataFrame équivalent à une matrice encodée (chemin de repli sklearn)."""
+        columns = {}
+        for j, (name, kind) in enumerate(zip(self.names, self.kinds)):
+            columns[name] = X[:, j].astype(float) if kind == NUMERIC else X[:, j]
+        return pd.DataFrame(columns)
+
+    def transform(self, X):
+        """Applique le préprocesseur à une matrice encodée."""
+        if self.compiled is not None:
+            return self.compiled.transform(X)
+        X_trans = self.preprocessor.transform(self.to_frame(X))
+        return X_trans.toarray() if hasattr(X_trans, "toarray") else X_trans
+
+    def sample(self, n_rows=8):
+        """Lignes synthétiques valides couvrant chaque catégorie connue."""
+        rng = np.random.default_rng(0)
+        if self.preprocessor is None and self.compiled is not None:
+            known = {j: list(cats) for j, cats in zip(self.compiled.cat_in, self.compiled.cat_sorted)}
+        else:
+            known = _known_categories(self.preprocessor, self.names)
+        X = np.empty((n_rows, len(self.names)), dtype=object)
+        for j, (name, kind) in enumerate(zip(self.names, self.kinds)):
+            if kind == CATEGORICAL:
+                cats = known.get(j) or ["?"]
+                X[:, j] = [cats[r % len(cats)] for r in range(n_rows)]
+            else:
+                X[:, j] = list(np.round(rng.lognormal(5, 2, n_rows), 2))
+        return X
+
+
+def _encoders(preprocessor, names):
+    """Encodeurs catégoriels (attribut categories_) et indices de leurs colonnes."""
+    if preprocessor is None:
+        return []
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        return [(preprocessor, range(len(names)))] if hasattr(preprocessor, "categories_") else []
+
+    found = []
+    for _, transformer, columns in preprocessor.transformers_:
+        steps = [s for _, s in transformer.steps] if hasattr(transformer, "steps") else [transformer]
+        encoder = next((s for s in steps if hasattr(s, "categories_")), None)
+        cols = column_indices(columns, names) if encoder is not None else None
+        if cols:
+            found.append((encoder, cols))
+    return found
+
+
+def _known_categories(preprocessor, names):
+    return {
+        j: list(cats)
+        for encoder, cols in _encoders(preprocessor, names)
+        for j, cats in zip(cols, encoder.categories_)
+    }
+
+
+def _compile_and_check(schema, preprocessor):
+    """
+    Compile le préprocesseur puis vérifie la parité avec sklearn sur des
+    lignes synthétiques. Retourne None (repli sklearn) en cas d'écart.
+    """
+    try:
+        compiled = CompiledPreprocessor.from_preprocessor(preprocessor, schema.names)
+        if compiled is None:
+            print("ℹ️ Préprocesseur non compilable, utilisation de sklearn")
+            return None
+        probe = schema.sample()
+        expected = preprocessor.transform(schema.to_frame(probe))
+        expected = expected.toarray() if hasattr(expected, "toarray") else np.asarray(expected)
+        if expected.shape != (probe.shape[0], compiled.n_outputs) or not np.allclose(
+            compiled.transform(probe), expected, rtol=1e-6, atol=1e-9
+        ):
+            print("⚠️ Préprocesseur compilé différent de sklearn, utilisation de sklearn")
+            return None
+        print("✅ Préprocesseur compilé en numpy")
+        return compiled
+    except Exception as e:
+        print(f"⚠️ Compilation du préprocesseur impossible ({e}), utilisation de sklearn")
+        return None
@@ -0,0 +1,41 @@
+import gzip
+import os
+
+from flask import request
+
+# Compression gzip des réponses volumineuses (rapports de drift, baseline)
+GZIP_RESPONSES = os.getenv("GZIP_RESPONSES", "1") == "1"
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 1))
+
+COMPRESSIBLE = ("application/json", "text/plain", "text/csv")
+
+
+def gzip_response(response):
+    """
+    Hook after_request : compresse le corps si le client accepte gzip.
+
+    Les petites réponses (/predict) restent telles quelles : en dessous de
+    GZIP_MIN_SIZE octets, la compression coûte plus qu'elle ne rapporte.
+    Les réponses en flux (NDJSON) ne sont jamais mises en mémoire pour
+    être compressées.
+    """
+    if (
+        not GZIP_RESPONSES
+        or response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+        or "gzip" not in request.accept_encodings
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    # mtime=0 : même entrée, mêmes octets (cache HTTP, ETag faibles)
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
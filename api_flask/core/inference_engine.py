@@ -0,0 +1,100 @@
+import numpy as np
+
+from core.metrics import stage
+
+NATIVE_PATH = "xgboost_native"
+SKLEARN_PATH = "sklearn"
+
+
+class InferenceEngine:
+    """
+    Moteur d'inférence construit au-dessus du pipeline chargé.
+
+    Si le dernier étage du pipeline est un modèle XGBoost, le pipeline est
+    scindé en préprocesseur (via le schéma) et Booster natif, et le scoring
+    passe par Booster.inplace_predict : pas de DMatrix ni de validation
+    sklearn à chaque appel. Sinon, le chemin sklearn actuel est conservé.
+
+    Un Booster peut aussi être fourni directement (artefact compact, sans
+    pipeline) : il est alors utilisé tel quel, sa parité étant vérifiée par
+    l'appelant.
+    """
+
+    def __init__(self, pipeline, schema, booster=None, iteration_range=(0, 0), model_name=None):
+        self.pipeline = pipeline
+        self.schema = schema
+        self.path = SKLEARN_PATH
+        self.booster = booster
+        self.iteration_range = iteration_range
+        self.final_estimator = pipeline.steps[-1][1] if hasattr(pipeline, "steps") else pipeline
+        self.model_name = model_name or type(self.final_estimator).__name__
+
+        if booster is not None:
+            self.path = NATIVE_PATH
+        elif schema is not None:
+            self._try_native()
+
+    def _try_native(self):
+        """Active le chemin natif XGBoost s'il reproduit exactement le pipeline."""
+        if not hasattr(self.final_estimator, "get_booster"):
+            return
+        if not self.schema.has_preprocessing and "categorical" in self.schema.kinds:
+            return
+
+        try:
+            self.booster = self.final_estimator.get_booster()
+            if hasattr(self.final_estimator, "_get_iteration_range"):
+                self.iteration_range = self.final_estimator._get_iteration_range(None)
+
+            probe = self.schema.sample()
+            expected = self.pipeline.predict_proba(self.schema.to_frame(probe))[:, 1]
+            native = self._inplace_predict(self.transform(probe))
+            if native.shape != expected.shape or not np.allclose(native, expected, rtol=1e-5, atol=1e-7):
+                print("⚠️ Chemin XGBoost natif différent du pipeline, utilisation de sklearn")
+                self.booster = None
+                return
+
+            self.path = NATIVE_PATH
+            print("✅ Inférence via le Booster XGBoost natif (inplace_predict)")
+        except Exception as e:
+            print(f"⚠️ Chemin XGBoost natif indisponible ({e}), utilisation de sklearn")
+            self.booster = None
+
+    def transform(self, X):
+        """Préprocessing d'une matrice encodée par le schéma."""
+        with stage("preprocessing"):
+            if not self.schema.has_preprocessing:
+                return X.astype(float)
+            return self.schema.transform(X)
+
+    def predict_proba(self, X):
+        """Probabilités de fraude pour une matrice encodée par le schéma."""
+        if self.path == NATIVE_PATH or self.schema.compiled is not None:
+            return self.predict_proba_transformed(self.transform(X))
+        with stage("inference"):
+            return self.pipeline.predict_proba(self.schema.to_frame(X))[:, 1]
+
+    def predict_proba_transformed(self, X_trans):
+        """Probabilités de fraude pour une matrice déjà préprocessée."""
+        with stage("inference"):
+            if self.path == NATIVE_PATH:
+                return self._inplace_predict(X_trans)
+            return self.final_estimator.predict_proba(X_trans)[:, 1]
+
+    def _inplace_predict(self, X_trans):
+        proba = self.booster.inplace_predict(
+            X_trans,
+            iteration_range=self.iteration_range,
+            predict_type="value",
+            validate_features=False,
+        )
+        # Objectif multi-classe : colonne de la classe positive
+        return proba[:, 1] if proba.ndim == 2 else proba
+
+    def describe(self):
+        """Résumé du moteur actif (exposé par /health)."""
+        return {
+            "inference_path": self.path,
+            "compiled_preprocessor": self.schema is not None and self.schema.compiled is not None,
+            "model": self.model_name,
+        }
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # encodeur standard si orjson n'est pas installé
+    orjson = None
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON de l'application (remplace app.json_encoder, ignoré par Flask 3).
+
+    Sérialise nativement les scalaires et tableaux numpy. Avec orjson,
+    l'encodage et le décodage des corps de requête passent par lui ; les
+    clés restent triées (sortie stable, comme le provider par défaut) et
+    les NaN/inf deviennent null au lieu de littéraux invalides en JSON.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self._orjson_dumps(obj).decode()
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # Littéraux tolérés par json (NaN, Infinity) : même comportement qu'avant
+                pass
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        # Octets d'orjson directement dans la réponse, sans passer par str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson_dumps(obj) + b"\n", mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj):
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return DefaultJSONProvider.default(obj)
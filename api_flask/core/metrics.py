@@ -0,0 +1,228 @@
+import bisect
+import threading
+import time
+
+# Bornes par défaut (secondes) pour les latences : de 50 µs à 2,5 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+# Au-delà, les compteurs des threads terminés sont repliés dans le total
+MAX_SHARDS = 64
+
+
+class _ThreadShards:
+    """
+    Compteurs répartis par thread : chaque thread n'écrit que dans sa propre
+    liste, sans verrou. Le verrou ne sert qu'à créer une liste (une fois par
+    thread) et à les additionner à la lecture.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = [0] * size
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard = self._local.shard = [0] * self.size
+        with self._lock:
+            if len(self._shards) >= MAX_SHARDS:
+                self._retire()
+            self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire(self):
+        # Un thread terminé n'écrit plus : ses compteurs peuvent être repliés
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for i, v in enumerate(shard):
+                    self._retired[i] += v
+        self._shards = alive
+
+    def total(self):
+        with self._lock:
+            total = list(self._retired)
+            for _, shard in self._shards:
+                for i, v in enumerate(shard):
+                    total[i] += v
+        return total
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à bornes fixes (compteurs, somme et total).
+
+    observe() ne prend pas de verrou (compteurs par thread) ; une lecture
+    concurrente peut voir une observation dans un compteur et pas encore
+    dans la somme, ce qui est sans conséquence pour du monitoring.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Compteurs par borne, puis somme et nombre d'observations
+        self._shards = _ThreadShards(len(self.buckets) + 3)
+
+    def observe(self, value, n=1):
+        shard = self._shards.get()
+        shard[bisect.bisect_left(self.buckets, value)] += n
+        shard[-2] += value * n
+        shard[-1] += n
+
+    def snapshot(self):
+        """Compteurs cumulés par borne supérieure (format Prometheus 'le')."""
+        values = self._shards.total()
+        counts, total, count = values[:-2], values[-2], values[-1]
+        cumulative, running = {}, 0
+        for bound, c in zip(self.buckets + (float("inf"),), counts):
+            running += c
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class Counter:
+    """Compteur monotone sans verrou à l'incrément."""
+
+    def __init__(self):
+        self._shards = _ThreadShards(1)
+
+    def inc(self, n=1):
+        self._shards.get()[0] += n
+
+    @property
+    def value(self):
+        return self._shards.total()[0]
+
+
+class Family:
+    """Série de métriques de même nom, une par combinaison de labels."""
+
+    def __init__(self, name, help, label_names, factory, kind):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.kind = kind
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def render(self):
+        children = sorted(self._children.items())
+        if self.kind == "histogram":
+            samples = [(dict(zip(self.label_names, values)), child.snapshot()) for values, child in children]
+            return render_histogram(self.name, self.help, samples)
+        samples = [(dict(zip(self.label_names, values)), child.value) for values, child in children]
+        return render_samples(self.name, self.help, self.kind, samples)
+
+
+def histogram_family(name, help, label_names, buckets=LATENCY_BUCKETS):
+    return Family(name, help, label_names, lambda: Histogram(buckets), "histogram")
+
+
+def counter_family(name, help, label_names):
+    return Family(name, help, label_names, Counter, "counter")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_samples(name, help, kind, samples):
+    """Lignes Prometheus d'une jauge ou d'un compteur ; samples : liste de (labels, valeur)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{format_labels(labels)} {float(value)!r}")
+    return lines
+
+
+def render_histogram(name, help, samples):
+    """Lignes Prometheus d'un histogramme ; samples : liste de (labels, Histogram.snapshot())."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for labels, snapshot in samples:
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {float(snapshot['sum'])!r}")
+        lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+# ─── Métriques des requêtes ───────────────────────────────────────────
+
+REQUESTS = counter_family(
+    "fraud_requests_total", "Requêtes traitées par blueprint et code HTTP", ("blueprint", "status")
+)
+REQUEST_LATENCY = histogram_family(
+    "fraud_request_duration_seconds", "Durée totale des requêtes par blueprint", ("blueprint",)
+)
+STAGE_LATENCY = histogram_family(
+    "fraud_stage_duration_seconds",
+    "Durée des étapes (json_parse, encoding, preprocessing, inference, shap, drift, serialization)",
+    ("blueprint", "stage"),
+)
+
+# Blueprint et profil (X-Profile) de la requête servie par le thread
+# courant, propagés aux threads d'admission par core/admission.py
+_context = threading.local()
+
+
+def set_route(name):
+    _context.route = name
+
+
+def current_route():
+    return getattr(_context, "route", "none")
+
+
+def set_profile(profile):
+    _context.profile = profile
+
+
+def current_profile():
+    return getattr(_context, "profile", None)
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_LATENCY.labels(current_route(), self.name).observe(elapsed)
+        profile = getattr(_context, "profile", None)
+        if profile is not None:
+            profile.record(self.name, elapsed)
+        return False
+
+
+def stage(name):
+    """Chronomètre une étape de la requête courante : `with stage("inference"): ...`"""
+    return _Stage(name)
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from core.compiled_preprocessor import CompiledPreprocessor
+from core.feature_schema import FeatureSchema
+from core.inference_engine import InferenceEngine, NATIVE_PATH
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+BOOSTER_FILE = "booster.ubj"
+
+
+def export_artifact(bundle, directory):
+    """
+    Exporte un bundle chargé depuis joblib au format artefact compact.
+
+    Structure du répertoire :
+        manifest.json          version active, schéma, sonde de parité
+        <version>/booster.ubj  Booster XGBoost au format binaire natif
+        <version>/*.npy        Tableaux du préprocesseur compilé
+
+    Chaque version a son propre sous-répertoire et le manifeste est
+    remplacé en dernier (os.replace) : un processus qui surveille le
+    répertoire ne voit jamais un mélange de deux versions.
+
+    Returns:
+        Chemin du manifeste écrit
+    """
+    schema, engine = bundle.schema, bundle.engine
+    if schema is None or schema.compiled is None or engine.path != NATIVE_PATH:
+        raise ValueError(
+            "Modèle non exportable : préprocesseur compilé et Booster XGBoost natif requis"
+        )
+
+    compiled = schema.compiled
+    version_dir = os.path.join(directory, bundle.version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    with open(os.path.join(version_dir, BOOSTER_FILE), "wb") as f:
+        f.write(bytes(engine.booster.save_raw("ubj")))
+
+    arrays = {"num_in": compiled.num_in, "num_out": compiled.num_out, "mult": compiled.mult, "add": compiled.add}
+    for k, (cats, positions) in enumerate(zip(compiled.cat_sorted, compiled.cat_out)):
+        values = np.asarray(cats.tolist())
+        if values.dtype == object:
+            raise ValueError(f"Catégories de types mélangés (colonne {schema.names[compiled.cat_in[k]]})")
+        arrays[f"cat{k}_values"] = values
+        arrays[f"cat{k}_out"] = positions
+    for name, array in arrays.items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+    probe = schema.sample()
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": bundle.version,
+        "path": bundle.version,
+        "exported_at": datetime.now().isoformat(),
+        "model": type(engine.final_estimator).__name__,
+        "names": schema.names,
+        "kinds": schema.kinds,
+        "categories": {name: sorted(values) for name, values in schema.categories.items()},
+        "n_outputs": compiled.n_outputs,
+        "cat_in": list(compiled.cat_in),
+        "iteration_range": list(engine.iteration_range),
+        "explainer": _explainer_spec(bundle, schema, probe),
+        "probe": {
+            "rows": probe.tolist(),
+            "probabilities": engine.predict_proba(probe).tolist(),
+        },
+    }
+
+    path = os.path.join(directory, MANIFEST)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def is_artifact(directory):
+    return directory is not None and os.path.isfile(os.path.join(directory, MANIFEST))
+
+
+def load_artifact(directory):
+    """
+    Charge un artefact exporté par export_artifact.
+
+    Les tableaux du préprocesseur sont mappés en mémoire (lecture seule) :
+    tous les processus qui chargent le même artefact partagent les pages
+    du cache système. Le Booster est relu par le parseur natif de XGBoost,
+    sans dépickler le pipeline ni l'explainer. La sonde du manifeste est
+    rejouée avant de retourner : un artefact incohérent est refusé.
+
+    Returns:
+        (schema, engine, explainer, manifest) ; explainer vaut None si le
+        manifeste n'en décrit pas (l'appelant peut charger shap.joblib)
+    """
+    import xgboost as xgb
+
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Format d'artefact non supporté : {manifest.get('format_version')}")
+    version_dir = os.path.join(directory, manifest["path"])
+
+    def array(name):
+        return np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+
+    cat_in = manifest["cat_in"]
+    compiled = CompiledPreprocessor(
+        manifest["n_outputs"],
+        array("num_in"),
+        array("num_out"),
+        array("mult"),
+        array("add"),
+        cat_in,
+        [array(f"cat{k}_values") for k in range(len(cat_in))],
+        [array(f"cat{k}_out") for k in range(len(cat_in))],
+    )
+    schema = FeatureSchema(
+        manifest["names"],
+        manifest["kinds"],
+        {name: set(values) for name, values in manifest["categories"].items()},
+    )
+    schema.compiled = compiled
+
+    booster = xgb.Booster(model_file=os.path.join(version_dir, BOOSTER_FILE))
+    engine = InferenceEngine(
+        None, schema, booster=booster, iteration_range=tuple(manifest["iteration_range"]), model_name=manifest["model"]
+    )
+
+    probe = np.array(manifest["probe"]["rows"], dtype=object)
+    if not np.allclose(engine.predict_proba(probe), manifest["probe"]["probabilities"], rtol=1e-5, atol=1e-7):
+        raise ValueError(f"Artefact {manifest['version']} incohérent : la sonde de parité ne correspond pas")
+
+    explainer = None
+    if manifest.get("explainer") == "tree_path_dependent":
+        explainer = LazyTreeExplainer(booster)
+    return schema, engine, explainer, manifest
+
+
+class LazyTreeExplainer:
+    """
+    TreeExplainer SHAP construit depuis le Booster au premier appel.
+
+    Évite l'import de shap et la copie des arbres qu'il construit tant
+    qu'aucune explication n'est demandée (pods qui ne servent que /predict).
+    """
+
+    def __init__(self, booster):
+        self.booster = booster
+        self._explainer = None
+        self._lock = threading.Lock()
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    import shap
+                    self._explainer = shap.TreeExplainer(self.booster)
+        return self._explainer
+
+    def shap_values(self, X):
+        return self.explainer.shap_values(X)
+
+
+def _explainer_spec(bundle, schema, probe):
+    """
+    Décrit l'explainer s'il peut être reconstruit à l'identique depuis le
+    Booster (TreeExplainer sans données de fond), sinon None.
+    """
+    explainer = bundle.explainer
+    if explainer is None or getattr(explainer, "feature_perturbation", None) != "tree_path_dependent":
+        return None
+    if getattr(explainer, "data", None) is not None:
+        return None
+    try:
+        import shap
+        rebuilt = shap.TreeExplainer(bundle.engine.booster)
+        X_trans = schema.transform(probe)
+        if np.allclose(rebuilt.shap_values(X_trans), explainer.shap_values(X_trans), rtol=1e-5, atol=1e-6):
+            return "tree_path_dependent"
+    except Exception as e:
+        print(f"⚠️ Explainer non reconstructible depuis le Booster ({e})")
+    return None
@@ -0,0 +1,277 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+
+from core.pipeline_utils import load_pipeline, MODEL_PATH
+from core.shap_loader import shap_loader, filename as SHAP_PATH
+from core.feature_schema import FeatureSchema
+from core.inference_engine import InferenceEngine
+from core.model_artifact import is_artifact, load_artifact, MANIFEST
+from core.native_explainer import NativeTreeExplainer
+from core.attribution import AttributionMapper
+
+
+class ModelBundle:
+    """
+    Version chargée du modèle : pipeline, explainer SHAP et objets dérivés.
+
+    Un bundle n'est jamais modifié après sa construction ; un rechargement
+    en construit un nouveau et remplace la référence d'un seul coup.
+    """
+
+    def __init__(self, pipeline, explainer, version, signature, load_seconds, schema=None, engine=None, source="joblib"):
+        self.pipeline = pipeline
+        self.explainer = explainer
+        self.schema = schema if schema is not None else FeatureSchema.from_pipeline(pipeline)
+        self.engine = engine if engine is not None else InferenceEngine(pipeline, self.schema)
+        # Regroupement des contributions par feature source (one-hot → type)
+        self.attribution = AttributionMapper.from_schema(self.schema)
+        self.version = version
+        self.signature = signature
+        self.source = source
+        self.loaded_at = datetime.now().isoformat()
+        self.load_seconds = load_seconds
+
+
+class ModelRegistry:
+    """
+    Point d'accès unique au modèle et à l'explainer SHAP.
+
+    Les artefacts sont chargés une seule fois par processus et partagés par
+    tous les services. Un thread de surveillance compare taille et mtime des
+    fichiers et, en cas de changement, charge la nouvelle version à côté de
+    l'ancienne avant de l'échanger atomiquement : les lecteurs ne sont
+    jamais bloqués et une requête en cours garde le bundle qu'elle a lu.
+
+    Si artifact_path désigne un artefact compact (voir core/model_artifact),
+    il est chargé à la place du pipeline joblib.
+
+    Avec explainer="native" (défaut), les explications sont calculées par le
+    Booster XGBoost (voir core/native_explainer) dès que le moteur d'inférence
+    en détient un : shap.joblib n'est alors ni lu ni nécessaire. "shap"
+    force l'explainer sérialisé.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, shap_path=SHAP_PATH, poll_interval=30.0, artifact_path=None,
+                 explainer="native"):
+        if explainer not in ("native", "shap"):
+            raise ValueError(f"Explainer inconnu : {explainer} (native ou shap)")
+        self.model_path = model_path
+        self.shap_path = shap_path
+        self.artifact_path = artifact_path
+        self.explainer_mode = explainer
+        self.poll_interval = poll_interval
+        self._bundle = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        # Threads OpenMP des Boosters chargés (None : défaut XGBoost, tous les cœurs)
+        self.nthread = None
+
+    def current(self):
+        """Bundle actif (chargé à la première demande si nécessaire)."""
+        bundle = self._bundle
+        if bundle is None:
+            bundle = self.load()
+        return bundle
+
+    def load(self, force=False):
+        """Charge les artefacts si besoin et retourne le bundle actif."""
+        with self._load_lock:
+            # Relevé avant chargement : un artefact modifié pendant le chargement
+            # sera détecté au passage suivant du watcher
+            signature = self._signature()
+            if self._bundle is not None and not force and not self._changed(signature, self._bundle):
+                return self._bundle
+
+            start = time.perf_counter()
+            if is_artifact(self.artifact_path):
+                try:
+                    bundle = self._load_artifact(signature, start)
+                except Exception as e:
+                    if self._bundle is None:
+                        raise
+                    print(f"⚠️ Artefact illisible ({e}), conservation de la version active")
+                    return self._bundle
+            else:
+                pipeline = load_pipeline(self.model_path)
+                if pipeline is None:
+                    if self._bundle is None:
+                        raise RuntimeError(f"Impossible de charger le modèle depuis {self.model_path}")
+                    print("⚠️ Nouveau modèle illisible, conservation de la version active")
+                    return self._bundle
+
+                schema = FeatureSchema.from_pipeline(pipeline)
+                engine = InferenceEngine(pipeline, schema)
+                explainer, shap_loaded = self._load_explainer(engine)
+                bundle = ModelBundle(
+                    pipeline,
+                    explainer,
+                    version=file_checksum(self.model_path),
+                    signature=_bundle_signature(signature, shap_loaded),
+                    load_seconds=time.perf_counter() - start,
+                    schema=schema,
+                    engine=engine,
+                )
+            if self.nthread is not None:
+                _apply_nthread(bundle, self.nthread)
+            previous, self._bundle = self._bundle, bundle
+            print(f"✅ Modèle version {bundle.version} actif ({bundle.source}, chargé en {bundle.load_seconds:.2f}s)")
+
+        return self._notify(previous, bundle)
+
+    def _load_artifact(self, signature, start):
+        schema, engine, explainer, manifest = load_artifact(self.artifact_path)
+        explainer, shap_loaded = self._load_explainer(engine, explainer)
+        return ModelBundle(
+            None,
+            explainer,
+            version=manifest["version"],
+            signature=_bundle_signature(signature, shap_loaded),
+            load_seconds=time.perf_counter() - start,
+            schema=schema,
+            engine=engine,
+            source="artifact",
+        )
+
+    def _load_explainer(self, engine, explainer=None):
+        """
+        Explainer du bundle : contributions natives du Booster si possible,
+        sinon celui fourni (artefact) ou, à défaut, shap.joblib.
+
+        Returns:
+            (explainer, shap_loaded) : shap_loaded indique si shap.joblib a
+            été lu, et doit donc être surveillé
+        """
+        if self.explainer_mode == "native" and engine.booster is not None:
+            return NativeTreeExplainer(engine.booster, engine.iteration_range), False
+        if explainer is not None:
+            return explainer, False
+        try:
+            return shap_loader(self.shap_path), True
+        except FileNotFoundError as e:
+            print(f"⚠️ {e} — explications SHAP indisponibles")
+            # Un shap.joblib déposé plus tard doit déclencher un rechargement
+            return None, True
+
+    def _notify(self, previous, bundle):
+        if previous is not None:
+            for listener in self._listeners:
+                listener(bundle)
+        return bundle
+
+    def set_nthread(self, nthread):
+        """Fixe les threads XGBoost du bundle actif et des bundles rechargés ensuite."""
+        self.nthread = nthread
+        if self._bundle is not None:
+            _apply_nthread(self._bundle, nthread)
+
+    def add_listener(self, callback):
+        """Enregistre callback(bundle), appelé après chaque changement de version."""
+        self._listeners.append(callback)
+
+    def start_watcher(self):
+        """Démarre la surveillance des artefacts (sans effet si poll_interval <= 0)."""
+        if self.poll_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self._bundle is not None and self._changed(self._signature(), self._bundle):
+                    print("🔄 Changement d'artefact détecté, rechargement du modèle")
+                    self.load()
+            except Exception as e:
+                print(f"❌ Erreur lors du rechargement du modèle : {e}")
+
+    def _signature(self):
+        """
+        Taille et mtime des artefacts : test de changement peu coûteux.
+        shap.joblib vient en dernier (voir _bundle_signature).
+        """
+        signature = []
+        paths = [self.model_path]
+        if self.artifact_path is not None:
+            paths.append(os.path.join(self.artifact_path, MANIFEST))
+        paths.append(self.shap_path)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    @staticmethod
+    def _changed(signature, bundle):
+        # Sans shap.joblib dans la signature du bundle, il n'est pas comparé
+        return signature[:len(bundle.signature)] != bundle.signature
+
+    def describe(self):
+        bundle = self._bundle
+        if bundle is None:
+            return {"model_loaded": False}
+        return {
+            "model_loaded": True,
+            "model_version": bundle.version,
+            "model_loaded_at": bundle.loaded_at,
+            "model_load_seconds": round(bundle.load_seconds, 3),
+            "model_source": bundle.source,
+            "booster_threads": self.nthread,
+            "explainer_loaded": bundle.explainer is not None,
+            "explainer": _explainer_name(bundle.explainer),
+            **bundle.engine.describe(),
+        }
+
+
+def _bundle_signature(signature, shap_loaded):
+    """
+    Signature retenue pour un bundle : shap.joblib n'en fait partie que s'il
+    a été chargé. Avec l'explainer natif, le redéployer ne recharge pas le
+    modèle (ni ne vide le cache de prédictions).
+    """
+    return signature if shap_loaded else signature[:-1]
+
+
+def _apply_nthread(bundle, nthread):
+    # L'explainer natif partage ce Booster : les contributions suivent aussi
+    if bundle.engine.booster is not None:
+        bundle.engine.booster.set_param({"nthread": nthread})
+
+
+def _explainer_name(explainer):
+    if explainer is None:
+        return None
+    if isinstance(explainer, NativeTreeExplainer):
+        return "xgboost_native"
+    return "shap"
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+registry = ModelRegistry(
+    poll_interval=float(os.getenv("MODEL_RELOAD_INTERVAL", 30)),
+    artifact_path=os.getenv("MODEL_ARTIFACT_PATH") or None,
+    explainer=os.getenv("EXPLAINER", "native"),
+)
+
+
+def _restart_watcher_after_fork():
+    # Le thread de surveillance ne survit pas à un fork : on le relance dans l'enfant
+    if registry._bundle is not None:
+        registry.start_watcher()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_watcher_after_fork)
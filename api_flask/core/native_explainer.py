@@ -0,0 +1,47 @@
+import numpy as np
+
+
+class NativeTreeExplainer:
+    """
+    Contributions TreeSHAP calculées par XGBoost lui-même.
+
+    Booster.predict(pred_contribs=True) applique l'algorithme TreeSHAP exact,
+    comme shap.TreeExplainer en mode tree_path_dependent : mêmes valeurs,
+    dans l'espace des marges (log-odds), sans le paquet shap ni le fichier
+    shap.joblib. Expose shap_values(X) comme un explainer SHAP : les services
+    l'utilisent sans distinction.
+    """
+
+    feature_perturbation = "tree_path_dependent"
+    data = None
+
+    def __init__(self, booster, iteration_range=(0, 0)):
+        self.booster = booster
+        self.iteration_range = tuple(iteration_range)
+
+    def contributions(self, X_trans):
+        """
+        Returns:
+            (values, bias) : contributions (lignes × features) et terme de
+            biais de chaque ligne (valeur attendue du modèle)
+        """
+        import xgboost as xgb
+
+        contribs = self.booster.predict(
+            xgb.DMatrix(np.asarray(X_trans, dtype=np.float32)),
+            pred_contribs=True,
+            iteration_range=self.iteration_range,
+            validate_features=False,
+        )
+        # Objectif multi-classe : contributions de la classe positive
+        if contribs.ndim == 3:
+            contribs = contribs[:, 1, :]
+        return contribs[:, :-1], contribs[:, -1]
+
+    def shap_values(self, X_trans):
+        return self.contributions(X_trans)[0]
+
+    @property
+    def expected_value(self):
+        # Biais identique pour toutes les lignes : une ligne quelconque suffit
+        return float(self.contributions(np.zeros((1, self.booster.num_features())))[1][0])
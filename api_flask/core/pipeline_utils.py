@@ -6,13 +6,13 @@ import os
 pipeline_filename = "model_xboost.joblib"
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", pipeline_filename)
 
-def load_pipeline():
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"❌ Le pipeline est introuvable à l'emplacement : {MODEL_PATH}")
+def load_pipeline(path=MODEL_PATH):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Le pipeline est introuvable à l'emplacement : {path}")
     
     try:
-        model = joblib.load(MODEL_PATH)
-        print(f"✅ Modèle chargé avec succès depuis {MODEL_PATH}")
+        model = joblib.load(path)
+        print(f"✅ Modèle chargé avec succès depuis {path}")
         return model
     except Exception as e:
         print(f"❌ Erreur lors du chargement : {e}")
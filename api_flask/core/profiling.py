@@ -0,0 +1,236 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Répertoire d'échange entre workers pour l'échantillonnage
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "fraud-profiles"))
+REQUEST_FILE = "request.json"
+# Signal envoyé aux autres workers (non utilisé par gunicorn)
+SAMPLE_SIGNAL = signal.SIGPROF
+
+# Feuilles de pile d'un thread qui attend (file vide, socket, sommeil)
+IDLE_MODULES = {"threading.py", "queue.py", "selectors.py", "socket.py", "socketserver.py"}
+IDLE_FUNCTIONS = {"_worker", "_watch", "_collect", "wait", "sleep", "select", "accept"}
+
+
+class RequestProfile:
+    """
+    Profil d'une requête demandé par l'en-tête X-Profile.
+
+    Les étapes chronométrées par core.metrics.stage() y sont ajoutées ;
+    avec cprofile=True, la vue est exécutée sous cProfile (dans le thread
+    d'admission qui l'exécute).
+    """
+
+    def __init__(self, cprofile=False):
+        self.stages = []
+        self.profiler = cProfile.Profile() if cprofile else None
+        self.error = None
+
+    def record(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def run(self, fn):
+        if self.profiler is None:
+            return fn()
+        try:
+            self.profiler.enable()
+        except ValueError as e:
+            # Un seul profileur actif à la fois (Python 3.12+) : étapes seules
+            self.error = f"cProfile indisponible : {e}"
+            self.profiler = None
+            return fn()
+        try:
+            return fn()
+        finally:
+            self.profiler.disable()
+
+    def server_timing(self):
+        """Valeur de l'en-tête Server-Timing (affichée par les devtools des navigateurs)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages)
+
+    def describe(self, limit=30):
+        result = {"stages_ms": [{"stage": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.stages]}
+        if self.profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            result["cprofile"] = out.getvalue()
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+# ─── Échantillonnage statistique ──────────────────────────────────────
+
+def _frame_label(code):
+    path = code.co_filename
+    if path.startswith(APP_DIR):
+        path = os.path.relpath(path, APP_DIR)
+    else:
+        path = "/".join(path.split(os.sep)[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _thread_role(name):
+    # admission-predict_3 → admission-predict : les piles d'un même pool fusionnent
+    return re.sub(r"[_-]\d+$", "", name)
+
+
+def sample_stacks(seconds, interval=0.02, include_idle=False, exclude=()):
+    """
+    Échantillonne les piles de tous les threads du processus.
+
+    Toutes les `interval` secondes, sys._current_frames() est lu et chaque
+    pile est comptée au format « replié » (racine;...;feuille), directement
+    exploitable par flamegraph.pl ou speedscope.
+
+    Args:
+        exclude: Identifiants de threads à ignorer (le thread appelant l'est toujours)
+
+    Returns:
+        Counter {pile repliée: nombre d'échantillons}
+    """
+    stacks = Counter()
+    exclude = set(exclude) | {threading.get_ident()}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in exclude:
+                continue
+            leaf = frame.f_code
+            if not include_idle and (
+                os.path.basename(leaf.co_filename) in IDLE_MODULES or leaf.co_name in IDLE_FUNCTIONS
+            ):
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.append(_thread_role(names.get(ident, "thread")))
+            stacks[";".join(reversed(frames))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_folded(stacks):
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def sibling_workers():
+    """
+    PID des autres workers du serveur pre-fork (enfants du même maître).
+
+    Uniquement sous serve.py (SERVE_MASTER_PID) : sous le serveur de
+    développement, le parent est un shell dont on ne signale pas les enfants.
+    """
+    master = os.getenv("SERVE_MASTER_PID")
+    if not master or os.getppid() != int(master):
+        return []
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Le nom du processus (2e champ) peut contenir des espaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == int(master):
+            pids.append(int(entry))
+    return pids
+
+
+_sampling = threading.Lock()
+
+
+def _on_signal(signum, frame):
+    try:
+        with open(os.path.join(PROFILE_DIR, REQUEST_FILE)) as f:
+            request = json.load(f)
+    except (OSError, ValueError):
+        return
+    # Le gestionnaire tourne dans le thread principal : on rend la main tout de suite
+    threading.Thread(target=_sample_to_file, args=(request,), name="stack-sampler", daemon=True).start()
+
+
+def _sample_to_file(request):
+    if not _sampling.acquire(blocking=False):
+        return
+    try:
+        stacks = sample_stacks(request["seconds"], request["interval"], request["include_idle"])
+        path = os.path.join(PROFILE_DIR, f"{request['session']}.{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(stacks, f)
+        os.replace(f"{path}.tmp", path)
+    finally:
+        _sampling.release()
+
+
+def install_signal_handler():
+    """À appeler depuis le thread principal avant le fork des workers."""
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(SAMPLE_SIGNAL, _on_signal)
+
+
+def profile_workers(seconds, interval=0.02, include_idle=False, grace=5.0):
+    """
+    Échantillonne ce worker et tous les autres pendant `seconds` secondes.
+
+    Les autres workers reçoivent SAMPLE_SIGNAL, lisent la demande dans
+    PROFILE_DIR et y déposent leurs piles ; ce worker échantillonne de son
+    côté puis fusionne ce qu'il a reçu après au plus `grace` secondes.
+
+    Returns:
+        (stacks, workers) : Counter des piles repliées, PID des workers inclus
+    """
+    if not _sampling.acquire(blocking=False):
+        raise RuntimeError("Échantillonnage déjà en cours dans ce worker")
+    try:
+        session = uuid.uuid4().hex
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        request = {"session": session, "seconds": seconds, "interval": interval, "include_idle": include_idle}
+        path = os.path.join(PROFILE_DIR, REQUEST_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(request, f)
+        os.replace(f"{path}.tmp", path)
+
+        signalled = []
+        for pid in sibling_workers():
+            try:
+                os.kill(pid, SAMPLE_SIGNAL)
+                signalled.append(pid)
+            except OSError:
+                pass
+
+        stacks = sample_stacks(seconds, interval, include_idle)
+        workers = [os.getpid()]
+        deadline = time.monotonic() + grace
+        waiting = set(signalled)
+        while waiting and time.monotonic() < deadline:
+            for pid in list(waiting):
+                result = os.path.join(PROFILE_DIR, f"{session}.{pid}.json")
+                if os.path.exists(result):
+                    with open(result) as f:
+                        stacks.update(json.load(f))
+                    os.remove(result)
+                    waiting.discard(pid)
+                    workers.append(pid)
+            if waiting:
+                time.sleep(0.1)
+        return stacks, workers
+    finally:
+        _sampling.release()
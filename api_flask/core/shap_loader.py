@@ -5,13 +5,13 @@ import os
 shap_filename = "shap.joblib"
 filename = os.path.join(os.path.dirname(__file__), "..", shap_filename)
 
-def shap_loader():
-    if not os.path.exists(filename):
-        raise FileNotFoundError(f"❌ Le fichier SHAP est introuvable à l'emplacement : {filename}")
+def shap_loader(path=filename):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Le fichier SHAP est introuvable à l'emplacement : {path}")
 
     try:
-        shap = joblib.load(filename)
-        print(f"✅ Fichier SHAP chargé avec succès depuis {filename}")
+        shap = joblib.load(path)
+        print(f"✅ Fichier SHAP chargé avec succès depuis {path}")
         return shap
     except Exception as e:
         print(f"❌ Erreur lors du chargement : {e}")
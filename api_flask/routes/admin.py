@@ -0,0 +1,93 @@
+import hmac
+import os
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from core.metrics import set_profile
+from core.profiling import RequestProfile, format_folded, profile_workers
+
+admin_bp = Blueprint("admin", __name__)
+
+# Jeton requis pour X-Profile et /admin/* (vide = fonctionnalités désactivées)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+
+
+def _authorized():
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+@admin_bp.before_app_request
+def _start_profile():
+    """
+    En-tête X-Profile (avec X-Admin-Token) : durée de chaque étape dans
+    Server-Timing et, pour une réponse objet JSON, dans un champ "profile".
+    X-Profile: cprofile ajoute le résumé cProfile de la vue.
+    """
+    mode = request.headers.get("X-Profile")
+    if not mode or not _authorized():
+        return
+    profile = RequestProfile(cprofile=mode.strip().lower() == "cprofile")
+    request.environ["profile.request"] = profile
+    request.environ["profile.start"] = time.perf_counter()
+    set_profile(profile)
+
+
+@admin_bp.after_app_request
+def _attach_profile(response):
+    profile = request.environ.get("profile.request")
+    if profile is None:
+        if "X-Profile" in request.headers:
+            response.headers["X-Profile"] = "denied"
+        return response
+
+    set_profile(None)
+    profile.record("total", time.perf_counter() - request.environ["profile.start"])
+    response.headers["Server-Timing"] = profile.server_timing()
+    if response.is_json and not response.is_streamed:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body["profile"] = profile.describe()
+            response.set_data(current_app.json.dumps(body))
+    return response
+
+
+@admin_bp.teardown_app_request
+def _clear_profile(exc):
+    set_profile(None)
+
+
+@admin_bp.route("/profile", methods=["POST"])
+def sample_profile():
+    """
+    Échantillonnage statistique des piles de tous les workers
+    POST /admin/profile?seconds=10&interval_ms=20&idle=false
+
+    Retourne les piles au format replié (une ligne « pile compte »), à
+    passer à flamegraph.pl ou à ouvrir dans speedscope. Le worker qui
+    reçoit la requête est occupé pendant toute la durée.
+    """
+    if not _authorized():
+        return jsonify({"error": "Jeton d'administration requis (X-Admin-Token)"}), 403
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        interval = float(request.args.get("interval_ms", 20)) / 1000.0
+    except ValueError:
+        return jsonify({"error": "seconds et interval_ms doivent être numériques"}), 400
+    if not 0 < seconds <= PROFILE_MAX_SECONDS or not 0.001 <= interval <= 1:
+        return jsonify({
+            "error": f"seconds doit être dans ]0, {PROFILE_MAX_SECONDS:g}] et interval_ms dans [1, 1000]"
+        }), 400
+    include_idle = request.args.get("idle", "false").lower() in ("1", "true", "yes")
+
+    try:
+        stacks, workers = profile_workers(seconds, interval, include_idle)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+    response = Response(format_folded(stacks), mimetype="text/plain")
+    response.headers["X-Profile-Workers"] = ",".join(map(str, workers))
+    response.headers["X-Profile-Samples"] = str(sum(stacks.values()))
+    return response
@@ -0,0 +1,71 @@
+from flask import Blueprint, request, jsonify
+from services.cost_sweep import sweep_thresholds, best_thresholds, parse_grid
+from core.admission import admission
+from core.business_config import business_config
+import numpy as np
+import pandas as pd
+
+cost_bp = Blueprint("cost", __name__)
+
+# Noms de colonnes acceptés pour un jeu de données scoré
+PROBABILITY_COLUMNS = ("probability", "proba", "score")
+LABEL_COLUMNS = ("isFraud", "label")
+
+
+@cost_bp.route("/sweep", methods=["POST"])
+@admission("cost")
+def sweep():
+    """
+    Coût attendu sur une grille de seuils (accept, reject)
+    POST /cost/sweep
+
+    Entrée : fichier CSV scoré (multipart, champ "file") ou JSON
+    {"probability": [...], "amount": [...], "label": [...]}.
+    Paramètres optionnels : accept / reject ("début:fin:pas" ou "v1,v2"),
+    full=true pour renvoyer la grille complète.
+    """
+    try:
+        if "file" in request.files:
+            df = pd.read_csv(request.files["file"])
+            params = request.form
+        else:
+            payload = request.json
+            if not isinstance(payload, dict):
+                return jsonify({"error": "Fichier CSV ou objet JSON attendu"}), 400
+            df = pd.DataFrame({k: v for k, v in payload.items() if isinstance(v, list)})
+            params = {k: v for k, v in payload.items() if not isinstance(v, list)}
+
+        proba_col = next((c for c in PROBABILITY_COLUMNS if c in df.columns), None)
+        if proba_col is None:
+            return jsonify({"error": f"Colonne de probabilité manquante ({', '.join(PROBABILITY_COLUMNS)})"}), 400
+        label_col = next((c for c in LABEL_COLUMNS if c in df.columns), None)
+        config = business_config.current()
+
+        result = sweep_thresholds(
+            df[proba_col].to_numpy(dtype=float),
+            config.costs,
+            amounts=df["amount"].to_numpy(dtype=float) if "amount" in df.columns else None,
+            labels=df[label_col].to_numpy(dtype=float) if label_col else None,
+            accept_grid=parse_grid(params.get("accept")),
+            reject_grid=parse_grid(params.get("reject")),
+        )
+
+        response = {
+            "n_rows": int(len(df)),
+            "config_version": config.version,
+            "current_thresholds": config.thresholds,
+            "best_expected": best_thresholds(result, "expected_cost"),
+        }
+        if label_col:
+            response["best_realized"] = best_thresholds(result, "realized_cost")
+        if str(params.get("full", "false")).lower() in ("1", "true", "yes"):
+            response["grid"] = {key: np.asarray(value).tolist() for key, value in result.items()}
+
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Erreur dans /cost/sweep : {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
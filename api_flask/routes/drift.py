@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from services.drift_detection import DriftDetector
+from core.admission import admission
+from core.metrics import stage
 import pandas as pd
 import io
 import os
@@ -8,20 +10,24 @@ drift_bp = Blueprint("drift", __name__)
 detector = DriftDetector()
 
 @drift_bp.route("/check", methods=["POST"])
+@admission("drift")
 def check_drift():
     """
     Vérifie le drift pour une nouvelle prédiction
     POST /drift/check avec JSON data
     """
     try:
-        data = request.json
+        with stage("json_parse"):
+            data = request.json
         
         if not data:
             return jsonify({"error": "Données JSON vides"}), 400
         
-        drift_report = detector.check_drift(data)
+        with stage("drift"):
+            drift_report = detector.check_drift(data)
         
-        return jsonify(drift_report)
+        with stage("serialization"):
+            return jsonify(drift_report)
     
     except Exception as e:
         print(f"❌ Erreur dans /drift/check : {e}")
@@ -37,15 +43,30 @@ def drift_summary():
     GET /drift/summary
     """
     try:
-        summary = detector.get_drift_summary()
-        return jsonify(summary)
+        return _conditional("summary", detector.get_drift_summary)
     
     except Exception as e:
         print(f"❌ Erreur dans /drift/summary : {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@drift_bp.route("/baseline", methods=["GET"])
+def get_baseline():
+    """
+    Retourne la baseline complète (statistiques et distributions)
+    GET /drift/baseline
+
+    Comme /drift/summary, la réponse porte un ETag dérivé du contenu de la
+    baseline : un client qui renvoie If-None-Match reçoit un 304 sans que
+    la baseline soit resérialisée.
+    """
+    if detector.baseline is None:
+        return jsonify({"status": "NO_BASELINE", "message": "Pas de baseline disponible"}), 404
+    return _conditional("baseline", lambda: detector.baseline)
+
+
 @drift_bp.route("/baseline/create", methods=["POST"])
+@admission("drift")
 def create_baseline():
     """
     Crée une nouvelle baseline à partir d'une liste de données
@@ -80,6 +101,7 @@ def create_baseline():
 
 
 @drift_bp.route("/upload/training-data", methods=["POST"])
+@admission("drift")
 def upload_training_data():
     """
     Upload un fichier CSV volumineux et crée une baseline
@@ -150,3 +172,19 @@ def upload_training_data():
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+
+
+def _conditional(name, build):
+    """Réponse JSON avec ETag (version de la baseline) ; 304 si le client l'a déjà."""
+    version = detector.baseline_version
+    if version is None:
+        return jsonify(build())
+    etag = f"{name}-{version}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    # ETag faible : identique que la réponse soit compressée ou non
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
@@ -1,20 +1,223 @@
-from flask import Blueprint, request, jsonify
-from services.shap_service import explain_instance
+from flask import Blueprint, request, jsonify, send_file
+from services.shap_service import explain_instance, explain_batch, parse_top_k
+from services.explain_jobs import explain_jobs, COMPLETED
+from services.global_importance import global_importance
+from core.feature_schema import SchemaValidationError
+from core.admission import admission
+from core.metrics import stage
+import os
 
 explain_bp = Blueprint("explain", __name__)
 
+# Taille maximale d'un lot pour /explain/batch
+MAX_EXPLAIN_BATCH_SIZE = int(os.getenv("MAX_EXPLAIN_BATCH_SIZE", 10000))
+# Lignes maximales par page de /explain/jobs/<id>/results
+MAX_JOB_PAGE_SIZE = 10000
+
 @explain_bp.route("", methods=["POST"])
+@admission("explain")
 def explain():
+    """
+    Valeurs SHAP d'une transaction, par feature de la transaction
+    POST /explain avec JSON data
+
+    Avec ?top_k=k, seules les k plus fortes contributions (en valeur
+    absolue) sont retournées ; top_features donne leur classement.
+    """
     try:
-        data = request.json
+        with stage("json_parse"):
+            data = request.json
         
         if not data:
             return jsonify({"error": "Données JSON vides"}), 400
+        try:
+            top_k = parse_top_k(request.args.get("top_k"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
             
-        shap_values = explain_instance(data)
-        return jsonify({"shap_values": shap_values})
+        shap_values = explain_instance(data, top_k=top_k)
+        with stage("serialization"):
+            return jsonify(_explanation(shap_values, top_k))
+    except SchemaValidationError as e:
+        return jsonify({"error": str(e), "details": e.errors}), 400
     except Exception as e:
         print(f"❌ Erreur dans /explain : {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+
+
+@explain_bp.route("/batch", methods=["POST"])
+@admission("explain")
+def explain_batch_route():
+    """
+    Valeurs SHAP d'un lot de transactions (file d'alertes)
+    POST /explain/batch avec une liste JSON de transactions
+
+    Retourne une liste dans le même ordre que l'entrée :
+    {"index": i, "shap_values": {...}} ou {"index": i, "error": ...}.
+    ?top_k=k comme pour /explain.
+    """
+    try:
+        with stage("json_parse"):
+            data_list = request.json
+
+        if not isinstance(data_list, list):
+            return jsonify({"error": "Les données doivent être une liste"}), 400
+        if not data_list:
+            return jsonify({"error": "Liste de transactions vide"}), 400
+        if len(data_list) > MAX_EXPLAIN_BATCH_SIZE:
+            return jsonify({"error": f"Lot trop volumineux (max {MAX_EXPLAIN_BATCH_SIZE} transactions)"}), 413
+        try:
+            top_k = parse_top_k(request.args.get("top_k"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        explanations, errors = explain_batch(data_list, top_k=top_k)
+        results = [
+            {"index": i, "error": errors[i]} if i in errors else {"index": i, **_explanation(explanations[i], top_k)}
+            for i in range(len(data_list))
+        ]
+        with stage("serialization"):
+            return jsonify(results)
+    except Exception as e:
+        print(f"❌ Erreur dans /explain/batch : {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@explain_bp.route("/global", methods=["GET"])
+def global_explanation():
+    """
+    Importance globale des features sur le trafic expliqué
+    GET /explain/global?version=<version du modèle>&buckets=24
+
+    Pour le modèle actif (ou la version demandée, tant que ses agrégats
+    sont retenus) : nombre de lignes, moyenne des |SHAP|, moyenne signée
+    et quantiles approchés par feature sur les tranches retenues
+    (buckets : n dernières), plus la série par tranche de temps.
+    """
+    try:
+        buckets = request.args.get("buckets")
+        buckets = int(buckets) if buckets else None
+        if buckets is not None and buckets < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "buckets doit être un entier >= 1"}), 400
+    try:
+        report = global_importance.describe(version=request.args.get("version") or None, buckets=buckets)
+        with stage("serialization"):
+            return jsonify(report)
+    except Exception as e:
+        print(f"❌ Erreur dans /explain/global : {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@explain_bp.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Job d'explication asynchrone (volumes trop gros pour une requête)
+    POST /explain/jobs avec une liste JSON de transactions, ou un fichier
+    CSV / JSONL en multipart (champ "file")
+
+    Retourne 202 et l'état du job ; suivre GET /explain/jobs/<id>.
+    """
+    try:
+        upload = request.files.get("file")
+        if upload is not None:
+            job = explain_jobs.submit(file=upload, filename=upload.filename)
+        else:
+            with stage("json_parse"):
+                data_list = request.get_json(silent=True)
+            if not isinstance(data_list, list):
+                return jsonify({"error": "Une liste JSON de transactions ou un fichier (champ 'file') est attendu"}), 400
+            job = explain_jobs.submit(rows=data_list)
+        return jsonify(_job_view(job)), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Erreur dans /explain/jobs : {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@explain_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """État et progression d'un job"""
+    job = explain_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job inconnu : {job_id}"}), 404
+    return jsonify(_job_view(job))
+
+
+@explain_bp.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """Annule un job en file ou en cours ; les shards terminés restent lisibles"""
+    job = explain_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Job inconnu : {job_id}"}), 404
+    return jsonify(_job_view(job)), 202 if job.get("cancel_requested") else 409
+
+
+@explain_bp.route("/jobs/<job_id>/results", methods=["GET"])
+def job_results(job_id):
+    """
+    Explications d'un job par page, y compris pendant son exécution
+    GET /explain/jobs/<id>/results?offset=0&limit=1000&top_k=5
+
+    Les lignes des shards pas encore terminés sont comptées dans pending.
+    Avec top_k, chaque ligne porte top_features comme /explain.
+    """
+    job = explain_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job inconnu : {job_id}"}), 404
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", 1000))
+        top_k = parse_top_k(request.args.get("top_k"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if offset < 0 or not 1 <= limit <= MAX_JOB_PAGE_SIZE:
+        return jsonify({"error": f"offset >= 0 et 1 <= limit <= {MAX_JOB_PAGE_SIZE} attendus"}), 400
+
+    results, pending = explain_jobs.read_rows(job, offset, limit, top_k=top_k)
+    results = [
+        {"index": row["index"], **_explanation(row["shap_values"], top_k)} if "shap_values" in row else row
+        for row in results
+    ]
+    with stage("serialization"):
+        return jsonify({"status": job["status"], "offset": offset, "pending": pending, "results": results})
+
+
+@explain_bp.route("/jobs/<job_id>/download", methods=["GET"])
+def job_download(job_id):
+    """
+    Résultat complet d'un job terminé, au format numpy .npz colonne par
+    colonne : shap:<feature> (float32, NaN si la ligne est en erreur),
+    features, error_index, error_message
+    """
+    job = explain_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job inconnu : {job_id}"}), 404
+    if job["status"] != COMPLETED:
+        return jsonify({"error": f"Job {job['status']}, résultat indisponible"}), 409
+    return send_file(explain_jobs.result_path(job), mimetype="application/octet-stream",
+                     as_attachment=True, download_name=f"explanations-{job_id}.npz")
+
+
+def _job_view(job):
+    view = {key: value for key, value in job.items() if key != "shards_done"}
+    view["shards_done"] = len(job["shards_done"])
+    view["progress"] = round(job["rows_done"] / job["rows_total"], 4) if job["rows_total"] else None
+    return view
+
+
+def _explanation(shap_values, top_k):
+    # Les clés JSON sont triées à la sérialisation : le classement est rendu à part
+    if top_k is None:
+        return {"shap_values": shap_values}
+    return {"shap_values": shap_values, "top_features": list(shap_values)}
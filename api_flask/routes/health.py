@@ -1,7 +1,35 @@
 from flask import Blueprint, jsonify
+from core.model_registry import registry
+from core.business_config import business_config
+from core.admission import admission_stats
+from services.startup import startup
 
 health_bp = Blueprint("health", __name__)
 
 @health_bp.route("", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "startup": startup.describe(),
+        **registry.describe(),
+        **business_config.describe(),
+    })
+
+
+@health_bp.route("/live", methods=["GET"])
+def live():
+    """Processus vivant et capable de répondre (indépendant du modèle)"""
+    return jsonify({"status": "alive"})
+
+
+@health_bp.route("/ready", methods=["GET"])
+def ready():
+    """Prêt à recevoir du trafic : artefacts chargés et préchauffage terminé"""
+    status = startup.describe()
+    return jsonify({"status": "ready" if startup.ready else "not_ready", **status}), 200 if startup.ready else 503
+
+
+@health_bp.route("/admission", methods=["GET"])
+def admission_status():
+    """Files d'admission par classe de routes (admis, rejetés, temps d'attente)"""
+    return jsonify(admission_stats())
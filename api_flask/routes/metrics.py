@@ -0,0 +1,104 @@
+import os
+import time
+
+from flask import Blueprint, Response, request
+
+from core.admission import controllers as admission_controllers
+from core.business_config import business_config
+from core.metrics import (
+    REQUESTS, REQUEST_LATENCY, STAGE_LATENCY, render_histogram, render_samples, set_route,
+)
+from core.model_registry import registry
+from services.prediction_service import coalescer, prediction_cache
+from services.explain_jobs import explain_jobs
+from services.startup import startup, WARMUP_ENVIRON
+
+metrics_bp = Blueprint("metrics", __name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+WARMUP_ROUTE = "warmup"
+
+
+@metrics_bp.before_app_request
+def _start_timer():
+    # Les requêtes de préchauffage (services/startup.py) sont comptées à part
+    route = WARMUP_ROUTE if request.environ.get(WARMUP_ENVIRON) else (request.blueprint or "none")
+    request.environ["metrics.route"] = route
+    request.environ["metrics.start"] = time.perf_counter()
+    set_route(route)
+
+
+@metrics_bp.after_app_request
+def _record_request(response):
+    start = request.environ.get("metrics.start")
+    if start is not None:
+        route = request.environ["metrics.route"]
+        REQUEST_LATENCY.labels(route).observe(time.perf_counter() - start)
+        REQUESTS.labels(route, str(response.status_code)).inc()
+    return response
+
+
+@metrics_bp.route("", methods=["GET"])
+def metrics():
+    """
+    Métriques au format texte Prometheus
+    GET /metrics
+
+    Chaque processus (worker gunicorn) expose ses propres compteurs ; le
+    label `instance` de Prometheus les distingue, l'agrégation se fait à
+    la requête (sum by ...).
+    """
+    lines = []
+    for family in (REQUESTS, REQUEST_LATENCY, STAGE_LATENCY):
+        lines += family.render()
+    lines += _state_metrics()
+    return Response("\n".join(lines) + "\n", content_type=CONTENT_TYPE)
+
+
+def _state_metrics():
+    model = registry.describe()
+    config = business_config.describe()
+    cache = prediction_cache.stats()
+    admission = {name: controller.stats() for name, controller in admission_controllers.items()}
+
+    lines = render_samples("fraud_model_info", "Modèle actif (valeur 1, version en label)", "gauge", [
+        ({"version": model["model_version"], "source": model["model_source"],
+          "inference_path": model["inference_path"]}, 1),
+    ] if model["model_loaded"] else [])
+    lines += render_samples("fraud_config_info", "Configuration métier active (valeur 1, version en label)", "gauge", [
+        ({"version": config["config_version"]}, 1),
+    ] if config["config_loaded"] else [])
+    lines += render_samples("fraud_ready", "1 si le préchauffage est terminé", "gauge", [({}, startup.ready)])
+    lines += render_samples("fraud_process_id", "PID du worker qui a répondu", "gauge", [({}, os.getpid())])
+
+    lines += render_samples("fraud_prediction_cache_entries", "Entrées du cache de prédictions", "gauge",
+                            [({}, cache["size"])])
+    for key in ("hits", "misses", "evictions", "expirations"):
+        lines += render_samples(f"fraud_prediction_cache_{key}_total", f"Cache de prédictions : {key}", "counter",
+                                [({}, cache[key])])
+
+    lines += render_samples("fraud_admission_running", "Requêtes en cours d'exécution par classe", "gauge",
+                            [({"class": name}, s["running"]) for name, s in admission.items()])
+    lines += render_samples("fraud_admission_queued", "Requêtes en attente par classe", "gauge",
+                            [({"class": name}, s["queued"]) for name, s in admission.items()])
+    lines += render_samples("fraud_admission_admitted_total", "Requêtes admises par classe", "counter",
+                            [({"class": name}, s["admitted"]) for name, s in admission.items()])
+    lines += render_samples("fraud_admission_rejected_total", "Requêtes refusées (503) par classe", "counter",
+                            [({"class": name}, s["rejected"]) for name, s in admission.items()])
+    lines += render_histogram("fraud_admission_queue_seconds", "Attente avant exécution par classe",
+                              [({"class": name}, s["queue_time_seconds"]) for name, s in admission.items()])
+
+    # Exposés par le seul worker qui exécute les jobs de l'hôte
+    jobs = explain_jobs.stats()
+    lines += render_samples("fraud_explain_jobs_queued", "Jobs d'explication en file sur l'hôte", "gauge",
+                            [({}, jobs["queued"])] if jobs else [])
+    lines += render_samples("fraud_explain_jobs_running", "Jobs d'explication en cours sur l'hôte", "gauge",
+                            [({}, jobs["running"])] if jobs else [])
+
+    if coalescer is not None:
+        stats = coalescer.stats()
+        lines += render_histogram("fraud_coalescer_queue_seconds", "Attente dans le regroupement en micro-lots",
+                                  [({}, stats["queue_wait_seconds"])])
+        lines += render_histogram("fraud_coalescer_batch_size", "Taille des micro-lots",
+                                  [({}, stats["batch_size"])])
+    return lines
@@ -1,43 +1,267 @@
-from flask import Blueprint, request, jsonify
-from services.prediction_service import predict_instance
-from services.decision_service import decision_rule
-from services.cost_service import compute_cost
-import yaml
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from services.prediction_service import predict_instance, predict_batch, coalescer, prediction_cache
+from services.prediction_cache import feature_key, idempotency_key
+from services.shap_service import predict_and_explain, parse_top_k
+from core.model_registry import registry
+from services.cost_service import compute_cost, compute_cost_batch
+from core.feature_schema import SchemaValidationError
+from core.admission import admission, controllers as admission_controllers
+from core.business_config import business_config
+from core.metrics import stage
+import numpy as np
+import hashlib
+import json
 import os
 
 predict_bp = Blueprint("predict", __name__)
 
-# Utiliser un chemin relatif au fichier courant
-config_path = os.path.join(os.path.dirname(__file__), "..", "config", "business.yaml")
-with open(config_path) as f:
-    business = yaml.safe_load(f)
+# Seuils et coûts rechargés à chaud depuis config/business.yaml (chargés
+# par services/startup.py). Les résultats en cache portent la version de configuration qui les a produits
+business_config.add_listener(lambda config: prediction_cache.clear())
+
+# Taille maximale d'un lot pour /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10000))
+# Nombre de lignes scorées par appel au modèle dans /predict/stream
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1000))
 
 @predict_bp.route("", methods=["POST"])
+@admission("predict")
 def predict():
+    """
+    Score une transaction
+    POST /predict avec JSON data
+
+    Avec ?explain=true, les valeurs SHAP sont calculées dans la même passe
+    (un seul préprocessing partagé entre le modèle et l'explainer) ;
+    ?top_k=k les limite aux k plus fortes contributions.
+    """
     try:
-        data = request.json
+        with stage("json_parse"):
+            data = request.json
         
         if not data:
             return jsonify({"error": "Données JSON vides"}), 400
 
-        p = predict_instance(data)
-        decision = decision_rule(
-            p,
-            business["thresholds"]["accept"],
-            business["thresholds"]["reject"]
-        )
+        explain = request.args.get("explain", "false").lower() in ("1", "true", "yes")
+        try:
+            top_k = parse_top_k(request.args.get("top_k")) if explain else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Passer la probabilité et le montant au service de coût pour dynamicité
+        # Les soumissions répétées (retries des switchs de paiement) sont
+        # servies depuis le cache sans rappeler le modèle
+        model = registry.current()
+        config = business_config.current()
+        X = model.schema.encode(data) if model.schema is not None else None
+        key = _cache_key(model, config, data, X) if prediction_cache.enabled and not explain else None
+        if key is not None:
+            cached = prediction_cache.get(key)
+            if cached is not None:
+                response = jsonify(cached)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+        if explain:
+            p, shap_values = predict_and_explain(data, X=X, top_k=top_k)
+        else:
+            p = predict_instance(data, X=X)
+        # Seuils et coûts du segment (type × tranche de montant) de la transaction
         amount = data.get("amount", 0)
-        cost = compute_cost(decision, business["costs"], probability=p, amount=amount)
+        decision, costs = config.decision_table.decide(p, data.get("type"), amount)
+
+        # Passer la probabilité et le montant au service de coût pour dynamicité
+        cost = compute_cost(decision, costs, probability=p, amount=amount)
 
-        return jsonify({
+        result = {
             "probability": p,
             "decision": decision,
-            "estimated_cost": cost
-        })
+            "estimated_cost": cost,
+            "config_version": config.version
+        }
+        if explain:
+            with stage("serialization"):
+                result["shap_values"] = shap_values
+                if top_k is not None:
+                    result["top_features"] = list(shap_values)
+                return jsonify(result)
+        if key is not None:
+            prediction_cache.put(key, result)
+
+        with stage("serialization"):
+            response = jsonify(result)
+        response.headers["X-Cache"] = "MISS"
+        return response
+    except SchemaValidationError as e:
+        return jsonify({"error": str(e), "details": e.errors}), 400
     except Exception as e:
         print(f"❌ Erreur dans /predict : {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+
+
+@predict_bp.route("/batch", methods=["POST"])
+@admission("predict")
+def predict_batch_route():
+    """
+    Score un lot de transactions en un seul appel au modèle
+    POST /predict/batch avec une liste JSON de transactions
+
+    Retourne une liste dans le même ordre que l'entrée. Une ligne invalide
+    produit {"index": i, "error": ...} sans faire échouer le lot.
+    """
+    try:
+        with stage("json_parse"):
+            data_list = request.json
+
+        if not isinstance(data_list, list):
+            return jsonify({"error": "Les données doivent être une liste"}), 400
+        if not data_list:
+            return jsonify({"error": "Liste de transactions vide"}), 400
+        if len(data_list) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Lot trop volumineux (max {MAX_BATCH_SIZE} transactions)"}), 413
+
+        results = _score_rows(data_list)
+        with stage("serialization"):
+            return jsonify(results)
+    except Exception as e:
+        print(f"❌ Erreur dans /predict/batch : {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@predict_bp.route("/stream", methods=["POST"])
+def predict_stream():
+    """
+    Score un flux NDJSON (une transaction JSON par ligne)
+    POST /predict/stream, Content-Type: application/x-ndjson
+
+    Le corps est lu ligne à ligne et scoré par paquets de STREAM_CHUNK_SIZE ;
+    les résultats sont renvoyés en NDJSON au fur et à mesure, dans l'ordre
+    d'entrée. La mémoire reste constante quelle que soit la taille du flux.
+    """
+    controller = admission_controllers["predict"]
+    if not controller.try_acquire():
+        return jsonify({"error": "Serveur saturé (predict), réessayez plus tard"}), 503, {
+            "Retry-After": str(controller.retry_after)
+        }
+
+    # Le flux est scoré dans le thread de la requête, pendant l'envoi de la
+    # réponse : la place est conservée jusqu'à la fermeture de celle-ci
+    controller.start()
+    stream = request.stream
+
+    def generate():
+        try:
+            chunk, offset = [], 0
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    chunk.append(json.loads(line))
+                except ValueError as e:
+                    chunk.append(_InvalidLine(f"JSON invalide : {e}"))
+                if len(chunk) >= STREAM_CHUNK_SIZE:
+                    yield from _ndjson(_score_rows(chunk, offset))
+                    offset += len(chunk)
+                    chunk = []
+            if chunk:
+                yield from _ndjson(_score_rows(chunk, offset))
+        except Exception as e:
+            print(f"❌ Erreur dans /predict/stream : {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.call_on_close(controller.finish)
+    return response
+
+
+@predict_bp.route("/coalescer", methods=["GET"])
+def coalescer_stats():
+    """
+    Statistiques du regroupement en micro-lots (attente en file, taille des lots)
+    GET /predict/coalescer
+    """
+    if coalescer is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **coalescer.stats()})
+
+
+@predict_bp.route("/cache", methods=["GET"])
+def cache_stats():
+    """
+    Statistiques du cache de prédictions (hits, misses, évictions)
+    GET /predict/cache
+    """
+    return jsonify(prediction_cache.stats())
+
+
+def _cache_key(model, config, data, X):
+    """Clé d'idempotence fournie par l'appelant, sinon empreinte des features."""
+    explicit = request.headers.get("Idempotency-Key") or request.headers.get("X-Transaction-Id")
+    if explicit:
+        return idempotency_key(explicit, model.version, config.version)
+    if X is not None:
+        return feature_key(model.schema, X, model.version, config.version)
+    canonical = json.dumps(data, sort_keys=True, default=str)
+    return "d:" + hashlib.blake2b(
+        f"{canonical}|{model.version}|{config.version}".encode(), digest_size=16
+    ).hexdigest()
+
+
+class _InvalidLine:
+    """Ligne NDJSON illisible : conserve sa position et son erreur dans le lot."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _score_rows(data_list, offset=0):
+    """Score un lot (un seul appel au modèle) et formate une réponse par ligne."""
+    config = business_config.current()
+    probabilities, errors = predict_batch(
+        [None if isinstance(data, _InvalidLine) else data for data in data_list]
+    )
+    for i, data in enumerate(data_list):
+        if isinstance(data, _InvalidLine):
+            errors[i] = data.error
+
+    amounts = np.array([_amount_of(data) for data in data_list])
+    # Lignes en erreur ou type non textuel (liste, dict...) : segment par défaut
+    types = [
+        data.get("type") if i not in errors and isinstance(data.get("type"), str) else None
+        for i, data in enumerate(data_list)
+    ]
+    decisions, segment_costs = config.decision_table.decide_batch(probabilities, types, amounts)
+    costs = compute_cost_batch(decisions, segment_costs, probabilities, amounts)
+
+    results = []
+    for i in range(len(data_list)):
+        if i in errors:
+            results.append({"index": offset + i, "error": errors[i]})
+        else:
+            results.append({
+                "index": offset + i,
+                "probability": float(probabilities[i]),
+                "decision": str(decisions[i]),
+                "estimated_cost": float(costs[i]),
+                "config_version": config.version
+            })
+    return results
+
+
+def _ndjson(results):
+    for result in results:
+        yield json.dumps(result) + "\n"
+
+
+def _amount_of(data):
+    """Montant d'une transaction pour le calcul de coût (NaN si absent ou invalide)."""
+    if not isinstance(data, dict):
+        return np.nan
+    try:
+        return float(data.get("amount") or 0)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Point d'entrée de production : serveur pre-fork (gunicorn) multi-processus.
+
+Le modèle est chargé une seule fois dans le processus maître, puis les
+workers sont forkés et partagent ses pages mémoire en copie-sur-écriture.
+Chaque worker est ensuite préchauffé (post_worker_init) avant d'accepter
+ses premières connexions ; /health/ready reflète l'état du worker interrogé.
+
+Configuration (variables d'environnement) :
+    API_HOST / API_PORT           Adresse d'écoute (défaut 0.0.0.0:5000)
+    SERVE_WORKERS                 Nombre de processus (défaut : nombre de cœurs)
+    WORKER_THREADS                Threads par worker (défaut 1 : workers synchrones ;
+                                  au-delà, workers gthread, dont le recyclage peut
+                                  couper une connexion en cours). Avec 1, les vues
+                                  s'exécutent sans pool d'admission (ADMISSION_MODE=inline)
+                                  et les bornes d'admission valent pour tout l'hôte
+    SERVE_MAX_REQUESTS            Recyclage d'un worker après N requêtes (0 = jamais)
+    SERVE_MAX_REQUESTS_JITTER     Aléa ajouté à SERVE_MAX_REQUESTS (défaut 10%)
+    SERVE_GRACEFUL_TIMEOUT        Délai d'arrêt gracieux en secondes (défaut 30)
+    SERVE_TIMEOUT                 Timeout d'un worker bloqué en secondes (défaut 60)
+    SERVE_XGB_THREADS             Threads XGBoost par worker (défaut 1 avec plusieurs
+                                  workers, sinon 0 : tous les cœurs)
+"""
+
+import gc
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from gunicorn.app.base import BaseApplication
+
+
+def serving_options():
+    workers = int(os.getenv("SERVE_WORKERS", os.cpu_count() or 1))
+    threads = int(os.getenv("WORKER_THREADS", 1))
+    max_requests = int(os.getenv("SERVE_MAX_REQUESTS", 0))
+    return {
+        "bind": f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', 5000)}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "preload_app": True,
+        "max_requests": max_requests,
+        "max_requests_jitter": int(os.getenv("SERVE_MAX_REQUESTS_JITTER", max_requests // 10)),
+        "graceful_timeout": int(os.getenv("SERVE_GRACEFUL_TIMEOUT", 30)),
+        "timeout": int(os.getenv("SERVE_TIMEOUT", 60)),
+        "accesslog": None,
+        "errorlog": "-",
+    }
+
+
+def warm_worker(worker):
+    """Préchauffe un worker avant qu'il n'accepte ses premières connexions."""
+    from core.model_registry import registry
+    from services.startup import startup
+
+    # Le parallélisme vient des workers : N workers × tous les cœurs en
+    # threads OpenMP sursouscriraient la machine sur les lots concurrents
+    registry.set_nthread(int(os.getenv("SERVE_XGB_THREADS", 1 if worker.cfg.workers > 1 else 0)))
+    startup.run(worker.wsgi, load=False)
+
+
+def release_worker(server, worker):
+    """Rend les places d'admission d'un worker mort en cours de requête (maître)."""
+    from core.admission import reclaim
+
+    reclaim(worker.pid)
+
+
+class FraudApplication(BaseApplication):
+    """Application gunicorn chargeant l'app Flask (et le modèle) avant le fork."""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_worker_init", warm_worker)
+        self.cfg.set("child_exit", release_worker)
+
+    def load(self):
+        # Chargement synchrone dans le maître (partagé par les workers après
+        # le fork) ; le préchauffage se fait dans chaque worker
+        os.environ["STARTUP_MODE"] = "preload"
+        # Workers synchrones : une requête à la fois, l'admission s'exécute sur place
+        os.environ.setdefault("ADMISSION_MODE", "inline" if self.options["threads"] == 1 else "pool")
+        # Permet à /admin/profile de retrouver les autres workers
+        os.environ["SERVE_MASTER_PID"] = str(os.getpid())
+        from app import app
+
+        # Geler les objets chargés (modèle, explainer) hors du ramasse-miettes :
+        # sans cela, chaque passage du GC dans un worker réécrit leurs en-têtes
+        # et duplique les pages partagées
+        gc.freeze()
+        return app
+
+
+if __name__ == "__main__":
+    options = serving_options()
+    print(f"🚀 Démarrage de {options['workers']} workers × {options['threads']} threads sur {options['bind']}")
+    FraudApplication(options).run()
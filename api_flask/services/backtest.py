@@ -0,0 +1,155 @@
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from core.pipeline_utils import load_pipeline, MODEL_PATH
+from core.feature_schema import FeatureSchema
+from core.inference_engine import InferenceEngine
+from core.model_registry import file_checksum
+from core.business_config import BusinessConfig, BUSINESS_PATH
+from core.decision_table import DECISIONS
+from services.cost_service import compute_cost_batch, realized_cost_batch
+
+LABEL_COLUMN = "isFraud"
+
+# État d'un processus de scoring, initialisé une fois par _init_worker
+_worker = None
+
+
+def _init_worker(model_path, config_path):
+    global _worker
+    pipeline = load_pipeline(model_path)
+    if pipeline is None:
+        raise RuntimeError(f"Impossible de charger le modèle depuis {model_path}")
+    schema = FeatureSchema.from_pipeline(pipeline)
+    engine = InferenceEngine(pipeline, schema)
+    # Le parallélisme vient du pool : un seul thread XGBoost par processus
+    if engine.booster is not None:
+        engine.booster.set_param({"nthread": 1})
+    _worker = (schema, engine, BusinessConfig.from_file(config_path))
+
+
+def score_chunk(df, label_column=LABEL_COLUMN):
+    """
+    Score un morceau du CSV et le réduit en matrice de confusion et coûts.
+
+    Returns:
+        Dictionnaire additif : rows, confusion (2 × 3 : vérité × décision),
+        expected_cost, realized_cost
+    """
+    schema, engine, config = _worker
+    X = df[schema.names].to_numpy(dtype=object)
+    probabilities = engine.predict_proba(X)
+
+    amounts = df["amount"].to_numpy(dtype=float)
+    types = df["type"].to_numpy(dtype=object) if "type" in df.columns else [None] * len(df)
+    labels = df[label_column].to_numpy(dtype=np.intp)
+    decisions, costs = config.decision_table.decide_batch(probabilities, types, amounts)
+
+    decision_codes = (decisions == DECISIONS[1]) + 2 * (decisions == DECISIONS[2])
+    confusion = np.bincount(labels * len(DECISIONS) + decision_codes, minlength=2 * len(DECISIONS))
+
+    return {
+        "rows": len(df),
+        "confusion": confusion.reshape(2, len(DECISIONS)),
+        "expected_cost": float(compute_cost_batch(decisions, costs, probabilities, amounts).sum()),
+        "realized_cost": float(realized_cost_batch(decisions, costs, labels, amounts).sum()),
+    }
+
+
+def run_backtest(csv_path, model_path=MODEL_PATH, config_path=BUSINESS_PATH, label_column=LABEL_COLUMN,
+                 chunk_size=100_000, workers=None, progress=None):
+    """
+    Rejoue le modèle et la politique de décision sur un CSV labellisé.
+
+    Le fichier est lu par morceaux de chunk_size lignes, scorés en parallèle
+    par un pool de processus ; au plus deux morceaux par processus sont en
+    vol, la mémoire reste donc bornée quelle que soit la taille du fichier.
+
+    Args:
+        csv_path: CSV avec les colonnes du modèle et la colonne label
+        workers: Nombre de processus (défaut : nombre de cœurs)
+        progress: Callback progress(rows, elapsed_seconds) après chaque morceau
+
+    Returns:
+        Rapport (effectifs, matrice de confusion, coûts, débit)
+    """
+    workers = workers or os.cpu_count() or 1
+    config = BusinessConfig.from_file(config_path)
+    pipeline = load_pipeline(model_path)
+    if pipeline is None:
+        raise RuntimeError(f"Impossible de charger le modèle depuis {model_path}")
+    names = FeatureSchema.from_pipeline(pipeline).names
+    del pipeline
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = list(dict.fromkeys([*names, "amount", label_column]))
+    missing = [c for c in usecols if c not in header]
+    if missing:
+        raise ValueError(f"Colonnes absentes de {csv_path} : {', '.join(missing)}")
+
+    totals = {"rows": 0, "skipped": 0, "confusion": np.zeros((2, len(DECISIONS)), dtype=np.int64),
+              "expected_cost": 0.0, "realized_cost": 0.0}
+
+    def merge(result):
+        totals["rows"] += result["rows"]
+        totals["confusion"] += result["confusion"]
+        totals["expected_cost"] += result["expected_cost"]
+        totals["realized_cost"] += result["realized_cost"]
+        if progress is not None:
+            progress(totals["rows"], time.perf_counter() - start)
+
+    start = time.perf_counter()
+    # spawn : pas de fork d'un processus ayant déjà initialisé OpenMP (XGBoost)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=(model_path, config_path)) as pool:
+        pending = set()
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunk_size):
+            labelled = chunk[chunk[label_column].isin([0, 1])]
+            totals["skipped"] += len(chunk) - len(labelled)
+            if labelled.empty:
+                continue
+            pending.add(pool.submit(score_chunk, labelled, label_column))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result())
+        for future in pending:
+            merge(future.result())
+    elapsed = time.perf_counter() - start
+
+    return _report(totals, elapsed, workers, config, file_checksum(model_path))
+
+
+def _report(totals, elapsed, workers, config, model_version):
+    confusion = totals["confusion"]
+    frauds, legit = confusion[1].sum(), confusion[0].sum()
+    accept, review, reject = range(len(DECISIONS))
+    flagged = confusion[:, review] + confusion[:, reject]
+    return {
+        "rows": int(totals["rows"]),
+        "skipped": int(totals["skipped"]),
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(totals["rows"] / elapsed) if elapsed else None,
+        "workers": workers,
+        "model_version": model_version,
+        "config_version": config.version,
+        "confusion": {
+            label: {decision: int(confusion[i, j]) for j, decision in enumerate(DECISIONS)}
+            for i, label in enumerate(("legit", "fraud"))
+        },
+        "fraud_rejected_rate": _ratio(confusion[1, reject], frauds),
+        "fraud_flagged_rate": _ratio(flagged[1], frauds),
+        "legit_rejected_rate": _ratio(confusion[0, reject], legit),
+        "reject_precision": _ratio(confusion[1, reject], confusion[:, reject].sum()),
+        "expected_cost": round(totals["expected_cost"], 2),
+        "realized_cost": round(totals["realized_cost"], 2),
+    }
+
+
+def _ratio(numerator, denominator):
+    return round(float(numerator) / float(denominator), 6) if denominator else None
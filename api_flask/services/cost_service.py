@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def compute_cost(decision, costs, probability=None, amount=None):
     """
     Calcule le coût estimé basé sur la décision, la probabilité et le montant.
@@ -50,3 +53,74 @@ def compute_cost(decision, costs, probability=None, amount=None):
             return costs["fn"] * 0.1 * amount_risk_factor
 
 
+
+def compute_cost_batch(decisions, costs, probabilities, amounts=None):
+    """
+    Version vectorisée de compute_cost pour un lot de transactions.
+
+    Applique exactement le même modèle de coût que compute_cost, ligne à
+    ligne, mais avec des opérations numpy sur l'ensemble du lot.
+
+    Args:
+        decisions: Tableau de décisions (ACCEPT, REVIEW, REJECT)
+        costs: Dictionnaire avec les coûts FP et FN
+        probabilities: Tableau de probabilités de fraude (0-1)
+        amounts: Tableau de montants (None ou valeurs manquantes = pas d'ajustement)
+
+    Returns:
+        Tableau numpy des coûts estimés
+    """
+    decisions = np.asarray(decisions)
+    probabilities = np.asarray(probabilities, dtype=float)
+
+    if amounts is None:
+        amount_risk_factor = np.ones(len(probabilities))
+    else:
+        amount_risk_factor = amount_risk_factor_batch(amounts)
+
+    reject_cost = costs["fp"] * (1 - probabilities) * amount_risk_factor
+    accept_cost = costs["fn"] * probabilities * amount_risk_factor
+    review_cost = costs["fn"] * 0.2 * probabilities * amount_risk_factor
+
+    return np.where(
+        decisions == "REJECT", reject_cost,
+        np.where(decisions == "ACCEPT", accept_cost, review_cost)
+    )
+
+
+def amount_risk_factor_batch(amounts):
+    """Facteur de risque lié au montant (même règle que compute_cost), vectorisé."""
+    amounts = np.asarray(amounts, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.where(amounts > 0, np.minimum(amounts / 10000, 2.0), 1.0)
+
+
+def realized_cost_batch(decisions, costs, labels, amounts=None):
+    """
+    Coût réel d'un lot de décisions connaissant la vérité terrain.
+
+    Fraude acceptée = coût FN, transaction légitime rejetée = coût FP,
+    révision = coût de révision de compute_cost sans probabilité ; les
+    autres issues ne coûtent rien. Même facteur de montant que compute_cost.
+
+    Args:
+        decisions: Tableau de décisions (ACCEPT, REVIEW, REJECT)
+        costs: Dictionnaire avec les coûts FP et FN (scalaires ou tableaux)
+        labels: Tableau 0/1 (1 = fraude)
+        amounts: Tableau de montants (optionnel)
+
+    Returns:
+        Tableau numpy des coûts réalisés
+    """
+    decisions = np.asarray(decisions)
+    y = np.asarray(labels, dtype=float)
+
+    if amounts is None:
+        amount_risk_factor = np.ones(len(y))
+    else:
+        amount_risk_factor = amount_risk_factor_batch(amounts)
+
+    return amount_risk_factor * np.where(
+        decisions == "ACCEPT", costs["fn"] * y,
+        np.where(decisions == "REJECT", costs["fp"] * (1 - y), costs["fn"] * 0.1)
+    )
@@ -0,0 +1,100 @@
+import numpy as np
+
+from services.cost_service import amount_risk_factor_batch
+
+DEFAULT_GRID = np.round(np.arange(0.01, 1.0, 0.01), 4)
+
+
+def sweep_thresholds(probabilities, costs, amounts=None, labels=None,
+                     accept_grid=DEFAULT_GRID, reject_grid=DEFAULT_GRID):
+    """
+    Coût total pour chaque couple de seuils (accept, reject) d'une grille.
+
+    Les scores sont triés une fois et les coûts par décision cumulés : pour
+    un couple de seuils, les lignes ACCEPT, REVIEW et REJECT sont des plages
+    contiguës du tableau trié, et leur coût se lit par différence de sommes
+    cumulées. Aucune ligne n'est rescorée ni reparcourue par couple.
+
+    Args:
+        probabilities: Probabilités de fraude déjà calculées
+        costs: Dictionnaire des coûts business (fp, fn)
+        amounts: Montants des transactions (None = pas d'ajustement)
+        labels: Vérité terrain 0/1 (optionnel)
+        accept_grid, reject_grid: Seuils candidats
+
+    Returns:
+        Dictionnaire de matrices (len(accept_grid), len(reject_grid)) :
+        expected_cost (modèle de coût de compute_cost) et, si labels est
+        fourni, realized_cost et les effectifs par issue.
+    """
+    p = np.asarray(probabilities, dtype=float)
+    order = np.argsort(p, kind="stable")
+    p = p[order]
+    factor = np.ones(len(p)) if amounts is None else amount_risk_factor_batch(amounts)[order]
+
+    accept_grid = np.asarray(accept_grid, dtype=float)
+    reject_grid = np.asarray(reject_grid, dtype=float)
+    # Nombre de lignes sous chaque seuil ; comme decision_rule, p < accept
+    # l'emporte sur reject si accept > reject
+    ia = np.searchsorted(p, accept_grid, side="left")[:, None]
+    ir = np.maximum(np.searchsorted(p, reject_grid, side="left")[None, :], ia)
+
+    def ranges(values):
+        """Sommes (accept, review, reject) de values pour chaque couple."""
+        cum = np.concatenate(([0.0], np.cumsum(values)))
+        accepted = np.broadcast_to(cum[ia], ir.shape)
+        return accepted, cum[ir] - accepted, cum[-1] - cum[ir]
+
+    accept_cost, _, _ = ranges(costs["fn"] * p * factor)
+    _, review_cost, _ = ranges(costs["fn"] * 0.2 * p * factor)
+    _, _, reject_cost = ranges(costs["fp"] * (1 - p) * factor)
+
+    result = {
+        "accept_grid": accept_grid,
+        "reject_grid": reject_grid,
+        "expected_cost": accept_cost + review_cost + reject_cost,
+    }
+
+    if labels is not None:
+        y = np.asarray(labels, dtype=float)[order]
+        fraud_accepted, fraud_review, fraud_rejected = ranges(y)
+        legit_accepted, legit_review, legit_rejected = ranges(1 - y)
+        # Issue réelle : fraude acceptée = fn, transaction légitime rejetée = fp,
+        # révision = coût de révision de compute_cost sans probabilité
+        fn_loss, _, _ = ranges(costs["fn"] * y * factor)
+        _, _, fp_loss = ranges(costs["fp"] * (1 - y) * factor)
+        _, review_loss, _ = ranges(costs["fn"] * 0.1 * factor)
+        result.update({
+            "realized_cost": fn_loss + fp_loss + review_loss,
+            "fraud_accepted": fraud_accepted,
+            "fraud_review": fraud_review,
+            "fraud_rejected": fraud_rejected,
+            "legit_accepted": legit_accepted,
+            "legit_review": legit_review,
+            "legit_rejected": legit_rejected,
+        })
+    return result
+
+
+def best_thresholds(result, metric="expected_cost"):
+    """Couple (accept, reject) valide (accept <= reject) de coût minimal."""
+    valid = result["accept_grid"][:, None] <= result["reject_grid"][None, :]
+    values = np.where(valid, result[metric], np.inf)
+    i, j = np.unravel_index(np.argmin(values), values.shape)
+    return {
+        "accept": float(result["accept_grid"][i]),
+        "reject": float(result["reject_grid"][j]),
+        metric: float(values[i, j]),
+    }
+
+
+def parse_grid(spec):
+    """Grille depuis 'début:fin:pas' (fin exclue) ou 'v1,v2,...'."""
+    if spec is None:
+        return DEFAULT_GRID
+    if isinstance(spec, (list, tuple)):
+        return np.asarray(spec, dtype=float)
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return np.round(np.arange(start, stop, step), 6)
+    return np.asarray([float(x) for x in spec.split(",")], dtype=float)
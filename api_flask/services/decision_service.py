@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def decision_rule(p, t_accept, t_reject):
     if p < t_accept:
         return "ACCEPT"
@@ -5,3 +8,12 @@ def decision_rule(p, t_accept, t_reject):
         return "REVIEW"
     else:
         return "REJECT"
+
+
+def decision_rule_batch(probabilities, t_accept, t_reject):
+    """Version vectorisée de decision_rule sur un tableau de probabilités."""
+    p = np.asarray(probabilities, dtype=float)
+    return np.where(
+        p < t_accept, "ACCEPT",
+        np.where(p < t_reject, "REVIEW", "REJECT")
+    )
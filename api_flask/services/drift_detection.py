@@ -3,6 +3,7 @@ import pandas as pd
 from scipy.stats import ks_2samp, chi2_contingency
 import os
 import json
+import hashlib
 from datetime import datetime
 
 class DriftDetector:
@@ -13,6 +14,8 @@ class DriftDetector:
     
     def __init__(self, baseline_file="drift_baseline.json"):
         self.baseline_file = os.path.join(os.path.dirname(__file__), "..", baseline_file)
+        # Empreinte du contenu de la baseline (ETag de /drift/summary et /drift/baseline)
+        self.baseline_version = None
         self.baseline = self.load_baseline()
         self.predictions_buffer = []
         self.drift_threshold = 0.05  # seuil p-value pour détecter drift
@@ -26,7 +29,9 @@ class DriftDetector:
                     if not content:  # Fichier vide
                         print(f"⚠️ Fichier baseline vide: {self.baseline_file}")
                         return None
-                    return json.loads(content)
+                    baseline = json.loads(content)
+                    self.baseline_version = _content_version(content)
+                    return baseline
             except json.JSONDecodeError as e:
                 print(f"⚠️ Fichier baseline corrompu: {e}")
                 return None
@@ -39,9 +44,11 @@ class DriftDetector:
     
     def save_baseline(self, baseline):
         """Sauvegarde la baseline"""
+        content = json.dumps(baseline, indent=2, default=str)
         with open(self.baseline_file, 'w') as f:
-            json.dump(baseline, f, indent=2, default=str)
+            f.write(content)
         self.baseline = baseline
+        self.baseline_version = _content_version(content.strip())
     
     def create_baseline(self, data_list):
         """Crée une baseline à partir d'une liste de données"""
@@ -223,3 +230,7 @@ class DriftDetector:
             'baseline_samples': self.baseline.get('n_samples'),
             'features': list(self.baseline.keys())
         }
+
+
+def _content_version(content):
+    return hashlib.sha256(content.encode()).hexdigest()[:12]
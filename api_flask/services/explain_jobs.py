@@ -0,0 +1,593 @@
+import fcntl
+import json
+import multiprocessing as mp
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.attribution import AttributionMapper
+from core.model_registry import registry
+
+# Répertoire des jobs : état (job.json), entrée, shards terminés et résultat.
+# Sur disque plutôt qu'en mémoire : c'est la référence, que tous les workers
+# gunicorn lisent et qu'un autre worker reprend si celui qui exécute meurt.
+# Local à l'hôte (verrou fcntl, non fiable sur un partage réseau)
+JOBS_DIR = os.getenv("EXPLAIN_JOBS_DIR", os.path.join(tempfile.gettempdir(), "fraud-explain-jobs"))
+# Processus du pool, un seul pool par hôte
+JOB_WORKERS = int(os.getenv("EXPLAIN_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+SHARD_SIZE = int(os.getenv("EXPLAIN_JOB_SHARD_SIZE", 10_000))
+MAX_RETRIES = int(os.getenv("EXPLAIN_JOB_RETRIES", 2))
+MAX_ROWS = int(os.getenv("EXPLAIN_JOB_MAX_ROWS", 1_000_000))
+# Durée de conservation (h) des jobs et de leurs résultats
+RETENTION_HOURS = float(os.getenv("EXPLAIN_JOB_RETENTION_HOURS", 24))
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+JOB_FILE = "job.json"
+CANCEL_FILE = "cancel"
+# Verrou détenu par le processus qui exécute les jobs de l'hôte
+LOCK_FILE = "runner.lock"
+RESULT_FILE = "result.npz"
+SHARDS_DIR = "shards"
+INPUT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Intervalle (s) de recherche du verrou et des jobs à exécuter
+POLL_SECONDS = 1.0
+
+_JOB_ID = re.compile(r"^[0-9a-f]{16}$")
+
+
+# ─── Processus du pool ───────────────────────────────────────────────
+
+def _init_worker():
+    # Variables d'environnement héritées : mêmes artefacts et même explainer que l'API
+    bundle = registry.load()
+    # Le parallélisme vient du pool : un seul thread XGBoost par processus
+    if bundle.engine.booster is not None:
+        bundle.engine.booster.set_param({"nthread": 1})
+
+
+def explain_shard(directory, index, rows):
+    """
+    Explique un shard et l'écrit dans shards/<index>.npz.
+
+    Le résultat ne repasse pas par le pipe du pool : seul un résumé est
+    retourné au gestionnaire.
+    """
+    from services.shap_service import explain_matrix
+
+    values, names, errors = explain_matrix(rows)
+    error_index = np.fromiter(errors, dtype=np.int64, count=len(errors))
+    error_message = np.array([errors[i] for i in error_index], dtype=str)
+    path = _shard_path(directory, index)
+    # Fichier temporaire propre au processus : après une reprise, un processus
+    # orphelin de l'ancien pool peut encore écrire le même shard
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, values=values, names=np.array(names, dtype=str),
+                 error_index=error_index, error_message=error_message)
+    os.replace(tmp, path)
+    return {"index": index, "rows": len(rows), "errors": len(errors), "model_version": registry.current().version}
+
+
+# ─── Gestionnaire ────────────────────────────────────────────────────
+
+class ExplainJobManager:
+    """
+    Jobs d'explication hors des threads de requête.
+
+    Les lignes d'un job sont découpées en shards expliqués par un pool de
+    processus (spawn, comme le backtest) ; chaque processus charge le
+    modèle une fois via le registre, explainer natif compris. Les jobs
+    passent un par un, dans l'ordre de soumission.
+
+    L'état sur disque fait foi : submit() écrit l'entrée et job.json, sans
+    file en mémoire. Chaque worker fait tourner une boucle qui tente de
+    prendre le verrou de l'hôte (runner.lock) ; seul son détenteur crée un
+    pool et exécute les jobs, en estampillant chacun (owner_pid,
+    heartbeat_at). Le noyau libère le verrou à la mort du processus
+    (recyclage, crash) : un autre worker le prend, reprend les jobs restés
+    running sans refaire les shards terminés (au plus max_retries
+    reprises), puis ceux en file.
+
+    Un shard terminé est écrit sur disque : la progression et les
+    résultats partiels sont lisibles pendant le job, depuis n'importe
+    quel worker. Si un processus du pool meurt, le pool est recréé et les
+    shards en vol sont relancés (au plus max_retries fois chacun). Le
+    résultat final est un fichier .npz colonne par colonne (une colonne
+    float32 par feature).
+    """
+
+    def __init__(self, directory=JOBS_DIR, workers=JOB_WORKERS, shard_size=SHARD_SIZE,
+                 max_retries=MAX_RETRIES, max_rows=MAX_ROWS, retention_hours=RETENTION_HOURS):
+        self.directory = directory
+        self.workers = workers
+        self.shard_size = shard_size
+        self.max_retries = max_retries
+        self.max_rows = max_rows
+        self.retention_hours = retention_hours
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Fichier verrouillé tant que ce processus exécute les jobs de l'hôte
+        self._runner_lock = None
+        self._result_cache = (None, None)
+        self._current = None
+
+    # ─── API ──────────────────────────────────────────────────────────
+
+    def submit(self, rows=None, file=None, filename=None):
+        """
+        Crée un job à partir d'une liste de transactions ou d'un fichier
+        (CSV ou JSONL, colonnes hors modèle ignorées).
+
+        Returns:
+            État initial du job (statut queued)
+
+        Raises:
+            ValueError si l'entrée est vide, trop volumineuse ou d'un format inconnu
+        """
+        self._purge()
+        job_id = uuid.uuid4().hex[:16]
+        directory = self._job_dir(job_id)
+        os.makedirs(os.path.join(directory, SHARDS_DIR))
+        try:
+            if rows is not None:
+                # Écrites sur disque comme un fichier : le job survit au processus qui l'a reçu
+                source, total = "rows", len(rows)
+                with open(self._input_path(job_id, source), "w") as f:
+                    for row in rows:
+                        f.write(json.dumps(row) + "\n")
+            else:
+                source = INPUT_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+                if source is None:
+                    raise ValueError(f"Format de fichier non supporté : {filename!r} (attendu : .csv, .jsonl)")
+                file.save(self._input_path(job_id, source))
+                total = self._count_rows(job_id, source)
+            if total == 0:
+                raise ValueError("Aucune transaction à expliquer")
+            if total > self.max_rows:
+                raise ValueError(f"Job trop volumineux : {total} lignes (max {self.max_rows})")
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+        job = {
+            "id": job_id,
+            "status": QUEUED,
+            "source": source,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "model_version": None,
+            "rows_total": total,
+            "rows_done": 0,
+            "rows_invalid": 0,
+            "shard_size": self.shard_size,
+            "shards_total": -(-total // self.shard_size),
+            "shards_done": [],
+            "retries": 0,
+            "resumes": 0,
+            "owner_pid": None,
+            "heartbeat_at": None,
+            "features": None,
+            "error": None,
+        }
+        self._save(job)
+        self.start()
+        self._wakeup.set()
+        print(f"📥 Job d'explication {job_id} en file ({total} lignes, {source})")
+        return job
+
+    def get(self, job_id):
+        """État du job (None s'il n'existe pas)."""
+        if not _JOB_ID.match(job_id or ""):
+            return None
+        try:
+            with open(os.path.join(self._job_dir(job_id), JOB_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def cancel(self, job_id):
+        """
+        Demande l'annulation du job (prise en compte entre deux shards).
+        Les shards déjà terminés restent consultables.
+        """
+        job = self.get(job_id)
+        if job is not None and job["status"] not in FINISHED:
+            open(os.path.join(self._job_dir(job_id), CANCEL_FILE), "w").close()
+            job["cancel_requested"] = True
+        return job
+
+    def read_rows(self, job, offset, limit, top_k=None):
+        """
+        Explications des lignes [offset, offset + limit) disponibles.
+
+        Avant la fin du job, seules les lignes des shards terminés sont
+        retournées ; ensuite, elles sont lues dans le fichier résultat.
+
+        Returns:
+            (results, pending) : [{"index", "shap_values"} ou {"index", "error"}]
+            et nombre de lignes demandées pas encore expliquées
+        """
+        stop = min(offset + limit, job["rows_total"])
+        if offset >= stop:
+            return [], 0
+        if job["status"] == COMPLETED:
+            values, names, errors = self._read_result(job)
+            return _format_rows(values[offset:stop], names, errors, offset, top_k), 0
+
+        results, pending = [], 0
+        done = set(job["shards_done"])
+        for index in range(offset // job["shard_size"], (stop - 1) // job["shard_size"] + 1):
+            start = index * job["shard_size"]
+            lo, hi = max(offset, start), min(stop, start + job["shard_size"])
+            try:
+                if index not in done:
+                    raise FileNotFoundError
+                shard = np.load(_shard_path(self._job_dir(job["id"]), index))
+            except FileNotFoundError:
+                # Shard en cours, ou déjà fusionné dans le résultat (relire l'état du job)
+                pending += hi - lo
+                continue
+            with shard:
+                errors = {int(i) + start: str(m) for i, m in zip(shard["error_index"], shard["error_message"])}
+                results += _format_rows(shard["values"][lo - start:hi - start], list(shard["names"]), errors, lo, top_k)
+        return results, pending
+
+    def result_path(self, job):
+        """Fichier résultat d'un job terminé."""
+        return os.path.join(self._job_dir(job["id"]), RESULT_FILE)
+
+    def stats(self):
+        """
+        Jobs en file et en cours sur l'hôte, vus par le processus qui les
+        exécute ; None dans les autres (une seule série par hôte).
+        """
+        if self._runner_lock is None:
+            return None
+        return {
+            "queued": sum(job["status"] == QUEUED for job in self._active_jobs()),
+            "running": int(self._current is not None),
+        }
+
+    # ─── Exécution ────────────────────────────────────────────────────
+
+    def start(self):
+        """
+        Démarre la boucle d'exécution du processus (sans effet si elle tourne).
+        Appelé au démarrage de chaque worker : tous attendent le verrou.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="explain-jobs", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                job = self._claim_next() if self._acquire_runner_lock() else None
+            except Exception as e:
+                print(f"⚠️ Recherche des jobs d'explication impossible : {e}")
+                job = None
+            if job is not None:
+                self._execute(job)
+                continue
+            self._wakeup.wait(POLL_SECONDS)
+            self._wakeup.clear()
+
+    def _acquire_runner_lock(self):
+        """True si ce processus exécute les jobs de l'hôte (verrou pris, ou déjà détenu)."""
+        if self._runner_lock is not None:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        f = open(os.path.join(self.directory, LOCK_FILE), "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._runner_lock = f
+        print(f"🔒 Jobs d'explication de l'hôte exécutés par le processus {os.getpid()}")
+        return True
+
+    def _active_jobs(self):
+        jobs = []
+        for job_id in os.listdir(self.directory):
+            job = self.get(job_id)
+            if job is not None and job["status"] in (QUEUED, RUNNING):
+                jobs.append(job)
+        return jobs
+
+    def _claim_next(self):
+        """
+        Job suivant, le plus ancien d'abord : en file, ou running au nom d'un
+        processus disparu (le verrou est à nous : personne d'autre ne
+        l'exécute). Le job est estampillé à notre nom avant d'être lancé.
+        """
+        jobs = self._active_jobs()
+        if not jobs:
+            return None
+        job = min(jobs, key=lambda job: job["created_at"])
+        if job["status"] == RUNNING:
+            job["resumes"] += 1
+            print(f"♻️ Reprise du job d'explication {job['id']} (processus {job['owner_pid']} disparu)")
+        job["owner_pid"] = os.getpid()
+        self._save(job)
+        return job
+
+    def _execute(self, job):
+        self._current = job["id"]
+        try:
+            if job["resumes"] > self.max_retries:
+                raise RuntimeError(f"processus d'exécution perdu {job['resumes']} fois")
+            self._run(job)
+        except Exception as e:
+            print(f"❌ Job d'explication {job['id']} en échec : {e}")
+            job.update(status=FAILED, error=str(e), finished_at=datetime.now().isoformat())
+            self._save(job)
+        finally:
+            self._current = None
+        # Entrée inutile une fois le job terminé : seuls les shards et le résultat restent
+        try:
+            os.remove(self._input_path(job["id"], job["source"]))
+        except FileNotFoundError:
+            pass
+
+    def _run(self, job):
+        if self._cancelled(job):
+            job.update(status=CANCELLED, finished_at=datetime.now().isoformat())
+            self._save(job)
+            return
+
+        start = time.perf_counter()
+        directory = self._job_dir(job["id"])
+        if job["status"] == QUEUED:
+            job.update(status=RUNNING, started_at=datetime.now().isoformat(), model_version=registry.current().version)
+            self._save(job)
+        # Reprise : les shards terminés (vérifiés par version dans _shard_done) sont gardés
+        done = set(job["shards_done"])
+        missing = [index for index in done if not os.path.exists(_shard_path(directory, index))]
+        if missing:
+            raise RuntimeError(f"shards terminés introuvables : {sorted(missing)[:5]}")
+
+        pending = {}
+        attempts = {}
+        pool = self._new_pool()
+        try:
+            for index, shard in enumerate(self._iter_shards(job)):
+                if index in done:
+                    continue
+                self._submit(pool, directory, index, shard, pending)
+                # Au plus deux shards en vol par processus : mémoire bornée
+                while len(pending) >= 2 * self.workers:
+                    pool = self._collect(job, pool, pending, attempts)
+                if self._cancelled(job):
+                    break
+            while pending and not self._cancelled(job):
+                pool = self._collect(job, pool, pending, attempts)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if self._cancelled(job):
+            job.update(status=CANCELLED, finished_at=datetime.now().isoformat())
+            self._save(job)
+            print(f"🛑 Job d'explication {job['id']} annulé ({job['rows_done']}/{job['rows_total']} lignes)")
+            return
+
+        self._write_result(job)
+        elapsed = time.perf_counter() - start
+        job.update(status=COMPLETED, finished_at=datetime.now().isoformat(), seconds=round(elapsed, 2))
+        self._save(job)
+        # Les lecteurs passent au fichier résultat une fois l'état enregistré
+        for index in range(job["shards_total"]):
+            os.remove(_shard_path(directory, index))
+        print(f"✅ Job d'explication {job['id']} terminé : {job['rows_total']} lignes en {elapsed:.1f}s")
+
+    def _new_pool(self):
+        # spawn : pas de fork d'un processus ayant déjà initialisé OpenMP (XGBoost)
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_init_worker)
+
+    def _submit(self, pool, directory, index, shard, pending):
+        try:
+            future = pool.submit(explain_shard, directory, index, shard)
+        except BrokenProcessPool as e:
+            # Processus mort depuis la dernière collecte : traité comme un shard en vol perdu
+            future = Future()
+            future.set_exception(e)
+        pending[future] = (index, shard)
+
+    def _collect(self, job, pool, pending, attempts):
+        """
+        Attend au moins un shard et met à jour la progression.
+
+        Retourne le pool à utiliser ensuite : recréé si un processus est
+        mort, avec les shards en vol resoumis.
+        """
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        retry = []
+        broken = False
+        for future in done:
+            index, shard = pending.pop(future)
+            try:
+                summary = future.result()
+            except BrokenProcessPool:
+                broken = True
+                retry.append((index, shard))
+                continue
+            except Exception as e:
+                print(f"⚠️ Shard {index} du job {job['id']} en échec ({e})")
+                retry.append((index, shard))
+                continue
+            self._shard_done(job, summary)
+
+        if broken:
+            # Pool inutilisable : les shards encore en vol sont perdus avec lui
+            print(f"⚠️ Processus d'explication perdu, recréation du pool (job {job['id']})")
+            for future, (index, shard) in list(pending.items()):
+                del pending[future]
+                if future.done() and future.exception() is None:
+                    self._shard_done(job, future.result())
+                else:
+                    retry.append((index, shard))
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = self._new_pool()
+
+        for index, shard in retry:
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] > self.max_retries:
+                raise RuntimeError(f"shard {index} en échec après {attempts[index]} tentatives")
+            job["retries"] += 1
+            self._submit(pool, self._job_dir(job["id"]), index, shard, pending)
+        if retry:
+            self._save(job)
+        return pool
+
+    def _shard_done(self, job, summary):
+        if summary["model_version"] != job["model_version"]:
+            raise RuntimeError(
+                f"modèle {summary['model_version']} chargé pendant le job (version {job['model_version']} attendue)"
+            )
+        job["shards_done"].append(summary["index"])
+        job["rows_done"] += summary["rows"]
+        job["rows_invalid"] += summary["errors"]
+        self._save(job)
+
+    def _iter_shards(self, job):
+        """Lignes du job par shards de shard_size transactions (dictionnaires)."""
+        size = job["shard_size"]
+        path = self._input_path(job["id"], job["source"])
+        names = registry.current().schema.names
+        if job["source"] == "csv":
+            for chunk in pd.read_csv(path, usecols=lambda c: c in names, chunksize=size):
+                yield chunk.to_dict("records")
+            return
+
+        # Fichier JSONL : colonnes hors modèle ignorées ; liste JSON (rows) : lignes
+        # transmises telles quelles, validées comme par /explain/batch
+        project = job["source"] == "jsonl"
+        shard = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if project and isinstance(data, dict):
+                    data = {k: v for k, v in data.items() if k in names}
+                shard.append(data)
+                if len(shard) == size:
+                    yield shard
+                    shard = []
+        if shard:
+            yield shard
+
+    def _write_result(self, job):
+        """Assemble les shards en un fichier colonne par colonne."""
+        directory = self._job_dir(job["id"])
+        blocks, error_index, error_message, names = [], [], [], None
+        for index in range(job["shards_total"]):
+            with np.load(_shard_path(directory, index)) as shard:
+                blocks.append(shard["values"])
+                error_index.append(shard["error_index"] + index * job["shard_size"])
+                error_message.append(shard["error_message"])
+                names = list(shard["names"])
+        values = np.concatenate(blocks)
+
+        columns = {f"shap:{name}": np.ascontiguousarray(values[:, j]) for j, name in enumerate(names)}
+        path = os.path.join(directory, RESULT_FILE)
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(
+                f,
+                features=np.array(names, dtype=str),
+                error_index=np.concatenate(error_index),
+                error_message=np.concatenate(error_message),
+                **columns,
+            )
+        os.replace(path + ".tmp", path)
+        job["features"] = names
+
+    def _read_result(self, job):
+        # Dernier résultat lu gardé en mémoire : la pagination relit le même fichier
+        cached_id, cached = self._result_cache
+        if cached_id == job["id"]:
+            return cached
+        with np.load(self.result_path(job)) as result:
+            names = list(result["features"])
+            values = np.column_stack([result[f"shap:{name}"] for name in names])
+            errors = {int(i): str(m) for i, m in zip(result["error_index"], result["error_message"])}
+        self._result_cache = (job["id"], (values, names, errors))
+        return values, names, errors
+
+    # ─── Fichiers ─────────────────────────────────────────────────────
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def _input_path(self, job_id, source):
+        return os.path.join(self._job_dir(job_id), f"input.{source}")
+
+    def _purge(self):
+        """Supprime les jobs dont l'état n'a pas changé depuis retention_hours."""
+        if self.retention_hours <= 0 or not os.path.isdir(self.directory):
+            return
+        limit = time.time() - self.retention_hours * 3600
+        for job_id in os.listdir(self.directory):
+            directory = self._job_dir(job_id)
+            try:
+                expired = _JOB_ID.match(job_id) and os.stat(os.path.join(directory, JOB_FILE)).st_mtime < limit
+            except FileNotFoundError:
+                continue
+            if expired:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _cancelled(self, job):
+        return os.path.exists(os.path.join(self._job_dir(job["id"]), CANCEL_FILE))
+
+    def _count_rows(self, job_id, source):
+        count = 0
+        with open(self._input_path(job_id, source), "rb") as f:
+            for line in f:
+                count += bool(line.strip())
+        # En-tête CSV
+        return max(count - 1, 0) if source == "csv" else count
+
+    def _save(self, job):
+        # Chaque écriture par le processus qui exécute le job vaut battement de cœur
+        if job.get("owner_pid") == os.getpid():
+            job["heartbeat_at"] = datetime.now().isoformat()
+        # Écriture atomique : un lecteur voit l'ancien ou le nouvel état, jamais un fichier tronqué
+        path = os.path.join(self._job_dir(job["id"]), JOB_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(path + ".tmp", path)
+
+
+def _shard_path(directory, index):
+    return os.path.join(directory, SHARDS_DIR, f"{index:06d}.npz")
+
+
+def _format_rows(values, names, errors, offset, top_k):
+    mapper = AttributionMapper(names, range(len(names)))
+    results = []
+    for r, row in enumerate(values):
+        index = offset + r
+        if index in errors:
+            results.append({"index": index, "error": errors[index]})
+        else:
+            results.append({"index": index, "shap_values": mapper.to_dict(row, top_k)})
+    return results
+
+
+explain_jobs = ExplainJobManager()
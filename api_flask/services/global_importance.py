@@ -0,0 +1,268 @@
+import glob
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from core.attribution_sketch import AttributionSketch
+from core.metrics import current_route
+from core.model_registry import registry
+
+# Agrégats de chaque worker, relus et fusionnés par /explain/global, dans un
+# sous-répertoire par version de modèle. Obligatoire en production (volume
+# de l'application) : un /tmp partagé mélangerait les déploiements
+IMPORTANCE_DIR = os.getenv("GLOBAL_IMPORTANCE_DIR") or None
+BUCKET_SECONDS = int(os.getenv("GLOBAL_IMPORTANCE_BUCKET_SECONDS", 3600))
+RETENTION_BUCKETS = int(os.getenv("GLOBAL_IMPORTANCE_RETENTION_BUCKETS", 24))
+# Lignes en attente au-delà desquelles l'explication en cours les agrège
+FLUSH_ROWS = int(os.getenv("GLOBAL_IMPORTANCE_FLUSH_ROWS", 4096))
+# Intervalle (s) d'écriture sur disque ; 0 = agrégats du seul processus interrogé
+PERSIST_INTERVAL = float(os.getenv("GLOBAL_IMPORTANCE_PERSIST_INTERVAL", 10))
+
+# Trafic synthétique (services/startup.py) exclu des agrégats
+EXCLUDED_ROUTES = ("warmup", "startup")
+
+
+class GlobalImportance:
+    """
+    Importance globale des features sur le trafic expliqué par le modèle
+    actif, par tranche de temps.
+
+    record() est appelé sur le chemin chaud avec la matrice SHAP déjà
+    regroupée : il ne fait qu'ajouter une référence à une liste. Les lots
+    en attente sont agrégés d'un bloc (AttributionSketch, vectorisé) tous
+    les FLUSH_ROWS lignes, à la lecture ou par le thread d'écriture. Un
+    lot enregistré pendant un flush peut être perdu, ce qui est sans
+    conséquence pour du monitoring.
+
+    Seule la version active du registre est agrégée : quand le modèle
+    change, les agrégats du processus repartent de zéro et les lots de
+    l'ancienne version encore en attente sont ignorés.
+
+    Chaque processus écrit ses agrégats dans
+    <directory>/<version>/<pid>-<début>.npz ; la lecture fusionne les
+    fichiers de la version demandée (active par défaut) de tous les
+    workers, y compris ceux des workers recyclés, jusqu'à expiration.
+    """
+
+    def __init__(self, directory=IMPORTANCE_DIR, bucket_seconds=BUCKET_SECONDS,
+                 retention_buckets=RETENTION_BUCKETS, flush_rows=FLUSH_ROWS, persist_interval=PERSIST_INTERVAL):
+        if directory is None and persist_interval > 0:
+            if os.getenv("FLASK_ENV") == "production":
+                raise RuntimeError(
+                    "GLOBAL_IMPORTANCE_DIR requis en production (ou GLOBAL_IMPORTANCE_PERSIST_INTERVAL=0)"
+                )
+            directory = os.path.join(tempfile.gettempdir(), "fraud-global-importance")
+        self.directory = directory
+        self.bucket_seconds = bucket_seconds
+        self.retention_buckets = retention_buckets
+        self.flush_rows = flush_rows
+        self.persist_interval = persist_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_rows = 0
+        self._version = None  # version du modèle agrégée par ce processus
+        self._names = None
+        self._sketches = {}   # début de tranche → AttributionSketch
+        self._dirty = False
+        self._pid = None
+        self._token = None
+
+    def record(self, version, names, values):
+        """Mémorise un lot de valeurs SHAP regroupées (lignes × features)."""
+        if current_route() in EXCLUDED_ROUTES:
+            return
+        if self._pid != os.getpid():
+            self._start()
+        self._pending.append((version, names, values, time.time()))
+        self._pending_rows += len(values)
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Premier appel du processus (ou worker forké) : état propre et thread d'écriture
+            self._pid = os.getpid()
+            self._token = f"{self._pid}-{int(time.time() * 1000)}"
+            self._pending, self._pending_rows = [], 0
+            self._version, self._names, self._sketches = None, None, {}
+            if self.persist_interval > 0:
+                threading.Thread(target=self._persist_loop, name="global-importance", daemon=True).start()
+
+    def flush(self):
+        """Agrège les lots en attente du modèle actif et oublie les tranches expirées."""
+        current = registry.current().version
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._pending_rows = 0
+            if current != self._version:
+                # Nouveau modèle : les agrégats de l'ancien ne sont pas repris
+                self._version, self._names, self._sketches = current, None, {}
+                self._dirty = False
+
+            # Un seul update() par tranche : les lignes isolées sont empilées
+            blocks = {}
+            for version, names, values, timestamp in pending:
+                if version != current:
+                    continue
+                if self._names is None:
+                    self._names = list(names)
+                bucket = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+                blocks.setdefault(bucket, []).append(values)
+            for bucket, values in blocks.items():
+                sketch = self._sketches.get(bucket)
+                if sketch is None:
+                    sketch = self._sketches[bucket] = AttributionSketch(len(self._names))
+                sketch.update(np.concatenate(values))
+            self._dirty = self._dirty or bool(blocks)
+
+            oldest = self._oldest_bucket()
+            self._sketches = {bucket: s for bucket, s in self._sketches.items() if bucket >= oldest}
+
+    def _oldest_bucket(self):
+        now = int(time.time() // self.bucket_seconds) * self.bucket_seconds
+        return now - (self.retention_buckets - 1) * self.bucket_seconds
+
+    def _persist_loop(self):
+        while True:
+            time.sleep(self.persist_interval)
+            try:
+                self.persist()
+            except Exception as e:
+                print(f"⚠️ Écriture des agrégats SHAP impossible : {e}")
+
+    def persist(self):
+        """Écrit les agrégats du processus (s'ils ont changé) pour les autres workers."""
+        self.flush()
+        with self._lock:
+            if not self._dirty or not self._sketches:
+                return
+            self._dirty = False
+            version, buckets = self._version, sorted(self._sketches)
+            meta = {"version": version, "names": self._names, "buckets": buckets}
+            arrays = {}
+            for i, bucket in enumerate(buckets):
+                arrays.update(self._sketches[bucket].to_arrays(f"{i}:"))
+        directory = self._version_dir(version)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self._token}.npz")
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(path + ".tmp", path)
+
+    def snapshot(self, version=None):
+        """
+        Agrégats d'une version (active par défaut), fusionnés sur tous les processus.
+
+        Returns:
+            (version, noms des features, {début de tranche: AttributionSketch},
+            nombre de processus lus)
+        """
+        version = version or registry.current().version
+        if self.persist_interval <= 0:
+            self.flush()
+            with self._lock:
+                if self._version != version or not self._sketches:
+                    return version, None, {}, 0
+                copies = {bucket: AttributionSketch(s.n_features).merge(s) for bucket, s in self._sketches.items()}
+                return version, list(self._names), copies, 1
+
+        if self._pid == os.getpid():
+            self.persist()
+        self._purge()
+        names, merged, processes = None, {}, 0
+        for path in glob.glob(os.path.join(self._version_dir(version), "*.npz")):
+            state = self._read_state(path)
+            if state is None:
+                continue
+            state_names, sketches = state
+            if names is None:
+                names = state_names
+            if state_names != names:
+                continue
+            processes += 1
+            for bucket, sketch in sketches.items():
+                if bucket in merged:
+                    merged[bucket].merge(sketch)
+                else:
+                    merged[bucket] = sketch
+        return version, names, merged, processes
+
+    def _read_state(self, path):
+        oldest = self._oldest_bucket()
+        try:
+            with np.load(path) as arrays:
+                meta = json.loads(str(arrays["meta"]))
+                sketches = {
+                    bucket: AttributionSketch.from_arrays(arrays, f"{i}:")
+                    for i, bucket in enumerate(meta["buckets"])
+                    if bucket >= oldest
+                }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Agrégats SHAP illisibles ({path}) : {e}")
+            return None
+        return (meta["names"], sketches) if sketches else None
+
+    def _purge(self):
+        """Supprime les fichiers (toutes versions) non réécrits depuis la période retenue."""
+        limit = time.time() - self.retention_buckets * self.bucket_seconds
+        for path in glob.glob(os.path.join(self.directory, "*", "*.npz")):
+            try:
+                if os.stat(path).st_mtime < limit:
+                    os.remove(path)
+            except OSError:
+                continue
+        for directory in glob.glob(os.path.join(self.directory, "*", "")):
+            if not os.listdir(directory):
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _version_dir(self, version):
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", str(version)))
+
+    def describe(self, version=None, buckets=None):
+        """
+        Importance globale d'une version (active par défaut) : totaux sur la
+        période retenue (nombre, moyenne des |SHAP|, moyenne signée,
+        quantiles approchés) et série par tranche de temps.
+        buckets : n dernières tranches.
+        """
+        version, names, by_bucket, processes = self.snapshot(version)
+        starts = sorted(by_bucket)[-buckets:] if buckets else sorted(by_bucket)
+        total = AttributionSketch(len(names or []))
+        series = []
+        for start in starts:
+            sketch = by_bucket[start]
+            total.merge(sketch)
+            count = max(sketch.count, 1)
+            series.append({
+                "start": datetime.fromtimestamp(start).isoformat(),
+                "count": sketch.count,
+                "mean_abs": dict(zip(names, (sketch.abs_sum / count).tolist())),
+                "mean": dict(zip(names, (sketch.sum / count).tolist())),
+            })
+        features = total.summary(names or [])
+        return {
+            "model_version": version,
+            "active": version == registry.current().version,
+            "bucket_seconds": self.bucket_seconds,
+            "retention_buckets": self.retention_buckets,
+            "processes": processes,
+            "count": total.count,
+            "features": features,
+            # Les clés JSON sont triées à la sérialisation : le classement est rendu à part
+            "ranking": sorted(features, key=lambda feature: -features[feature]["mean_abs"]),
+            "buckets": series,
+        }
+
+
+global_importance = GlobalImportance()
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Cache LRU borné avec expiration (TTL) des résultats de /predict.
+
+    Les clés sont soit une clé d'idempotence fournie par l'appelant, soit
+    l'empreinte du vecteur de features validé ; les deux incluent la version
+    du modèle et de la configuration métier, et le cache est vidé à chaque
+    changement de version.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide les entrées ; les compteurs sont conservés (changement de version)."""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        """Remet les compteurs à zéro (trafic de préchauffage, à ne pas exposer)."""
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "miss_rate": self.misses / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def feature_key(schema, X, *versions):
+    """Empreinte canonique d'une ligne encodée (1000 et 1000.0 donnent la même clé)."""
+    parts = [
+        repr(float(value)) if kind == "numeric" else str(value)
+        for value, kind in zip(X[0], schema.kinds)
+    ]
+    parts.extend(str(v) for v in versions)
+    return "f:" + hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def idempotency_key(key, *versions):
+    return "i:" + "\x1f".join([key, *map(str, versions)])
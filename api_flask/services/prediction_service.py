@@ -1,10 +1,46 @@
+import os
+import numpy as np
 import pandas as pd
-from core.pipeline_utils import load_pipeline
+from core.model_registry import registry
+from services.prediction_cache import PredictionCache
 
-pipeline = load_pipeline()
+# Le modèle est chargé par services/startup.py (ou à la première requête)
 
-def predict_instance(data: dict):
+# Regroupement optionnel des requêtes concurrentes en micro-lots
+coalescer = None
+if os.getenv("PREDICT_COALESCE", "0") == "1":
+    from services.request_coalescer import RequestCoalescer
+    coalescer = RequestCoalescer(
+        lambda X: registry.current().engine.predict_proba(X),
+        max_batch=int(os.getenv("PREDICT_COALESCE_MAX_BATCH", 64)),
+        max_wait_ms=float(os.getenv("PREDICT_COALESCE_WINDOW_MS", 2.0)),
+    )
+
+# Cache des résultats pour les soumissions répétées (0 = désactivé)
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", 10000)),
+    ttl_seconds=float(os.getenv("CACHE_TTL_SECONDS", 3600)),
+)
+registry.add_listener(lambda bundle: prediction_cache.clear())
+
+def predict_instance(data: dict, X=None):
+    """
+    Probabilité de fraude d'une transaction.
+
+    X peut être fourni s'il a déjà été obtenu par schema.encode(data),
+    pour éviter une seconde validation.
+    """
     try:
+        model = registry.current()
+        if model.schema is not None:
+            # Chemin rapide : validation + encodage direct en ligne numpy
+            if X is None:
+                X = model.schema.encode(data)
+            if coalescer is not None:
+                return coalescer.score(X)
+            return float(model.engine.predict_proba(X)[0])
+
+        pipeline = model.pipeline
         X = pd.DataFrame([data])
         # Vérifier si c'est un pipeline sklearn ou un modèle simple
         if hasattr(pipeline, 'steps'):
@@ -19,5 +55,57 @@ def predict_instance(data: dict):
     except Exception as e:
         print(f"❌ Erreur lors de la prédiction : {e}")
         raise
-        raise
 
+
+def predict_batch(data_list: list):
+    """
+    Score une liste de transactions avec un seul appel à predict_proba.
+
+    Les lignes invalides n'interrompent pas le lot : leur erreur est
+    renvoyée à leur position et les autres lignes sont scorées normalement.
+
+    Args:
+        data_list: Liste de dictionnaires de transactions
+
+    Returns:
+        (probabilities, errors) : tableau numpy de probabilités (NaN pour
+        les lignes en erreur) et dictionnaire {index: message d'erreur}
+    """
+    model = registry.current()
+    probabilities = np.full(len(data_list), np.nan)
+
+    if model.schema is not None:
+        X, valid_idx, errors = model.schema.encode_batch(data_list)
+        if valid_idx:
+            probabilities[valid_idx] = model.engine.predict_proba(X)
+        return probabilities, errors
+
+    pipeline = model.pipeline
+    if not hasattr(pipeline, 'predict_proba'):
+        raise ValueError("Le modèle n'a pas la méthode predict_proba")
+
+    errors = {}
+    valid_idx = []
+    for i, data in enumerate(data_list):
+        if isinstance(data, dict) and data:
+            valid_idx.append(i)
+        else:
+            errors[i] = "Transaction invalide : un objet JSON non vide est attendu"
+
+    if not valid_idx:
+        return probabilities, errors
+
+    X = pd.DataFrame([data_list[i] for i in valid_idx])
+    try:
+        probabilities[valid_idx] = pipeline.predict_proba(X)[:, 1]
+    except Exception as e:
+        # Une ligne fautive fait échouer tout le lot : on isole les erreurs
+        # en rescorant ligne par ligne (chemin lent, uniquement sur erreur)
+        print(f"⚠️ Échec du scoring vectorisé ({e}), repli ligne par ligne")
+        for i in valid_idx:
+            try:
+                probabilities[i] = pipeline.predict_proba(pd.DataFrame([data_list[i]]))[0, 1]
+            except Exception as row_error:
+                errors[i] = str(row_error)
+
+    return probabilities, errors
@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from core.metrics import Histogram, set_route
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class RequestCoalescer:
+    """
+    Regroupe les requêtes de scoring concurrentes en micro-lots.
+
+    Chaque appelant dépose sa ligne encodée et attend son Future ; un thread
+    de dispatch unique vide la file, attend au plus `max_wait_ms` (ou
+    `max_batch` lignes) et score le lot en un seul appel au modèle. La fenêtre
+    s'adapte au débit observé : à faible charge, une requête isolée est
+    scorée immédiatement sans attente.
+    """
+
+    def __init__(self, score_fn, max_batch=64, max_wait_ms=2.0):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue_wait = Histogram()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue = queue.SimpleQueue()
+        # Intervalle moyen (EWMA) entre deux arrivées, en secondes
+        self._arrival_gap = float("inf")
+        self._last_arrival = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def score(self, X):
+        """Score une ligne encodée (1, n_features) et retourne sa probabilité."""
+        return self.submit(X).result()
+
+    def submit(self, X):
+        self._ensure_started()
+        future = Future()
+        # Copie : la ligne du schéma est réutilisée par le thread appelant
+        self._queue.put((np.array(X, copy=True), future, time.perf_counter()))
+        return future
+
+    def _ensure_started(self):
+        # Le thread de dispatch ne survit pas à un fork : on le relance
+        # dans chaque processus
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, name="request-coalescer", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _window(self, pending):
+        """Temps d'attente supplémentaire pour compléter le lot courant."""
+        expected = self.max_wait / self._arrival_gap if self._arrival_gap > 0 else float("inf")
+        if expected < 1:
+            # Faible charge : aucune autre arrivée attendue dans la fenêtre
+            return 0.0
+        return min(self.max_wait, self._arrival_gap * (self.max_batch - pending))
+
+    def _record_arrival(self, enqueued_at):
+        if self._last_arrival is not None:
+            gap = max(enqueued_at - self._last_arrival, 1e-6)
+            if self._arrival_gap == float("inf"):
+                self._arrival_gap = gap
+            else:
+                self._arrival_gap = 0.8 * self._arrival_gap + 0.2 * gap
+        self._last_arrival = enqueued_at
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        self._record_arrival(batch[0][2])
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            self._record_arrival(item[2])
+
+        deadline = time.perf_counter() + self._window(len(batch))
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            self._record_arrival(item[2])
+        return batch
+
+    def _run(self):
+        # Étapes preprocessing / inference des micro-lots (core.metrics)
+        set_route("coalescer")
+        while True:
+            batch = self._collect()
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.queue_wait.observe(dispatched_at - enqueued_at)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                probabilities = self.score_fn(np.concatenate([X for X, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), p in zip(batch, probabilities):
+                future.set_result(float(p))
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "arrival_gap_ms": None if self._arrival_gap == float("inf") else self._arrival_gap * 1000.0,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
@@ -1,12 +1,29 @@
+import numpy as np
 import pandas as pd
-from core.pipeline_utils import load_pipeline
-from core.shap_loader import shap_loader
+from core.model_registry import registry
+from core.metrics import stage
+from services.global_importance import global_importance
 
-pipeline = load_pipeline()
-explainer = shap_loader()
+def explain_instance(data: dict, top_k=None):
+    """
+    Valeurs SHAP d'une transaction, regroupées par feature source.
 
-def explain_instance(data: dict):
+    Avec top_k, seules les k features de plus forte contribution absolue
+    sont retournées, dans l'ordre décroissant.
+    """
     try:
+        model = registry.current()
+        pipeline, explainer, schema = model.pipeline, model.explainer, model.schema
+        if explainer is None:
+            raise RuntimeError("Explainer SHAP indisponible")
+
+        if schema is not None and schema.has_preprocessing:
+            # Chemin rapide : validation + encodage sans DataFrame
+            X_trans = schema.transform(schema.encode(data))
+            with stage("shap"):
+                shap_values = explainer.shap_values(X_trans)
+            return _to_feature_dicts(model, shap_values, schema.names, top_k)[0]
+
         X = pd.DataFrame([data])
         
         # Récupérer les features d'entraînement
@@ -21,24 +38,172 @@ def explain_instance(data: dict):
             # C'est un modèle simple, pas de preprocessing
             X_trans = X
         
-        shap_values = explainer.shap_values(X_trans)
-        
-        # Gérer différents formats de retour SHAP
-        if isinstance(shap_values, list):
-            shap_array = shap_values[0][0] if len(shap_values) > 0 else []
-        else:
-            shap_array = shap_values[0]
-        
-        # Créer un dictionnaire avec features et SHAP values
-        result_dict = {
-            feature: float(shap_array[i])
-            for i, feature in enumerate(training_features)
-        }
-        
-        return result_dict
+        with stage("shap"):
+            shap_values = explainer.shap_values(X_trans)
+        return _to_feature_dicts(model, shap_values, training_features, top_k)[0]
     
     except Exception as e:
         print(f"❌ Erreur lors de l'explication : {e}")
         raise
 
 
+def explain_batch(data_list: list, top_k=None):
+    """
+    Valeurs SHAP d'un lot de transactions en un seul appel à l'explainer.
+
+    Le lot est validé et encodé ligne par ligne, préprocessé en une seule
+    matrice, puis expliqué d'un bloc : TreeExplainer amortit son coût fixe
+    sur toutes les lignes. Les lignes invalides n'interrompent pas le lot.
+    top_k : comme explain_instance.
+
+    Returns:
+        (explanations, errors) : liste alignée sur data_list (None pour les
+        lignes en erreur) et dictionnaire {index: message d'erreur}
+    """
+    model = registry.current()
+    explanations = [None] * len(data_list)
+    shap_values, valid_idx, errors, names = _explain_rows(model, data_list)
+    if valid_idx:
+        for i, explanation in zip(valid_idx, _to_feature_dicts(model, shap_values, names, top_k)):
+            explanations[i] = explanation
+    return explanations, errors
+
+
+def explain_matrix(data_list: list):
+    """
+    Valeurs SHAP d'un lot en matrice regroupée par feature source, pour les
+    exports volumineux (voir services/explain_jobs) : pas de dictionnaire
+    par ligne.
+
+    Returns:
+        (values, names, errors) : matrice float32 (len(data_list) × features)
+        avec NaN pour les lignes en erreur, noms des colonnes et
+        dictionnaire {index: message d'erreur}
+    """
+    model = registry.current()
+    shap_values, valid_idx, errors, names = _explain_rows(model, data_list)
+    mapper = model.attribution
+    if mapper is not None:
+        names = mapper.names
+    values = np.full((len(data_list), len(names)), np.nan, dtype=np.float32)
+    if valid_idx:
+        matrix = _to_matrix(shap_values)
+        if mapper is not None and matrix.shape[-1] == mapper.n_outputs:
+            matrix = mapper.group(matrix)
+        values[valid_idx] = matrix.reshape(len(valid_idx), -1)
+    return values, names, errors
+
+
+def _explain_rows(model, data_list):
+    """
+    Valide, préprocesse et explique un lot d'un bloc.
+
+    Returns:
+        (shap_values, valid_idx, errors, names) ; shap_values vaut None si
+        aucune ligne n'est valide
+    """
+    pipeline, explainer, schema = model.pipeline, model.explainer, model.schema
+    if explainer is None:
+        raise RuntimeError("Explainer SHAP indisponible")
+
+    if schema is not None and schema.has_preprocessing:
+        X, valid_idx, errors = schema.encode_batch(data_list)
+        names = schema.names
+        if not valid_idx:
+            return None, valid_idx, errors, names
+        X_trans = model.engine.transform(X)
+    else:
+        errors = {}
+        valid_idx = []
+        for i, data in enumerate(data_list):
+            if isinstance(data, dict) and data:
+                valid_idx.append(i)
+            else:
+                errors[i] = "Transaction invalide : un objet JSON non vide est attendu"
+        if not valid_idx:
+            return None, valid_idx, errors, []
+        X_trans = pd.DataFrame([data_list[i] for i in valid_idx])
+        names = list(pipeline.feature_names_in_) if hasattr(pipeline, 'feature_names_in_') else list(X_trans.columns)
+        if hasattr(pipeline, 'steps'):
+            X_trans = pipeline[:-1].transform(X_trans)
+
+    with stage("shap"):
+        shap_values = explainer.shap_values(X_trans)
+    return shap_values, valid_idx, errors, names
+
+
+def predict_and_explain(data: dict, X=None, top_k=None):
+    """
+    Probabilité et valeurs SHAP d'une transaction en un seul préprocessing.
+
+    La même matrice transformée alimente le classifieur et l'explainer.
+
+    Returns:
+        (probability, shap_values)
+    """
+    model = registry.current()
+    schema = model.schema
+    if schema is None or not schema.has_preprocessing:
+        # Pas de préprocesseur séparable : deux passes comme /predict puis /explain
+        from services.prediction_service import predict_instance
+        return predict_instance(data, X=X), explain_instance(data, top_k=top_k)
+
+    if model.explainer is None:
+        raise RuntimeError("Explainer SHAP indisponible")
+    if X is None:
+        X = schema.encode(data)
+    X_trans = model.engine.transform(X)
+    probability = float(model.engine.predict_proba_transformed(X_trans)[0])
+    with stage("shap"):
+        shap_values = model.explainer.shap_values(X_trans)
+    return probability, _to_feature_dicts(model, shap_values, schema.names, top_k)[0]
+
+
+def parse_top_k(value):
+    """Paramètre top_k d'une requête : None (toutes les features) ou entier >= 1."""
+    if value is None or value == "":
+        return None
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"top_k doit être un entier (reçu {value!r})")
+    if top_k < 1:
+        raise ValueError(f"top_k doit être >= 1 (reçu {top_k})")
+    return top_k
+
+
+def _to_feature_dicts(model, shap_values, names, top_k=None):
+    """
+    Dictionnaires {feature: valeur} d'un lot, une entrée par ligne.
+
+    Les colonnes transformées sont regroupées par feature source via le
+    mapper du modèle (one-hot de type → type). Sans mapper compatible, les
+    colonnes sont appariées aux noms telles quelles. Le lot alimente
+    l'importance globale (/explain/global).
+    """
+    matrix = _to_matrix(shap_values)
+    mapper = model.attribution
+    if mapper is not None and matrix.shape[-1] == mapper.n_outputs:
+        grouped = mapper.group(matrix)
+        global_importance.record(model.version, mapper.names, grouped)
+        return [mapper.to_dict(row, top_k) for row in grouped]
+
+    matrix = matrix.reshape(-1, matrix.shape[-1])
+    if len(names) == matrix.shape[1]:
+        global_importance.record(model.version, names, matrix)
+    explanations = []
+    for row in matrix.tolist():
+        explanation = dict(zip(names, row))
+        if top_k is not None:
+            ranked = sorted(explanation, key=lambda name: -abs(explanation[name]))[:top_k]
+            explanation = {name: explanation[name] for name in ranked}
+        explanations.append(explanation)
+    return explanations
+
+
+def _to_matrix(shap_values):
+    """Valeurs SHAP d'un lot en matrice (lignes × colonnes transformées)."""
+    # Explainers multi-sorties (liste par classe) : première sortie, comme avant
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[0])
+    return np.asarray(shap_values)
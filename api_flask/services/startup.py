@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from core.model_registry import registry
+from core.business_config import business_config
+from core.metrics import set_route
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+# Clé d'environnement WSGI des requêtes de préchauffage : posée par le
+# client de test, elle ne peut pas venir d'un en-tête HTTP
+WARMUP_ENVIRON = "fraud.warmup"
+
+
+class Startup:
+    """
+    Chargement des artefacts puis préchauffage, suivis pour /health/ready.
+
+    Le préchauffage envoie des transactions synthétiques (issues du schéma)
+    à travers l'application elle-même : premier appel au Booster, pool
+    d'admission, sérialisation JSON et construction de l'explainer sont
+    payés avant que le load balancer n'envoie du trafic.
+    """
+
+    def __init__(self, warmup_predictions=200, warmup_explanations=20, warmup_batch_size=256):
+        self.warmup_predictions = warmup_predictions
+        self.warmup_explanations = warmup_explanations
+        self.warmup_batch_size = warmup_batch_size
+        self.state = PENDING
+        self.error = None
+        self.phases = {}
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def start_background(self, app):
+        """Lance run(app) dans un thread ; l'application répond déjà à /health/live."""
+        self._thread = threading.Thread(target=self.run, args=(app,), name="startup", daemon=True)
+        self._thread.start()
+
+    def run(self, app, load=True, warm=True):
+        """Charge les artefacts (load) puis préchauffe (warm) ; enregistre la durée de chaque phase."""
+        # Étapes chronométrées pendant le chargement (sondes de parité)
+        set_route("startup")
+        try:
+            if load:
+                self.state = LOADING
+                with self._phase("config_load"):
+                    business_config.load()
+                    business_config.start_watcher()
+                with self._phase("model_load"):
+                    registry.load()
+                    registry.start_watcher()
+            if warm:
+                self.state = WARMING
+                self._warm_up(app)
+                # Processus qui sert le trafic : candidat à l'exécution des jobs
+                # d'explication (jamais le maître pré-forké, qui ne préchauffe pas)
+                from services.explain_jobs import explain_jobs
+                explain_jobs.start()
+                self.state = READY
+                total = sum(self.phases.values())
+                print(f"✅ Service prêt ({', '.join(f'{k}={v:.2f}s' for k, v in self.phases.items())}, total {total:.2f}s)")
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            print(f"❌ Échec du démarrage : {e}")
+            import traceback
+            traceback.print_exc()
+
+    def _warm_up(self, app):
+        schema = registry.current().schema
+        if schema is None:
+            return
+        rows = [dict(zip(schema.names, row)) for row in schema.sample(max(self.warmup_predictions, 1)).tolist()]
+        client = app.test_client()
+        # Compté sous le label blueprint="warmup" par /metrics
+        client.environ_base[WARMUP_ENVIRON] = True
+
+        with self._phase("warmup_predict"):
+            for row in rows[:self.warmup_predictions]:
+                _check(client.post("/predict", json=row))
+        with self._phase("warmup_batch"):
+            if self.warmup_batch_size:
+                _check(client.post("/predict/batch", json=(rows * self.warmup_batch_size)[:self.warmup_batch_size]))
+        if registry.current().explainer is not None:
+            with self._phase("warmup_explain"):
+                for row in rows[:self.warmup_explanations]:
+                    _check(client.post("/predict", json=row, query_string={"explain": "true"}))
+
+        # Les transactions synthétiques ne doivent ni occuper le cache ni
+        # apparaître dans ses statistiques (/predict/cache, /metrics)
+        from services.prediction_service import prediction_cache
+        prediction_cache.clear()
+        prediction_cache.reset_stats()
+
+    @contextmanager
+    def _phase(self, name):
+        start = time.perf_counter()
+        yield
+        self.phases[name] = time.perf_counter() - start
+
+    def describe(self):
+        return {
+            "state": self.state,
+            "error": self.error,
+            "phases_seconds": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+        }
+
+
+def _check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"Requête de préchauffage en échec ({response.status_code}) : {response.get_data(as_text=True)[:200]}")
+
+
+startup = Startup(
+    warmup_predictions=int(os.getenv("WARMUP_PREDICTIONS", 200)),
+    warmup_explanations=int(os.getenv("WARMUP_EXPLANATIONS", 20)),
+    warmup_batch_size=int(os.getenv("WARMUP_BATCH_SIZE", 256)),
+)
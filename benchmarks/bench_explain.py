@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmark des explications : explainer SHAP sérialisé (shap.joblib) contre
+contributions natives XGBoost (Booster.predict(pred_contribs=True)).
+
+Mesure :
+  - la latence d'explication d'une matrice préprocessée, par taille de lot,
+    avec l'écart maximal entre les deux explainers
+  - dans des processus Python neufs, le temps jusqu'à la première
+    explication (imports et chargement compris) avec EXPLAINER=shap et
+    EXPLAINER=native, et si le paquet shap a été importé
+
+Usage:
+    python benchmarks/bench_explain.py [--repeat 50] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_flask")
+sys.path.insert(0, API_DIR)
+
+from core.model_registry import ModelRegistry
+from core.shap_loader import shap_loader
+
+BATCH_SIZES = (1, 64, 4096)
+
+# Exécuté dans chaque processus mesuré
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from core.model_registry import ModelRegistry
+bundle = ModelRegistry(poll_interval=0, explainer=sys.argv[2]).load()
+bundle.explainer.shap_values(bundle.engine.transform(bundle.schema.sample(1)))
+print("RESULT " + json.dumps({
+    "first_explanation_seconds": time.perf_counter() - start,
+    "shap_imported": "shap" in sys.modules,
+}), flush=True)
+"""
+
+
+def timed(fn, repeat):
+    """Médiane du temps d'exécution de fn() en secondes."""
+    fn()  # échauffement
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def cold_start(mode, runs):
+    timings, imported = [], False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, API_DIR, mode], capture_output=True, text=True).stdout
+        # Les journaux de chargement passent aussi par stdout : seule la ligne RESULT compte
+        result = json.loads(next(line for line in out.splitlines() if line.startswith("RESULT "))[7:])
+        timings.append(result["first_explanation_seconds"])
+        imported = result["shap_imported"]
+    return statistics.median(timings), imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shap.joblib vs contributions XGBoost natives")
+    parser.add_argument("--repeat", type=int, default=50, help="Répétitions par mesure")
+    parser.add_argument("--runs", type=int, default=3, help="Processus neufs par mode pour le démarrage")
+    args = parser.parse_args()
+
+    bundle = ModelRegistry(poll_interval=0, explainer="native").load()
+    if bundle.engine.booster is None:
+        print("❌ Modèle sans Booster XGBoost natif, benchmark impossible")
+        sys.exit(1)
+    reference = shap_loader()
+    native = bundle.explainer
+
+    print(f"\n{'batch':>6} | {'shap (µs)':>12} | {'natif (µs)':>12} | {'gain':>6} | {'écart max':>10}")
+    print("-" * 60)
+    for size in BATCH_SIZES:
+        X_trans = bundle.engine.transform(bundle.schema.sample(size))
+        t_shap = timed(lambda: reference.shap_values(X_trans), args.repeat)
+        t_native = timed(lambda: native.shap_values(X_trans), args.repeat)
+        diff = np.abs(native.shap_values(X_trans) - np.asarray(reference.shap_values(X_trans))).max()
+        print(f"{size:>6} | {t_shap * 1e6:>12.1f} | {t_native * 1e6:>12.1f} | {t_shap / t_native:>5.1f}x | {diff:>10.2g}")
+
+    print(f"\n{'explainer':>10} | {'1re explication (s)':>20} | {'shap importé':>12}")
+    print("-" * 50)
+    for mode in ("shap", "native"):
+        seconds, imported = cold_start(mode, args.runs)
+        print(f"{mode:>10} | {seconds:>20.2f} | {'oui' if imported else 'non':>12}")
+
+
+if __name__ == "__main__":
+    main()
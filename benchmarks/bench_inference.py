@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark du moteur d'inférence : chemin sklearn (Pipeline.predict_proba
+sur DataFrame) contre chemin XGBoost natif (Booster.inplace_predict).
+
+Usage:
+    python benchmarks/bench_inference.py [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_flask")
+sys.path.insert(0, API_DIR)
+
+from core.pipeline_utils import load_pipeline
+from core.feature_schema import FeatureSchema
+from core.inference_engine import InferenceEngine, NATIVE_PATH
+
+BATCH_SIZES = (1, 64, 4096)
+
+
+def timed(fn, repeat):
+    """Médiane du temps d'exécution de fn() en secondes."""
+    fn()  # échauffement
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sklearn vs XGBoost natif")
+    parser.add_argument("--repeat", type=int, default=50, help="Répétitions par mesure")
+    args = parser.parse_args()
+
+    pipeline = load_pipeline()
+    schema = FeatureSchema.from_pipeline(pipeline)
+    if schema is None:
+        print("❌ Le modèle n'expose pas feature_names_in_, benchmark impossible")
+        sys.exit(1)
+    engine = InferenceEngine(pipeline, schema)
+    if engine.path != NATIVE_PATH:
+        print(f"⚠️ Chemin natif inactif (chemin courant : {engine.path})")
+
+    print(f"\n{'batch':>6} | {'sklearn (µs)':>14} | {'natif (µs)':>12} | {'gain':>6} | {'natif (lignes/s)':>16}")
+    print("-" * 68)
+    for size in BATCH_SIZES:
+        X = schema.sample(size)
+        frame = schema.to_frame(X)
+        t_sklearn = timed(lambda: pipeline.predict_proba(frame), args.repeat)
+        t_engine = timed(lambda: engine.predict_proba(X), args.repeat)
+        print(
+            f"{size:>6} | {t_sklearn * 1e6:>14.1f} | {t_engine * 1e6:>12.1f} | "
+            f"{t_sklearn / t_engine:>5.1f}x | {size / t_engine:>16,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
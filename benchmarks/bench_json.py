@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Sérialisation des réponses volumineuses : provider Flask par défaut (json
+standard) contre NumpyJSONProvider (orjson si installé), et octets
+transférés avec et sans gzip.
+
+Charges mesurées :
+  - la baseline de drift (GET /drift/baseline)
+  - un rapport /drift/check sur une transaction PaySim brute (distributions
+    nameOrig / nameDest de la baseline incluses dans le rapport)
+
+Usage:
+    python benchmarks/bench_json.py [--repeat 20]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_flask")
+sys.path.insert(0, API_DIR)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from core.http_compression import GZIP_LEVEL
+from core.json_provider import NumpyJSONProvider, orjson
+from services.drift_detection import DriftDetector
+
+
+def timed(fn, repeat):
+    """Médiane du temps d'exécution de fn() en secondes."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def drift_report(detector):
+    baseline = detector.baseline
+    row = {}
+    for column, info in baseline.items():
+        if not isinstance(info, dict):
+            continue
+        if info.get("type") == "numeric":
+            row[column] = info["q50"]
+        elif info.get("type") == "categorical":
+            row[column] = next(iter(info["distribution"]))
+    return detector.check_drift(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sérialisation JSON et compression des réponses")
+    parser.add_argument("--repeat", type=int, default=20, help="Répétitions par mesure")
+    args = parser.parse_args()
+
+    detector = DriftDetector()
+    if detector.baseline is None:
+        print("❌ Aucune baseline de drift, benchmark impossible")
+        sys.exit(1)
+
+    app = Flask(__name__)
+    providers = {"json (défaut Flask)": DefaultJSONProvider(app), "NumpyJSONProvider": NumpyJSONProvider(app)}
+    payloads = {"baseline": detector.baseline, "rapport drift": drift_report(detector)}
+    print(f"Encodeur rapide : {'orjson ' + orjson.__version__ if orjson else 'absent (json standard)'}")
+
+    print(f"\n{'charge':>14} | {'provider':>20} | {'ms':>8} | {'octets':>9} | {'gzip':>8} | {'gzip ms':>8}")
+    print("-" * 82)
+    for name, payload in payloads.items():
+        for label, provider in providers.items():
+            body = provider.dumps(payload).encode()
+            t_dumps = timed(lambda: provider.dumps(payload), args.repeat)
+            t_gzip = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), args.repeat)
+            compressed = len(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+            print(f"{name:>14} | {label:>20} | {t_dumps * 1000:>8.2f} | {len(body):>9} | {compressed:>8} | "
+                  f"{t_gzip * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
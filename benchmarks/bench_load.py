@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+"""
+Générateur de charge et contrôle de non-régression des latences.
+
+Envoie des transactions à /predict, /explain et /drift/check, en HTTP
+(--url) ou en appelant directement les services dans ce processus
+(--in-process, sans Flask ni réseau), et mesure débit et latences
+(p50, p95, p99).
+
+Deux modes de charge :
+  - concurrence fixe (--concurrency N) : N clients en boucle fermée ;
+  - débit d'arrivée fixe (--rate R) : les requêtes partent à des instants
+    planifiés (R par seconde) et la latence est comptée depuis l'instant
+    prévu, attente comprise (pas d'omission coordonnée quand le serveur
+    ralentit). --concurrency borne alors le nombre de requêtes en vol.
+
+Avec --background, une autre cible est chargée en parallèle pendant chaque
+mesure (ex. /explain saturé pendant que /predict est mesuré) : on vérifie
+que l'admission refuse l'excédent (503, colonne dédiée) sans que la
+latence de la cible mesurée ne dérive.
+
+Les transactions viennent d'un fichier JSONL (--input, une transaction
+par ligne) ou d'un générateur synthétique proche de PaySim.
+
+Les résultats peuvent être enregistrés comme baseline JSON ; un run
+comparé à une baseline échoue (code de sortie 1) si une latence augmente
+ou si le débit baisse de plus de --tolerance.
+
+Usage:
+    python benchmarks/bench_load.py --in-process --target predict explain drift
+    python benchmarks/bench_load.py --url http://localhost:5000 --concurrency 16 --duration 30
+    python benchmarks/bench_load.py --url http://localhost:5000 --rate 500 --input transactions.jsonl
+    python benchmarks/bench_load.py --url http://localhost:5000 --concurrency 2 --background explain
+    python benchmarks/bench_load.py --in-process --save-baseline benchmarks/baselines/local.json
+    python benchmarks/bench_load.py --in-process --baseline benchmarks/baselines/local.json --tolerance 0.15
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_flask")
+
+TARGETS = {
+    "predict": "/predict",
+    "explain": "/explain",
+    "drift": "/drift/check",
+}
+LABEL_COLUMN = "isFraud"
+
+# Métriques comparées à la baseline : plus haut = pire, sauf le débit
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+# ─── Transactions ─────────────────────────────────────────────────────
+
+def paysim_transactions(n, seed=0):
+    """
+    Transactions synthétiques à la PaySim : répartition des types,
+    montants log-normaux, soldes cohérents et features dérivées calculées
+    comme dans l'interface Streamlit (hour, erreur_*, videur_*).
+    """
+    rng = np.random.default_rng(seed)
+    types = rng.choice(
+        ["CASH_OUT", "PAYMENT", "CASH_IN", "TRANSFER", "DEBIT"], size=n, p=[0.35, 0.34, 0.22, 0.08, 0.01]
+    )
+    amounts = np.round(rng.lognormal(10, 1.8, n), 2)
+    old_orig = np.where(rng.random(n) < 0.3, 0.0, np.round(rng.lognormal(10.5, 2.0, n), 2))
+    old_dest = np.where(rng.random(n) < 0.4, 0.0, np.round(rng.lognormal(11, 2.0, n), 2))
+    # Fraude typique : compte origine vidé par un TRANSFER / CASH_OUT
+    emptied = np.isin(types, ["TRANSFER", "CASH_OUT"]) & (rng.random(n) < 0.02)
+    amounts = np.where(emptied & (old_orig > 0), old_orig, amounts)
+    steps = rng.integers(1, 744, n)
+
+    transactions = []
+    for i in range(n):
+        kind, amount, old_o, old_d = str(types[i]), float(amounts[i]), float(old_orig[i]), float(old_dest[i])
+        new_o = old_o + amount if kind == "CASH_IN" else max(old_o - amount, 0.0)
+        if kind == "PAYMENT":
+            old_d = new_d = 0.0
+        else:
+            new_d = old_d + amount
+        step = int(steps[i])
+        transactions.append({
+            "step": step,
+            "type": kind,
+            "amount": amount,
+            "oldbalanceOrg": old_o,
+            "newbalanceOrig": new_o,
+            "oldbalanceDest": old_d,
+            "newbalanceDest": new_d,
+            "hour": step % 24,
+            "erreur_orig": abs(new_o - (old_o - amount)),
+            "erreur_dst": abs(new_d - (old_d + amount)),
+            "videur_orig": int(old_o > 0 and new_o == 0),
+            "videur_dest": int(amount > 0 and new_d == 0),
+        })
+    return transactions
+
+
+def load_transactions(path):
+    """Transactions d'un fichier JSONL ; la colonne label éventuelle est retirée."""
+    transactions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                data = json.loads(line)
+                data.pop(LABEL_COLUMN, None)
+                transactions.append(data)
+    if not transactions:
+        raise ValueError(f"Aucune transaction dans {path}")
+    return transactions
+
+
+# ─── Cibles ───────────────────────────────────────────────────────────
+
+def http_targets(base_url, timeout):
+    import requests
+
+    local = threading.local()
+
+    def caller(path):
+        url = base_url.rstrip("/") + path
+
+        def call(data):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            response = session.post(url, json=data, timeout=timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+        return call
+
+    return {name: caller(path) for name, path in TARGETS.items()}
+
+
+def in_process_targets():
+    """Les services derrière chaque route, appelés sans Flask."""
+    sys.path.insert(0, API_DIR)
+    from core.business_config import business_config
+    from core.model_registry import registry
+    from services.cost_service import compute_cost
+    from services.drift_detection import DriftDetector
+    from services.prediction_service import predict_instance
+    from services.shap_service import explain_instance
+
+    registry.load()
+    business_config.load()
+    detector = DriftDetector()
+
+    def predict(data):
+        p = predict_instance(data)
+        amount = data.get("amount", 0)
+        decision, costs = business_config.current().decision_table.decide(p, data.get("type"), amount)
+        compute_cost(decision, costs, probability=p, amount=amount)
+
+    return {"predict": predict, "explain": explain_instance, "drift": detector.check_drift}
+
+
+# ─── Génération de charge ─────────────────────────────────────────────
+
+_runs = itertools.count()
+
+def run_load(call, transactions, duration, concurrency, rate=None, bust_cache=True):
+    """
+    Exécute la charge et retourne les latences (s) et les erreurs.
+
+    Avec bust_cache, le montant est décalé d'un epsilon à chaque nouveau
+    passage sur les transactions (et à chaque run : l'échauffement ne
+    remplit pas le cache du run mesuré) ; le cache de prédictions ne sert
+    donc pas les répétitions.
+    """
+    counter = itertools.count()
+    n = len(transactions)
+    salt = next(_runs) * 1e-3
+    start = time.perf_counter()
+    deadline = start + duration
+    latencies, errors = [], []
+
+    def worker():
+        own_latencies, own_errors = [], []
+        while True:
+            i = next(counter)
+            if rate:
+                scheduled = start + i / rate
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                began = scheduled
+            else:
+                began = time.perf_counter()
+                if began >= deadline:
+                    break
+            data = transactions[i % n]
+            if bust_cache and "amount" in data and (i >= n or salt):
+                data = dict(data, amount=data["amount"] + salt + (i // n) * 1e-6)
+            try:
+                call(data)
+                own_latencies.append(time.perf_counter() - began)
+            except Exception as e:
+                own_errors.append(str(e))
+        latencies.extend(own_latencies)
+        errors.extend(own_errors)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, elapsed):
+    result = {
+        "requests": int(len(latencies) + len(errors)),
+        "errors": len(errors),
+        # Refus d'admission (inclus dans errors)
+        "rejected": sum(1 for error in errors if error == "HTTP 503"),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        result.update({
+            "mean_ms": round(float(latencies.mean() * 1000), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(latencies.max() * 1000), 3),
+        })
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+# ─── Baselines ────────────────────────────────────────────────────────
+
+def compare(results, baseline, tolerance):
+    """Régressions de chaque scénario présent dans la baseline (liste de messages)."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get("scenarios", {}).get(key)
+        if reference is None:
+            continue
+        for metric in LATENCY_KEYS:
+            if metric in reference and metric in current and current[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric} : {current[metric]:.3f} > {reference[metric]:.3f} (+{tolerance:.0%})")
+        if current["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{key} throughput_rps : {current['throughput_rps']:.1f} < {reference['throughput_rps']:.1f} (-{tolerance:.0%})"
+            )
+        if current["errors"] > reference.get("errors", 0):
+            regressions.append(f"{key} errors : {current['errors']} > {reference.get('errors', 0)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge, latences et non-régression de l'API")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--url", help="URL de l'API (ex. http://localhost:5000)")
+    transport.add_argument("--in-process", action="store_true", help="Appeler les services directement, sans HTTP")
+    parser.add_argument("--target", nargs="+", choices=list(TARGETS), default=["predict"])
+    parser.add_argument("--concurrency", type=int,
+                        help="Clients simultanés, max en vol avec --rate (défaut : 8 en HTTP, 1 en processus)")
+    parser.add_argument("--rate", type=float, help="Débit d'arrivée fixe (requêtes/s)")
+    parser.add_argument("--background", choices=list(TARGETS),
+                        help="Cible chargée en parallèle pendant chaque mesure (non comparée à la baseline)")
+    parser.add_argument("--background-concurrency", type=int, default=8, help="Clients de la charge parallèle")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée mesurée par cible (s)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Charge non mesurée avant chaque cible (s)")
+    parser.add_argument("--input", help="Fichier JSONL de transactions (sinon générateur synthétique)")
+    parser.add_argument("--synthetic", type=int, default=10000, help="Nombre de transactions synthétiques")
+    parser.add_argument("--allow-cache", action="store_true", help="Laisser le cache servir les répétitions")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout HTTP (s)")
+    parser.add_argument("--output", help="Écrire les résultats (JSON)")
+    parser.add_argument("--save-baseline", help="Enregistrer les résultats comme baseline (JSON)")
+    parser.add_argument("--baseline", help="Baseline à comparer (échec si régression)")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Dégradation tolérée (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    # En processus, plusieurs threads mesurent surtout la contention du GIL
+    args.concurrency = args.concurrency or (1 if args.in_process else 8)
+    transactions = load_transactions(args.input) if args.input else paysim_transactions(args.synthetic)
+    targets = in_process_targets() if args.in_process else http_targets(args.url, args.timeout)
+    transport_name = "inprocess" if args.in_process else "http"
+    mode = f"r{args.rate:g}" if args.rate else f"c{args.concurrency}"
+
+    results, background = {}, {}
+    for name in args.target:
+        call = targets[name]
+        loader = None
+        if args.background:
+            # Démarre avec l'échauffement et couvre toute la mesure
+            loader_result = []
+            loader = threading.Thread(target=lambda: loader_result.append(run_load(
+                targets[args.background], transactions, args.warmup + args.duration,
+                args.background_concurrency, None, not args.allow_cache,
+            )), daemon=True)
+            loader.start()
+        if args.warmup:
+            run_load(call, transactions, args.warmup, args.concurrency, args.rate, not args.allow_cache)
+        latencies, errors, elapsed = run_load(
+            call, transactions, args.duration, args.concurrency, args.rate, not args.allow_cache
+        )
+        results[f"{name}/{transport_name}/{mode}"] = summarize(latencies, errors, elapsed)
+        if loader is not None:
+            loader.join()
+            key = f"{args.background}/{transport_name}/c{args.background_concurrency}/pendant-{name}"
+            background[key] = summarize(*loader_result[0])
+
+    print(f"\n{'scénario':>28} | {'req/s':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'erreurs':>7} | {'503':>6}")
+    print("-" * 93)
+    for key, r in {**results, **background}.items():
+        print(f"{key:>28} | {r['throughput_rps']:>9.1f} | {r.get('p50_ms', float('nan')):>8.3f} | "
+              f"{r.get('p95_ms', float('nan')):>8.3f} | {r.get('p99_ms', float('nan')):>8.3f} | "
+              f"{r['errors']:>7} | {r['rejected']:>6}")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "config": {
+            "transport": transport_name,
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration": args.duration,
+            "input": args.input or f"synthetic:{args.synthetic}",
+            "background": args.background,
+        },
+        "scenarios": results,
+        "background": background,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Résultats écrits dans {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Régressions par rapport à {args.baseline} :")
+            for message in regressions:
+                print(f"   - {message}")
+            sys.exit(1)
+        print(f"\n✅ Aucune régression au-delà de {args.tolerance:.0%} par rapport à {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
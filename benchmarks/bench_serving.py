@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Benchmark de montée en charge du serveur de production (api_flask/serve.py).
+
+Pour chaque nombre de workers, démarre le serveur, attend /health/ready puis
+envoie des requêtes /predict depuis plusieurs processus clients pendant
+une durée fixe. Affiche le débit (requêtes/s) et l'efficacité par rapport
+à un worker. Les clients tournent sur la même machine : sur un hôte de
+16 cœurs, réserver des cœurs aux clients (ou limiter --workers) pour que
+la mesure reflète le serveur.
+
+Usage:
+    python benchmarks/bench_serving.py --workers 1 2 4 8 16 --duration 20
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TRANSACTION = {
+    "step": 100,
+    "type": "TRANSFER",
+    "amount": 1000.0,
+    "oldbalanceOrg": 5000.0,
+    "newbalanceOrig": 4000.0,
+    "oldbalanceDest": 2000.0,
+    "newbalanceDest": 3000.0,
+    "hour": 10,
+    "erreur_orig": 0.0,
+    "erreur_dst": 0.0,
+    "videur_orig": 0,
+    "videur_dest": 0,
+}
+
+
+def client(url, deadline, counter):
+    """Boucle fermée : une requête à la fois jusqu'à l'échéance."""
+    session = requests.Session()
+    done = 0
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        # Montant variable pour ne pas mesurer le cache de prédictions
+        payload = dict(TRANSACTION, amount=1000.0 + i + os.getpid() * 1e-3)
+        if session.post(url, json=payload, timeout=10).status_code == 200:
+            done += 1
+    with counter.get_lock():
+        counter.value += done
+
+
+def wait_ready(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run(workers, clients, duration, port):
+    env = dict(
+        os.environ,
+        SERVE_WORKERS=str(workers),
+        API_HOST="127.0.0.1",
+        API_PORT=str(port),
+        PREDICTION_CACHE_SIZE="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api_flask", "serve.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not wait_ready(base_url):
+            raise RuntimeError(f"Le serveur ({workers} workers) n'a pas démarré")
+        counter = mp.Value("l", 0)
+        deadline = time.time() + duration
+        procs = [
+            mp.Process(target=client, args=(f"{base_url}/predict", deadline, counter))
+            for _ in range(clients)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        return counter.value / duration
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de /predict selon le nombre de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--clients-per-worker", type=int, default=2,
+                        help="Processus clients par worker (charge saturante)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée par mesure (s)")
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    print(f"Cœurs disponibles : {os.cpu_count()}")
+    print(f"\n{'workers':>8} | {'req/s':>10} | {'accélération':>12} | {'efficacité':>10}")
+    print("-" * 50)
+    baseline = None
+    for workers in args.workers:
+        rps = run(workers, workers * args.clients_per_worker, args.duration, args.port)
+        baseline = baseline or rps
+        speedup = rps / baseline
+        print(f"{workers:>8} | {rps:>10.0f} | {speedup:>11.2f}x | {speedup / workers * 100:>9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Benchmark de démarrage : pipeline joblib contre artefact compact.
+
+Pour chaque format, lance des processus Python neufs qui chargent le
+modèle (imports compris) et scorent une première transaction. Mesure :
+  - le temps jusqu'à la première prédiction (médiane sur --runs processus)
+  - la mémoire de --processes processus chargés simultanément, comme des
+    workers sans preload : RSS, PSS (pages partagées réparties) et USS
+    (pages privées), lues dans /proc/<pid>/smaps_rollup (Linux)
+
+L'artefact est exporté dans un répertoire temporaire s'il n'est pas fourni.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --processes 4
+    python benchmarks/bench_startup.py --artifact api_flask/model_artifact
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+API_DIR = os.path.join(ROOT, "api_flask")
+
+# Exécuté dans chaque processus mesuré
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from core.model_registry import ModelRegistry
+imported = time.perf_counter()
+registry = ModelRegistry(poll_interval=0, artifact_path=sys.argv[2] or None)
+bundle = registry.load()
+loaded = time.perf_counter()
+bundle.engine.predict_proba(bundle.schema.sample(1))
+ready = time.perf_counter()
+print("RESULT " + json.dumps({
+    "import_seconds": imported - start,
+    "load_seconds": loaded - imported,
+    "first_prediction_seconds": ready - start,
+}), flush=True)
+if len(sys.argv) > 3:
+    sys.stdin.read()
+"""
+
+
+def run_child(artifact, hold=False):
+    args = [sys.executable, "-c", CHILD, API_DIR, artifact or ""] + (["hold"] if hold else [])
+    return subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+
+def read_timings(proc):
+    # Les journaux de chargement passent aussi par stdout : seule la ligne RESULT compte
+    for line in proc.stdout:
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError("Le processus de mesure s'est arrêté sans résultat")
+
+
+def memory_kb(pid):
+    """RSS, PSS et USS d'un processus (kB)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def measure(artifact, runs, processes):
+    timings = []
+    for _ in range(runs):
+        proc = run_child(artifact)
+        timings.append(read_timings(proc))
+        proc.wait()
+
+    result = {
+        key: statistics.median(t[key] for t in timings)
+        for key in ("import_seconds", "load_seconds", "first_prediction_seconds")
+    }
+
+    if processes and os.path.exists("/proc/self/smaps_rollup"):
+        procs = [run_child(artifact, hold=True) for _ in range(processes)]
+        try:
+            for proc in procs:
+                read_timings(proc)
+            memory = [memory_kb(proc.pid) for proc in procs]
+        finally:
+            for proc in procs:
+                proc.stdin.close()
+                proc.wait()
+        result.update({
+            "rss_mb_per_process": statistics.mean(m["rss"] for m in memory) / 1024,
+            "pss_mb_total": sum(m["pss"] for m in memory) / 1024,
+            "uss_mb_per_process": statistics.mean(m["uss"] for m in memory) / 1024,
+        })
+    return result
+
+
+def export(directory):
+    sys.path.insert(0, API_DIR)
+    from core.model_registry import ModelRegistry
+    from core.model_artifact import export_artifact
+
+    export_artifact(ModelRegistry(poll_interval=0).load(), directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démarrage et mémoire : joblib contre artefact compact")
+    parser.add_argument("--artifact", help="Répertoire d'artefact existant (sinon exporté à la volée)")
+    parser.add_argument("--runs", type=int, default=5, help="Démarrages mesurés par format")
+    parser.add_argument("--processes", type=int, default=4, help="Processus simultanés pour la mémoire")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = args.artifact
+        if artifact is None:
+            artifact = os.path.join(tmp, "artifact")
+            export(artifact)
+
+        results = {
+            "joblib": measure(None, args.runs, args.processes),
+            "artifact": measure(artifact, args.runs, args.processes),
+        }
+
+    keys = [
+        ("import_seconds", "imports (s)"),
+        ("load_seconds", "chargement (s)"),
+        ("first_prediction_seconds", "1re prédiction (s)"),
+        ("rss_mb_per_process", "RSS / processus (Mo)"),
+        ("uss_mb_per_process", "USS / processus (Mo)"),
+        ("pss_mb_total", f"PSS total, {args.processes} proc. (Mo)"),
+    ]
+    print(f"\n{'':>30} | {'joblib':>10} | {'artefact':>10}")
+    print("-" * 58)
+    for key, label in keys:
+        if key in results["joblib"]:
+            print(f"{label:>30} | {results['joblib'][key]:>10.3f} | {results['artifact'][key]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
-from services.api_client import predict, explain
+from services.api_client import predict
 import time
 
 def show_page():
@@ -70,8 +70,9 @@ def show_page():
                with st.spinner("Prediction en cours ..."):
                     time.sleep(2)
                     try:
-                        proba=predict(data)
-                        expl=explain(data)
+                        # Une seule requête : prédiction et SHAP partagent le préprocessing
+                        proba=predict(data, explain=True)
+                        expl={"shap_values": proba.get("shap_values", {})}
                         
                         # Debug: afficher ce qu'on reçoit
                         #st.write("DEBUG - Données envoyées:", data)
@@ -2,11 +2,20 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+from services.api_client import global_importance
 
 def show_page():
     st.markdown("## 📈 Explications SHAP")
     st.markdown("---")
-    
+
+    tab_last, tab_global = st.tabs(["🔎 Dernière prédiction", "🌍 Importance globale"])
+    with tab_last:
+        show_last_prediction()
+    with tab_global:
+        show_global_importance()
+
+
+def show_last_prediction():
     st.info("ℹ️ Cette page affiche les valeurs SHAP pour expliquer les prédictions du modèle")
     
     # Vérifier s'il y a des données SHAP en session
@@ -115,4 +124,69 @@ def show_page():
     - Les barres **bleues** indiquent que la feature diminue le risque de fraude
     - L'ordre vertical montre l'importance relative des features
     - Les valeurs plus grandes en magnitude = plus d'impact sur la décision
-    """)
\ No newline at end of file
+    """)
+
+
+def show_global_importance():
+    st.info("ℹ️ Importance des features agrégée sur tout le trafic expliqué par le modèle actif de l'API")
+
+    data = global_importance()
+    if not data["count"]:
+        st.warning(f"⚠️ Aucune explication enregistrée sur la période pour le modèle {data['model_version']}")
+        return
+    features = data["features"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Version du modèle", data["model_version"])
+    with col2:
+        st.metric("Transactions expliquées", f"{data['count']:,}")
+    with col3:
+        st.metric("Tranches", len(data["buckets"]))
+    with col4:
+        st.metric("Durée d'une tranche", f"{data['bucket_seconds'] // 60} min")
+
+    # 1. Moyenne des |SHAP| par feature
+    ranking = data["ranking"][::-1]
+    fig = go.Figure(go.Bar(
+        y=ranking,
+        x=[features[name]["mean_abs"] for name in ranking],
+        orientation='h',
+        error_x=dict(
+            type='data',
+            symmetric=False,
+            array=[features[name]["abs_quantiles"]["p95"] - features[name]["mean_abs"] for name in ranking],
+            arrayminus=[0] * len(ranking),
+        ),
+        hovertemplate='<b>%{y}</b><br>Moyenne |SHAP|: %{x:.4f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title="Moyenne des |SHAP| (barre d'erreur : p95)",
+        xaxis_title="|SHAP|",
+        height=400,
+        showlegend=False
+    )
+    st.plotly_chart(fig, use_container_width=True, key="global_shap_bar_chart")
+
+    # 2. Tableau : moyennes et quantiles
+    table = pd.DataFrame([
+        {
+            'Feature': name,
+            'Moyenne |SHAP|': features[name]["mean_abs"],
+            'Moyenne signée': features[name]["mean"],
+            **{f"SHAP {label}": value for label, value in features[name]["quantiles"].items()},
+        }
+        for name in data["ranking"]
+    ])
+    st.dataframe(table.round(4), use_container_width=True)
+
+    # 3. Évolution par tranche de temps
+    if len(data["buckets"]) > 1:
+        st.subheader("📉 Évolution de l'importance")
+        fig = go.Figure()
+        starts = [bucket["start"] for bucket in data["buckets"]]
+        for name in data["ranking"][:5]:
+            fig.add_trace(go.Scatter(x=starts, y=[bucket["mean_abs"][name] for bucket in data["buckets"]],
+                                     mode='lines+markers', name=name))
+        fig.update_layout(yaxis_title="Moyenne |SHAP|", height=350)
+        st.plotly_chart(fig, use_container_width=True, key="global_shap_series")
@@ -3,9 +3,11 @@ import streamlit as st
 
 API_URL = "http://localhost:5000"
 
-def predict(data):
+def predict(data, explain=False):
+    """Prédiction ; avec explain=True, la réponse inclut aussi les valeurs SHAP."""
     try:
-        response = requests.post(f"{API_URL}/predict", json=data, timeout=10)
+        params = {"explain": "true"} if explain else None
+        response = requests.post(f"{API_URL}/predict", json=data, params=params, timeout=10)
         response.raise_for_status()  # Lève une erreur si status >= 400
         return response.json()
     except requests.exceptions.ConnectionError:
@@ -21,9 +23,11 @@ def predict(data):
         st.error(f"❌ Erreur lors de la prédiction: {str(e)}")
         st.stop()
 
-def explain(data):
+def explain(data, top_k=None):
+    """Valeurs SHAP par feature ; avec top_k, seules les k plus fortes contributions."""
     try:
-        response = requests.post(f"{API_URL}/explain", json=data, timeout=10)
+        params = {"top_k": top_k} if top_k else None
+        response = requests.post(f"{API_URL}/explain", json=data, params=params, timeout=10)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.ConnectionError:
@@ -38,3 +42,23 @@ def explain(data):
     except Exception as e:
         st.error(f"❌ Erreur lors de l'explication: {str(e)}")
         st.stop()
+
+def global_importance(version=None, buckets=None):
+    """Importance globale des features sur le trafic expliqué (modèle actif par défaut)."""
+    try:
+        params = {key: value for key, value in (("version", version), ("buckets", buckets)) if value}
+        response = requests.get(f"{API_URL}/explain/global", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.ConnectionError:
+        st.error("❌ Erreur de connexion: Impossible de se connecter à l'API Flask")
+        st.stop()
+    except requests.exceptions.Timeout:
+        st.error("❌ Timeout: L'API Flask ne répond pas à temps")
+        st.stop()
+    except requests.exceptions.HTTPError as e:
+        st.error(f"❌ Erreur HTTP: {e.response.status_code} - {e.response.text}")
+        st.stop()
+    except Exception as e:
+        st.error(f"❌ Erreur lors de la lecture de l'importance globale: {str(e)}")
+        st.stop()
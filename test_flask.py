@@ -3,6 +3,7 @@
 
 import sys
 import os
+import json
 
 # Changer le répertoire de travail vers api_flask
 os.chdir(os.path.join(os.path.dirname(__file__), 'api_flask'))
@@ -55,7 +56,7 @@ try:
         "erreur_orig": 0.0,
         "erreur_dst": 0.0,
         "videur_orig": 0,
-        "vider_dest": 0
+        "videur_dest": 0
     }
     
     from services.prediction_service import predict_instance
@@ -67,6 +68,27 @@ except Exception as e:
     traceback.print_exc()
     sys.exit(1)
 
+# Tester un lot contenant des lignes invalides (isolées, pas d'erreur 500)
+print("\n✅ Étape 5: Test de lot avec type invalide...")
+try:
+    client = app.test_client()
+    batch = [test_data, {**test_data, "type": ["x"]}, {**test_data, "type": {"a": 1}}, test_data]
+    response = client.post("/predict/batch", json=batch)
+    results = response.get_json()
+    assert response.status_code == 200, f"statut {response.status_code} : {results}"
+    assert [("error" in r) for r in results] == [False, True, True, False], results
+
+    body = "".join(json.dumps(row) + "\n" for row in batch)
+    response = client.post("/predict/stream", data=body, content_type="application/x-ndjson")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r.get("index") for r in lines] == [0, 1, 2, 3], lines
+    print("✅ Lignes invalides isolées dans /predict/batch et /predict/stream")
+except Exception as e:
+    print(f"❌ Erreur lors du test de lot: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
 # Lancer Flask
 print("\n🚀 Lancement de Flask...")
 print("=" * 60)